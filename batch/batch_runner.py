@@ -1,10 +1,17 @@
 import os
 import sys
 import json
+import time
+import shlex
+import argparse
 import traceback
-import pymxs
 
-rt = pymxs.runtime
+try:
+    import pymxs
+    rt = pymxs.runtime
+except ImportError:  # coordinator side (outside 3ds Max)
+    pymxs = None
+    rt = None
 
 
 def ensure_repo_on_path():
@@ -14,10 +21,26 @@ def ensure_repo_on_path():
     return repo_root
 
 
-def run_on_file(src_max_path, dst_max_path, report_dir, options):
+def run_on_file(src_max_path, dst_max_path, report_dir, options, progress=None, uploader=None):
     """
     Open src .max, run cleaning, save to dst path, write report JSON.
+    Records process RSS around the file and resets the scene afterwards
+    (option reset_between_files, default True) so per-file memory deltas
+    show which scenes leak.
+    If the clean changed nothing (scene fingerprint unchanged, option
+    skip_noop_save default True) the source is cloned to dst instead of
+    re-saved; result["save_mode"] is "saved", "reflink", "hardlink" or "copy".
+    Hardlinks are only used with option noop_allow_hardlink.
+    With option scan_only the file is only scanned (see scan_file).
+    progress: optional callable(phase) for "load", "clean", "save", "reset"
+    (used by the worker watchdog).
+    uploader: optional batch.staging.StagingUploader (see open_uploader); the
+    scene and report are written to local staging and uploaded in the
+    background, and the finished result comes back from uploader.completed().
     """
+    if options.get("scan_only", False):
+        return scan_file(src_max_path, report_dir, options, progress)
+
     result = {
         "src_file": src_max_path,
         "dst_file": dst_max_path,
@@ -25,35 +48,273 @@ def run_on_file(src_max_path, dst_max_path, report_dir, options):
         "errors": [],
         "actions": [],
     }
+    progress = _phase_timer(progress, result)
+
+    from batch.memory import current_rss_mb
+    rss_before = current_rss_mb()
+    uploads = []
 
     try:
+        progress("load")
         rt.loadMaxFile(src_max_path, useFileUnits=True, quiet=True)
+        progress("clean")
 
         from core.transform_fixes import clean_transforms
         from core.scene_cleanup import clean_scene
+        from core.scene_fingerprint import scene_fingerprint
+
+        skip_noop = options.get("skip_noop_save", True)
+        fingerprint = scene_fingerprint() if skip_noop else None
 
         actions = []
         actions += clean_transforms(options)
+        if options.get("merge_duplicate_materials", False):
+            from core.material_dedup import merge_duplicate_materials
+            actions += merge_duplicate_materials(options)
         actions += clean_scene(options)
         result["actions"] = actions
 
         # ? Save as copy to output folder (safe)
-        rt.saveMaxFile(dst_max_path, quiet=True)
+        progress("save")
+        result["scene_changed"] = fingerprint is None or scene_fingerprint() != fingerprint
+        result["save_mode"] = None
+        if uploader is not None:
+            if result["scene_changed"]:
+                staged = uploader.stage_path(dst_max_path)
+                rt.saveMaxFile(staged, quiet=True)
+                uploads.append((staged, dst_max_path, True))
+                result["save_mode"] = "saved"
+            else:
+                uploads.append((src_max_path, dst_max_path, False))
+                result["save_mode"] = "copy"
+        elif not result["scene_changed"]:
+            result["save_mode"] = _clone_unchanged(src_max_path, dst_max_path, options, result)
+        if result["save_mode"] is None:
+            rt.saveMaxFile(dst_max_path, quiet=True)
+            result["save_mode"] = "saved"
+
+        result["read_bytes"] = _size(src_max_path)
+        if result["save_mode"] in ("saved", "copy"):
+            result["written_bytes"] = _size(uploads[0][0] if uploads else dst_max_path)
 
     except Exception as e:
         result["status"] = "failed"
         result["errors"].append(str(e))
         result["errors"].append(traceback.format_exc())
 
+    _finish_file(result, rss_before, options, progress)
+    progress(None)
+
     os.makedirs(report_dir, exist_ok=True)
     base = os.path.splitext(os.path.basename(src_max_path))[0]
     report_path = os.path.join(report_dir, f"{base}_report.json")
-    with open(report_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2)
+    if uploader is not None:
+        # The report is written once the uploads are done, with their outcome
+        uploader.submit(result, uploads, report_path)
+    else:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    return result
+
+
+def open_uploader(options):
+    """
+    StagingUploader for option staging_dir (local fast disk), or None.
+
+    options keys:
+      - staging_dir (default None = write outputs directly)
+      - staging_workers (default 2)
+      - staging_max_mb (default 20480): backpressure bound on bytes waiting to upload
+        or kept in staging after a failed upload (new files fail once those fill it)
+    """
+    staging_dir = options.get("staging_dir")
+    if not staging_dir or options.get("scan_only", False):
+        return None
+
+    from batch.staging import StagingUploader
+    return StagingUploader(
+        staging_dir,
+        workers=options.get("staging_workers", 2),
+        max_bytes=float(options.get("staging_max_mb", 20480)) * 1024 * 1024,
+    )
+
+
+def _clone_unchanged(src_max_path, dst_max_path, options, result):
+    from batch.file_clone import clone_file
+
+    try:
+        return clone_file(src_max_path, dst_max_path, options.get("noop_allow_hardlink", False))
+    except Exception as e:
+        result["errors"].append(f"No-op clone failed, saving instead: {e}")
+        return None
+
+
+def scan_file(src_max_path, report_dir, options, progress=None):
+    """
+    Scan-only triage: cheapest load, scan_scene + scan_materials_and_textures,
+    no modification and no save. Writes a compact <name>_scan.json
+    ({"summary", "stats", "issues": [[level, node, message, rule], ...]}); the
+    batch summary only carries the counts (per level and per rule).
+    progress phases: "load", "scan", "reset".
+    Results come from the scan cache (core.scan_cache) when the file, options
+    and config are unchanged since an earlier scan; the file is then not
+    loaded at all and result["cached"] is True.
+    """
+    result = {
+        "src_file": src_max_path,
+        "dst_file": None,
+        "status": "ok",
+        "mode": "scan",
+        "errors": [],
+        "actions": [],
+    }
+    progress = _phase_timer(progress, result)
+
+    from batch.memory import current_rss_mb
+    rss_before = current_rss_mb()
+    issues = []
+    stats = {}
+
+    try:
+        from core.scan import scan_scene
+        from core.material_scan import scan_materials_and_textures
+        from core.results import ScanResults
+        from core.scan_cache import cached_scan, scene_identity
+
+        def compute():
+            progress("load")
+            _load_for_scan(src_max_path)
+            result["read_bytes"] = _size(src_max_path)
+            progress("scan")
+            scene_results = scan_scene(options)
+            materials = scan_materials_and_textures(options)
+            return ScanResults(list(scene_results) + materials, scene_results.stats, scene_results.sample)
+
+        progress("cache")
+        scanned, result["cached"] = cached_scan("batch_scan", options, scene_identity(src_max_path, options), compute)
+        stats = scanned.stats
+        if scanned.sample:
+            result["sample"] = scanned.sample
+        issues += scanned
+    except Exception as e:
+        result["status"] = "failed"
+        result["errors"].append(str(e))
+        result["errors"].append(traceback.format_exc())
+    finally:
+        try:
+            rt.enableSceneRedraw()
+        except Exception:
+            pass
+
+    from core.results import count_levels
+    from core.metrics import count_by_rule
+
+    counts = count_levels(issues)
+    rules = count_by_rule(issues)
+    rules.update((rule, s["count"]) for rule, s in stats.items())
+    result["summary"] = {
+        "warnings": counts.get("WARNING", 0),
+        "infos": counts.get("INFO", 0),
+        "rules": rules,
+    }
+    _finish_file(result, rss_before, options, progress)
+    progress(None)
+
+    os.makedirs(report_dir, exist_ok=True)
+    base = os.path.splitext(os.path.basename(src_max_path))[0]
+    result["scan_report"] = os.path.join(report_dir, f"{base}_scan.json")
+    report = {
+        "src_file": src_max_path,
+        "summary": result["summary"],
+        "stats": stats,
+        # [level, node, message, rule]; the rule keys core.scan_diff between runs
+        "issues": [[r.get("level"), r.get("node"), r.get("message"), getattr(r, "rule", None)] for r in issues],
+    }
+    from core import tracing
+    with tracing.span("report.scan_json", "report", issues=len(issues)):
+        with open(result["scan_report"], "w", encoding="utf-8") as f:
+            json.dump(report, f, separators=(",", ":"))
 
     return result
 
 
+def _load_for_scan(src_max_path):
+    # No redraws while loading/scanning, and never stop on missing plugins / assets / xrefs
+    rt.disableSceneRedraw()
+    log = rt.Name("logmsg")
+    try:
+        rt.loadMaxFile(src_max_path, useFileUnits=True, quiet=True,
+                       missingExtFilesAction=log, missingDLLsAction=log, missingXRefsAction=log)
+    except Exception:
+        # Older Max builds don't know all of the keywords
+        rt.loadMaxFile(src_max_path, useFileUnits=True, quiet=True)
+
+
+def _finish_file(result, rss_before, options, progress):
+    from batch.memory import current_rss_mb
+
+    rss_loaded = current_rss_mb()
+    if options.get("reset_between_files", True):
+        progress("reset")
+        _reset_scene()
+    rss_after = current_rss_mb()
+    result["memory"] = _memory_record(rss_before, rss_loaded, rss_after)
+
+
+def _phase_timer(progress, result):
+    # Wraps progress(phase): time until the next call is booked to result["phases"][phase]
+    # (and traced, see core.tracing); progress(None) closes the last phase and the file
+    from core import tracing
+
+    progress = progress or (lambda phase: None)
+    phases = result.setdefault("phases", {})
+    name = os.path.basename(result["src_file"])
+    started = time.time()
+    current = [None, started]
+
+    def timed(phase):
+        now = time.time()
+        if current[0] is not None:
+            phases[current[0]] = round(phases.get(current[0], 0.0) + now - current[1], 3)
+            tracing.complete(current[0], "batch", current[1], now, file=name)
+        current[0], current[1] = phase, now
+        if phase is not None:
+            progress(phase)
+        else:
+            tracing.complete(name, "file", started, now, status=result.get("status"))
+            tracing.flush()
+
+    return timed
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _reset_scene():
+    try:
+        rt.resetMaxFile(rt.Name("noPrompt"))
+    except Exception:
+        pass
+
+
+def _memory_record(before, loaded, after):
+    def _r(v):
+        return round(v, 1) if v is not None else None
+
+    delta = after - before if before is not None and after is not None else None
+    return {
+        "rss_before_mb": _r(before),
+        "rss_loaded_mb": _r(loaded),
+        "rss_after_mb": _r(after),
+        "delta_mb": _r(delta),
+    }
+
+
 def collect_max_files(input_dir):
     max_files = []
     for root, _, files in os.walk(input_dir):
@@ -63,13 +324,92 @@ def collect_max_files(input_dir):
     return max_files
 
 
-def run_batch(input_dir, output_dir, options):
+def prefilter_max_files(files, options):
     """
-    Runs batch in the current Max session (open -> clean -> save copy).
-    Writes reports to <output_dir>/reports.
+    Offline triage from the .max container (no scene loading):
+      - skip files that are not readable .max files
+      - skip files saved by a newer 3ds Max than this session
+      - skip empty scenes (no objects, only the default layer) if prefilter_skip_empty
+      - order the rest cheapest first (faces, then file size)
+
+    options keys:
+      - prefilter (default True)
+      - prefilter_skip_empty (default True)
+      - prefilter_workers (default 8)
+
+    Returns (ordered_files, skipped, infos): skipped is {path: reason}, infos is {path: info}.
     """
-    ensure_repo_on_path()
+    if not options.get("prefilter", True):
+        return list(files), {}, {}
+
+    from core.max_file_info import triage_max_files
+
+    infos = triage_max_files(files, workers=options.get("prefilter_workers", 8))
+    current = _current_max_version()
+    skip_empty = options.get("prefilter_skip_empty", True)
+
+    keep = []
+    skipped = {}
+    for src in files:
+        info = infos.get(src) or {}
+        if info.get("error"):
+            skipped[src] = f"Unreadable .max file: {info['error']}"
+            continue
+
+        saved = info.get("saved_as_version") or info.get("max_version")
+        if current and saved and saved > current:
+            skipped[src] = f"Saved by newer 3ds Max ({saved:g} > {current:g})"
+            continue
 
+        objects = (info.get("objects") or {}).get("total")
+        layers = info.get("layers")
+        if skip_empty and objects == 0 and layers is not None and layers <= 1:
+            skipped[src] = "Empty scene (no objects, default layer only)"
+            continue
+
+        keep.append(src)
+
+    keep.sort(key=lambda p: (infos[p].get("faces") or 0, infos[p].get("size") or 0))
+    return keep, skipped, infos
+
+
+def _current_max_version():
+    try:
+        return rt.maxVersion()[0] / 1000.0
+    except Exception:
+        return None
+
+
+def _prefilter_summary(info):
+    if not info or info.get("error"):
+        return None
+    return {
+        "max_version": info.get("saved_as_version") or info.get("max_version"),
+        "objects": (info.get("objects") or {}).get("total"),
+        "faces": info.get("faces"),
+        "materials": info.get("materials"),
+        "layers": info.get("layers"),
+        "missing_assets": info.get("missing_files", []),
+    }
+
+
+def plan_batch(input_dir, output_dir, options):
+    """
+    Discover + prefilter inputs and create the output folders.
+    Files on the quarantine list (see batch.quarantine) are skipped, or with
+    quarantine_mode "last" moved to the end with a larger time budget.
+    Byte-identical inputs are processed once (see dedupe_inputs).
+
+    options keys:
+      - quarantine_mode ("skip" default, "last", "off")
+      - quarantine_budget_scale (default 4)
+      - quarantine_path (default <cache>/quarantine.json)
+      - dedupe_inputs (default True)
+
+    Returns (jobs, skipped_results, infos, report_dir); a job is
+    {"src", "dst", "report_dir"} plus "budget_scale"/"quarantined" for
+    quarantined files and "duplicates" [{"src", "dst"}] for deduplicated copies.
+    """
     input_dir = os.path.abspath(input_dir)
     output_dir = os.path.abspath(output_dir)
     report_dir = os.path.join(output_dir, "reports")
@@ -77,21 +417,398 @@ def run_batch(input_dir, output_dir, options):
     os.makedirs(report_dir, exist_ok=True)
 
     files = collect_max_files(input_dir)
+    files, skipped, infos = prefilter_max_files(files, options)
+    files, quarantined = _apply_quarantine(files, skipped, options)
+    files, duplicates = dedupe_inputs(files, options)
 
-    summaries = []
-    for src in files:
-        rel = os.path.relpath(src, input_dir)
-        dst = os.path.join(output_dir, rel)
+    skipped_results = []
+    for src, reason in skipped.items():
+        print(f"[batch_runner] Skipping: {src} ({reason})")
+        skipped_results.append({
+            "src_file": src,
+            "dst_file": None,
+            "status": "skipped",
+            "errors": [],
+            "actions": [],
+            "reason": reason,
+            "prefilter": _prefilter_summary(infos.get(src)),
+        })
+
+    def _dst(src):
+        if options.get("scan_only", False):
+            return None  # nothing is saved
+        dst = os.path.join(output_dir, os.path.relpath(src, input_dir))
         os.makedirs(os.path.dirname(dst), exist_ok=True)
+        return dst
+
+    jobs = []
+    for src in files:
+        job = {"src": src, "dst": _dst(src), "report_dir": file_report_dir(report_dir, src, input_dir)}
+        if src in quarantined:
+            job["quarantined"] = True
+            job["budget_scale"] = float(options.get("quarantine_budget_scale", 4))
+        if src in duplicates:
+            job["duplicates"] = [{"src": d, "dst": _dst(d), "report_dir": file_report_dir(report_dir, d, input_dir)}
+                                 for d in duplicates[src]]
+        jobs.append(job)
+
+    return jobs, skipped_results, infos, report_dir
+
+
+def file_report_dir(report_dir, src, input_dir):
+    """
+    Report folder of one input: the input's subfolder under the input root,
+    mirrored below report_dir, so same-named scenes in different folders
+    keep separate reports (core.scan_diff keys reports the same way).
+    """
+    sub = os.path.dirname(os.path.relpath(src, input_dir))
+    if not sub or sub.startswith(os.pardir):
+        return report_dir
+    return os.path.join(report_dir, sub)
+
+
+def dedupe_inputs(files, options):
+    """
+    Group byte-identical inputs (size buckets, then parallel streamed hashes via
+    core.file_hashing) so each distinct scene is processed once.
+    The first file of a group in planned order is the representative.
+
+    options keys:
+      - dedupe_inputs (default True)
+      - dedupe_workers (default 8)
+
+    Returns (files, duplicates): files without the copies, duplicates is
+    {representative: [copies]}.
+    """
+    if not options.get("dedupe_inputs", True) or len(files) < 2:
+        return list(files), {}
+
+    from core.file_hashing import group_identical_files
+
+    groups, _ = group_identical_files(files, workers=options.get("dedupe_workers", 8))
+    order = {src: i for i, src in enumerate(files)}
+    duplicates = {}
+    for group in groups:
+        group = sorted(group, key=order.get)
+        duplicates[group[0]] = group[1:]
+
+    copies = set(d for dups in duplicates.values() for d in dups)
+    if copies:
+        print(f"[batch_runner] Identical inputs: {len(copies)} copies of {len(duplicates)} scene(s) will not be reprocessed")
+    return [f for f in files if f not in copies], duplicates
+
 
-        print(f"[batch_runner] Processing: {src}")
-        summaries.append(run_on_file(src, dst, report_dir, options))
+def expand_duplicates(result, job, options):
+    """
+    Fan a representative's finished result out to its identical inputs: the
+    cleaned output is cloned to each copy's destination (reflink / hardlink
+    with noop_allow_hardlink / copy) and each copy gets its own result and report.
+    Returns [result, *copy_results].
+    """
+    dups = job.get("duplicates") or []
+    if not dups:
+        return [result]
+
+    from batch.file_clone import clone_file
+
+    result["duplicates"] = [d["src"] for d in dups]
+    out = [result]
+    for d in dups:
+        r = {
+            "src_file": d["src"],
+            "dst_file": d["dst"],
+            "status": result.get("status"),
+            "errors": [],
+            "actions": result.get("actions", []),
+            "deduplicated_from": result["src_file"],
+        }
+        for key in ("mode", "summary", "scan_report"):
+            if key in result:
+                r[key] = result[key]
+
+        if result.get("status") != "ok":
+            r["errors"].append(f"Identical to {result['src_file']}, which {result.get('status')}")
+        elif d["dst"] and result.get("dst_file"):
+            try:
+                r["save_mode"] = clone_file(result["dst_file"], d["dst"], options.get("noop_allow_hardlink", False))
+                if r["save_mode"] == "copy":
+                    r["written_bytes"] = _size(d["dst"])
+            except Exception as e:
+                r["status"] = "failed"
+                r["errors"].append(f"Copy of deduplicated output failed: {e}")
+
+        report_dir = d.get("report_dir") or job["report_dir"]
+        base = os.path.splitext(os.path.basename(d["src"]))[0]
+        try:
+            os.makedirs(report_dir, exist_ok=True)
+            if r.get("mode") == "scan":
+                r["scan_report"] = _copy_scan_report(result.get("scan_report"), d["src"], report_dir, base)
+            else:
+                with open(os.path.join(report_dir, f"{base}_report.json"), "w", encoding="utf-8") as f:
+                    json.dump(r, f, indent=2)
+        except (OSError, ValueError) as e:
+            r["errors"].append(f"Report not written: {e}")
+        out.append(r)
+    return out
+
+
+def _copy_scan_report(scan_report, src, report_dir, base):
+    # A copy's scan is the representative's, under the copy's own name
+    if not scan_report:
+        return None
+    with open(scan_report, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    report["src_file"] = src
+    path = os.path.join(report_dir, f"{base}_scan.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, separators=(",", ":"))
+    return path
+
+
+def _apply_quarantine(files, skipped, options):
+    mode = options.get("quarantine_mode", "skip")
+    if mode == "off":
+        return files, set()
+
+    from batch.quarantine import Quarantine
+    quarantine = Quarantine(options.get("quarantine_path"))
+    keep = []
+    late = []
+    for src in files:
+        entry = quarantine.get(src)
+        if entry is None:
+            keep.append(src)
+        elif mode == "last":
+            late.append(src)
+        else:
+            skipped[src] = f"Quarantined ({entry.get('reason')}, {entry.get('count', 1)}x)"
+    return keep + late, set(late)
+
+
+def release_quarantine(result, job, options):
+    """
+    Drop a quarantined file from the list once it processed successfully.
+    """
+    if job.get("quarantined") and result.get("status") == "ok":
+        from batch.quarantine import Quarantine
+        Quarantine(options.get("quarantine_path")).release(job["src"])
+
+
+def attach_prefilter(result, infos):
+    prefilter = _prefilter_summary(infos.get(result.get("src_file")))
+    if prefilter is not None:
+        result["prefilter"] = prefilter
+    return result
+
+
+def write_batch_summary(report_dir, summaries, infos=None):
+    """
+    Write batch_summary.json (+ prefilter.json) and print the top memory leakers.
+    """
+    from core import tracing
 
     summary_path = os.path.join(report_dir, "batch_summary.json")
-    with open(summary_path, "w", encoding="utf-8") as f:
-        json.dump(summaries, f, indent=2)
+    with tracing.span("report.batch_summary", "report", files=len(summaries)):
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, indent=2)
+
+    if infos:
+        triage_path = os.path.join(report_dir, "prefilter.json")
+        with open(triage_path, "w", encoding="utf-8") as f:
+            json.dump(infos, f, indent=2)
+
+    leakers = [s for s in summaries if (s.get("memory") or {}).get("delta_mb") is not None]
+    leakers.sort(key=lambda s: s["memory"]["delta_mb"], reverse=True)
+    for s in leakers[:5]:
+        if s["memory"]["delta_mb"] > 0:
+            print(f"[batch_runner] Memory retained: +{s['memory']['delta_mb']} MB  {s['src_file']}")
 
-    print(f"[batch_runner] Done. Files: {len(summaries)}")
+    scanned = [s for s in summaries if s.get("mode") == "scan" and s.get("summary")]
+    if scanned:
+        warnings = sum(s["summary"]["warnings"] for s in scanned)
+        cached = sum(1 for s in scanned if s.get("cached"))
+        print(f"[batch_runner] Scanned {len(scanned)} files ({cached} from cache), {warnings} warnings")
+
+    cloned = sum(1 for s in summaries if s.get("save_mode") not in (None, "saved") and not s.get("deduplicated_from"))
+    if cloned:
+        print(f"[batch_runner] Unchanged files cloned instead of saved: {cloned}")
+    deduped = sum(1 for s in summaries if s.get("deduplicated_from"))
+    if deduped:
+        print(f"[batch_runner] Identical inputs copied from their representative: {deduped}")
+
+    skipped = sum(1 for s in summaries if s.get("status") == "skipped")
+    print(f"[batch_runner] Done. Files: {len(summaries)} (skipped: {skipped})")
     print(f"[batch_runner] Summary: {summary_path}")
+    return summary_path
+
+
+def run_batch(input_dir, output_dir, options):
+    """
+    Runs batch in the current Max session (open -> clean -> save copy).
+    Writes reports to <output_dir>/reports.
+    With option scan_only files are only scanned and never saved (see scan_file).
+    Files are triaged offline first (see prefilter_max_files).
+    With option metrics_path an OpenMetrics file is updated after every file
+    (see core.metrics); with option trace_dir a timeline is traced (core.tracing).
+    For long sessions use batch.coordinator.run_batch_workers, which recycles
+    Max worker processes.
+    """
+    ensure_repo_on_path()
+    from core import tracing
+    from core.metrics import open_metrics, record_results
+
+    own_trace = not tracing.enabled() and tracing.start_from_options(options, "session") is not None
+    with tracing.span("plan_batch", "batch"):
+        jobs, summaries, infos, report_dir = plan_batch(input_dir, output_dir, options)
+    uploader = open_uploader(options)
+    metrics = open_metrics(options, "batch")
+    record_results(metrics, summaries)
+
+    by_src = {j["src"]: j for j in jobs}
+
+    def finish(results):
+        for r in results:
+            release_quarantine(r, by_src[r["src_file"]], options)
+            expanded = [attach_prefilter(x, infos) for x in expand_duplicates(r, by_src[r["src_file"]], options)]
+            summaries.extend(expanded)
+            record_results(metrics, expanded)
 
+    for job in jobs:
+        print(f"[batch_runner] Processing: {job['src']}")
+        result = run_on_file(job["src"], job["dst"], job["report_dir"], options, uploader=uploader)
+        finish([result] if uploader is None else uploader.completed())
+
+    if uploader is not None:
+        with tracing.span("upload_drain", "batch"):
+            finish(uploader.close())
+
+    summary_path = write_batch_summary(report_dir, summaries, infos)
+    if own_trace:
+        tracing.stop_trace()
     return summary_path
+
+
+ARGS_ENV = "MAX_SCENE_CLEANER_ARGS"
+
+
+def build_arg_parser():
+    p = argparse.ArgumentParser(
+        prog="batch_runner",
+        description="Headless Max Scene Cleaner batch (no Qt). Exit code = number of failed files (max 250).",
+    )
+    p.add_argument("input_dir", help="folder with .max files (searched recursively)")
+    p.add_argument("output_dir", help="cleaned copies + reports/")
+    p.add_argument("--preset", help="JSON file with batch options")
+    p.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                   help="option override, VALUE parsed as JSON when possible (repeatable)")
+    p.add_argument("--mode", choices=["clean", "scan"], default=None, help="scan = scan_only, never save")
+    p.add_argument("--engine", choices=["auto", "session", "workers", "queue"], default="auto",
+                   help="session = this Max process, workers = recycled Max worker processes, "
+                        "queue = parallel workers on a shared file queue (auto: session inside Max, "
+                        "queue with --parallel > 1, else workers)")
+    p.add_argument("--parallel", type=int, default=1, help="number of Max workers (queue engine)")
+    p.add_argument("--queue-dir", help="shared queue folder (queue engine, default <output>/_queue)")
+    p.add_argument("--resume", action="store_true",
+                   help="continue the unfinished queue in --queue-dir instead of starting a new batch")
+    p.add_argument("--max-exe", help="3dsmaxbatch.exe path for worker engines")
+    p.add_argument("--report-format", choices=["json", "html", "both"], default="json")
+    p.add_argument("--trace", metavar="DIR",
+                   help="write Chrome/Perfetto trace-event files to DIR, merged into DIR/trace.json")
+    p.add_argument("--diff-against", metavar="REPORT_DIR",
+                   help="earlier reports folder; writes reports/scan_diff.json/.html (scan mode)")
+    return p
+
+
+def parse_options(args):
+    options = {}
+    if args.preset:
+        with open(args.preset, "r", encoding="utf-8") as f:
+            options.update(json.load(f))
+
+    for item in args.overrides:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"--set expects KEY=VALUE, got: {item}")
+        try:
+            options[key.strip()] = json.loads(value)
+        except ValueError:
+            options[key.strip()] = value
+
+    if args.mode:
+        options["scan_only"] = args.mode == "scan"
+    if args.max_exe:
+        options["max_batch_exe"] = args.max_exe
+    if args.trace:
+        options["trace_dir"] = os.path.abspath(args.trace)
+    return options
+
+
+def main(argv=None):
+    """
+    Command-line entry point:
+        python -m batch.batch_runner <input> <output> [--preset p.json] [--set key=value] ...
+    Inside 3dsmaxbatch.exe, where script arguments aren't passed through, the
+    arguments can come from the MAX_SCENE_CLEANER_ARGS environment variable.
+    Returns the exit code: number of failed files (capped at 250), 255 if the
+    batch could not run.
+    """
+    ensure_repo_on_path()
+
+    if argv is None:
+        argv = sys.argv[1:] or shlex.split(os.environ.get(ARGS_ENV, ""), posix=(os.name != "nt"))
+    args = build_arg_parser().parse_args(argv)
+
+    try:
+        options = parse_options(args)
+
+        engine = args.engine
+        if engine == "auto":
+            if rt is not None:
+                engine = "session"
+            else:
+                engine = "queue" if args.parallel > 1 else "workers"
+
+        if engine == "session":
+            if rt is None:
+                raise RuntimeError("--engine session must run inside 3ds Max")
+            summary_path = run_batch(args.input_dir, args.output_dir, options)
+        elif engine == "queue":
+            from batch.coordinator import run_batch_queue
+            summary_path = run_batch_queue(args.input_dir, args.output_dir, options,
+                                           parallel=args.parallel, queue_dir=args.queue_dir,
+                                           resume=args.resume)
+        else:
+            from batch.coordinator import run_batch_workers
+            summary_path = run_batch_workers(args.input_dir, args.output_dir, options)
+
+        with open(summary_path, "r", encoding="utf-8") as f:
+            summaries = json.load(f)
+    except Exception:
+        traceback.print_exc()
+        return 255
+
+    if args.trace:
+        from core.tracing import merge_traces
+        print(f"[batch_runner] Trace: {merge_traces(options['trace_dir'])}")
+
+    if args.report_format in ("html", "both"):
+        from core.reporting import save_batch_html
+        html_path = save_batch_html(summaries, os.path.splitext(summary_path)[0] + ".html")
+        print(f"[batch_runner] HTML: {html_path}")
+        if args.report_format == "html":
+            os.remove(summary_path)
+
+    if args.diff_against:
+        from core.scan_diff import diff_report_dirs, save_diff
+        diff = diff_report_dirs(args.diff_against, os.path.dirname(summary_path))
+        diff_path = save_diff(diff, os.path.join(os.path.dirname(summary_path), "scan_diff.json"),
+                              html=args.report_format != "json")
+        c = diff["counts"]
+        print(f"[batch_runner] Diff: {c['resolved']} resolved, {c['added']} new, {c['persisting']} persisting -> {diff_path}")
+
+    failed = sum(1 for s in summaries if s.get("status") == "failed")
+    return min(failed, 250)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
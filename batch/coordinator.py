@@ -0,0 +1,278 @@
+import os
+import json
+import time
+import subprocess
+
+from batch.batch_runner import plan_batch, attach_prefilter, write_batch_summary, release_quarantine, expand_duplicates
+from batch.quarantine import Quarantine
+from batch.worker import JOB_ENV
+
+
+MAXBATCH_ENV = "MAX_SCENE_CLEANER_MAXBATCH"
+POLL_INTERVAL_S = 0.5
+MAX_START_FAILURES = 3
+METRICS_POLL_S = 5.0
+
+
+def default_worker_cmd(options, script="worker.py"):
+    """
+    3ds Max batch executable running batch/worker.py (or another script in batch/).
+    """
+    exe = options.get("max_batch_exe") or os.environ.get(MAXBATCH_ENV) or "3dsmaxbatch.exe"
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), script)
+    return [exe, script]
+
+
+def run_batch_workers(input_dir, output_dir, options, worker_cmd=None):
+    """
+    Runs batch through Max worker processes instead of the current session.
+    A worker is recycled (process restarted) after N files or when its RSS passes
+    a threshold, so fragmentation and plugin leaks don't slow down long batches.
+
+    A watchdog kills a worker whose current file runs past its time budget;
+    the file is failed, added to the quarantine list and the batch continues.
+    A worker that exits on its own fails the file its status reported as
+    started; one that dies between files leaves the next job for a new worker.
+
+    options keys (on top of the batch options):
+      - recycle_after_files (default 50, 0 = never)
+      - recycle_rss_mb (default 0 = off)
+      - max_batch_exe (default $MAX_SCENE_CLEANER_MAXBATCH or 3dsmaxbatch.exe)
+      - file_timeout_s (default 1800, 0 = off)
+      - phase_timeouts_s ({"load"|"clean"|"scan"|"save"|"reset"|"upload": seconds}, default none)
+      - worker_start_timeout_s (default 600): Max startup until the first file begins
+      - metrics_path (default none): OpenMetrics file updated per file (core.metrics)
+      - trace_dir (default none): per-worker trace files (core.tracing.merge_traces)
+
+    worker_cmd: command list to start a worker (defaults to default_worker_cmd).
+    """
+    from core import tracing
+    from core.metrics import open_metrics, record_results
+
+    tracing.start_from_options(options, "coordinator")
+    jobs, summaries, infos, report_dir = plan_batch(input_dir, output_dir, options)
+    cmd = list(worker_cmd or default_worker_cmd(options))
+    metrics = open_metrics(options, "batch")
+    record_results(metrics, summaries)
+
+    def add(result, job):
+        expanded = [attach_prefilter(r, infos) for r in expand_duplicates(result, job, options)]
+        summaries.extend(expanded)
+        record_results(metrics, expanded)
+
+    work_dir = os.path.join(report_dir, "_workers")
+    os.makedirs(work_dir, exist_ok=True)
+
+    quarantine = Quarantine(options.get("quarantine_path"))
+    by_src = {j["src"]: j for j in jobs}
+    remaining = list(jobs)
+    generation = 0
+    start_failures = 0
+    while remaining:
+        worker_id = f"w{generation}"
+        generation += 1
+
+        with tracing.span(worker_id, "worker", jobs=len(remaining)):
+            results, events, exit_code, timeout, status = _run_worker(cmd, work_dir, worker_id, remaining, options)
+        for result in results:
+            job = by_src.get(result.get("src_file"), {})
+            release_quarantine(result, job, options)
+            add(result, job)
+
+        done = set(r.get("src_file") for r in results)
+        remaining = [j for j in remaining if j["src"] not in done]
+        if results:
+            start_failures = 0
+
+        if timeout is not None:
+            src, reason = timeout
+            if src is None:
+                # Max never got to the first file; retry a few times before giving up
+                start_failures += 1
+                print(f"[coordinator] Worker {worker_id} killed: {reason}")
+            else:
+                job = by_src[src]
+                remaining = [j for j in remaining if j["src"] != src]
+                quarantine.add(src, reason)
+                tracing.instant("killed", "worker", src=src, reason=reason)
+                print(f"[coordinator] Worker {worker_id} killed, quarantined: {src} ({reason})")
+                add(_failed_result(job, f"Timed out: {reason}"), job)
+        elif remaining and "recycle" in events:
+            print(f"[coordinator] Recycling worker {worker_id}: {events['recycle'].get('reason')}")
+        elif remaining and (status or {}).get("src") == remaining[0]["src"]:
+            # Worker died mid-file: the first unfinished job it reported starting is the culprit
+            crashed = remaining.pop(0)
+            print(f"[coordinator] Worker {worker_id} exited ({exit_code}) on: {crashed['src']}")
+            add(_failed_result(crashed, f"Worker exited with code {exit_code}"), crashed)
+        elif remaining:
+            # Died between files (or while draining uploads): nothing to blame,
+            # the next worker retries; repeated deaths count as start failures
+            if not results:
+                start_failures += 1
+            print(f"[coordinator] Worker {worker_id} exited ({exit_code}) before starting: {remaining[0]['src']}")
+
+        if remaining and start_failures >= MAX_START_FAILURES:
+            print(f"[coordinator] Workers failed to start {start_failures} times, giving up")
+            for job in remaining:
+                add(_failed_result(job, "Worker failed to start"), job)
+            remaining = []
+
+    summary_path = write_batch_summary(report_dir, summaries, infos)
+    tracing.stop_trace()
+    return summary_path
+
+
+def run_batch_queue(input_dir, output_dir, options, parallel=2, queue_dir=None, worker_cmd=None, resume=False):
+    """
+    Runs batch on this machine with `parallel` Max workers sharing a file queue
+    (batch.file_queue). Other machines can join by running queue workers on the
+    same queue_dir (default <output_dir>/_queue). A previous queue there is
+    replaced, or continued with resume=True.
+    """
+    from batch.file_queue import QUEUE_ENV, create_queue, merge_queue, read_new_done
+    from core.metrics import open_metrics, record_results
+
+    queue_dir = queue_dir or os.path.join(os.path.abspath(output_dir), "_queue")
+    create_queue(queue_dir, input_dir, output_dir, options, resume=resume)
+
+    cmd = list(worker_cmd or default_worker_cmd(options, "file_queue.py"))
+    env = dict(os.environ)
+    env[QUEUE_ENV] = queue_dir
+
+    procs = [subprocess.Popen(cmd, env=env) for _ in range(max(1, int(parallel)))]
+    print(f"[coordinator] Started {len(procs)} queue workers on {queue_dir}")
+
+    metrics = open_metrics(options, "batch")
+    if metrics is None:
+        for proc in procs:
+            proc.wait()
+    else:
+        # Book done/ records (from workers here or on other machines) as they appear
+        seen = set()
+        while any(proc.poll() is None for proc in procs):
+            record_results(metrics, read_new_done(queue_dir, seen))
+            time.sleep(METRICS_POLL_S)
+        record_results(metrics, read_new_done(queue_dir, seen))
+
+    return merge_queue(queue_dir)
+
+
+def _run_worker(cmd, work_dir, worker_id, jobs, options):
+    job_path = os.path.join(work_dir, f"{worker_id}_job.json")
+    results_path = os.path.join(work_dir, f"{worker_id}_results.jsonl")
+    status_path = os.path.join(work_dir, f"{worker_id}_status.json")
+    for path in (results_path, status_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    job = {
+        "worker_id": worker_id,
+        "options": options,
+        "jobs": jobs,
+        "results_path": results_path,
+        "status_path": status_path,
+        "max_files": int(options.get("recycle_after_files", 50) or 0),
+        "max_rss_mb": float(options.get("recycle_rss_mb", 0) or 0),
+    }
+    with open(job_path, "w", encoding="utf-8") as f:
+        json.dump(job, f, indent=2)
+
+    env = dict(os.environ)
+    env[JOB_ENV] = job_path
+
+    print(f"[coordinator] Starting worker {worker_id} ({len(jobs)} jobs)")
+    started = time.time()
+    proc = subprocess.Popen(cmd, env=env)
+    budgets = {j["src"]: float(j.get("budget_scale", 1.0)) for j in jobs}
+
+    timeout = None
+    while True:
+        try:
+            exit_code = proc.wait(timeout=POLL_INTERVAL_S)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+
+        timeout = watchdog_check(read_status(status_path), started, time.time(), budgets, options)
+        if timeout is not None:
+            proc.kill()
+            exit_code = proc.wait()
+            break
+
+    results, events = read_worker_events(results_path)
+    if timeout is not None and timeout[0] in set(r.get("src_file") for r in results):
+        timeout = None  # file finished right before the kill (e.g. during reset)
+    return results, events, exit_code, timeout, read_status(status_path)
+
+
+def read_status(status_path):
+    try:
+        with open(status_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def watchdog_check(status, started, now, budgets, options):
+    """
+    Returns (src, reason) when the worker is over budget, else None.
+    src is None when the worker has not started its first file in time.
+    Budgets are multiplied by the job's budget_scale (quarantined files get more).
+    """
+    if not status or status.get("src") not in budgets:
+        limit = float(options.get("worker_start_timeout_s", 600) or 0)
+        if limit and now - started > limit:
+            return None, f"no file started within {limit:g}s"
+        return None
+
+    src = status["src"]
+    scale = budgets.get(src, 1.0)
+
+    limit = float(options.get("file_timeout_s", 1800) or 0) * scale
+    elapsed = now - float(status.get("file_started", now))
+    if limit and elapsed > limit:
+        return src, f"file exceeded {limit:g}s (phase {status.get('phase')})"
+
+    phase = status.get("phase")
+    limit = float((options.get("phase_timeouts_s") or {}).get(phase, 0) or 0) * scale
+    elapsed = now - float(status.get("phase_started", now))
+    if limit and elapsed > limit:
+        return src, f"{phase} exceeded {limit:g}s"
+    return None
+
+
+def read_worker_events(results_path):
+    """
+    Returns (results, events): run_on_file results in order, and the last
+    non-result event by name ("recycle", "done").
+    """
+    results = []
+    events = {}
+    try:
+        with open(results_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a killed worker
+                event = record.pop("event", None)
+                if event == "result":
+                    results.append(record)
+                elif event:
+                    events[event] = record
+    except OSError:
+        pass
+    return results, events
+
+
+def _failed_result(job, message):
+    return {
+        "src_file": job["src"],
+        "dst_file": job["dst"],
+        "status": "failed",
+        "errors": [message],
+        "actions": [],
+    }
@@ -0,0 +1,69 @@
+import os
+import sys
+import shutil
+
+
+def clone_file(src, dst, allow_hardlink=False):
+    """
+    Put a byte-identical copy of src at dst as cheaply as the filesystem allows:
+      1) copy-on-write clone (Linux FICLONE / macOS clonefile)
+      2) hardlink (only if allow_hardlink: dst then shares the source file)
+      3) plain copy (shutil.copy2; server-side on SMB where the OS supports it)
+    Returns the method used: "reflink", "hardlink" or "copy".
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+    tmp = dst + ".clone.tmp"
+    _remove(tmp)
+
+    try:
+        if _reflink(src, tmp):
+            shutil.copystat(src, tmp)
+            os.replace(tmp, dst)
+            return "reflink"
+    except OSError:
+        _remove(tmp)
+
+    if allow_hardlink:
+        try:
+            os.link(src, tmp)
+            os.replace(tmp, dst)
+            return "hardlink"
+        except OSError:
+            _remove(tmp)
+
+    try:
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        _remove(tmp)
+    return "copy"
+
+
+def _reflink(src, dst):
+    if sys.platform.startswith("linux"):
+        import fcntl
+        FICLONE = 0x40049409
+        with open(src, "rb") as fs, open(dst, "wb") as fd:
+            try:
+                fcntl.ioctl(fd.fileno(), FICLONE, fs.fileno())
+            except OSError:
+                fd.close()
+                _remove(dst)
+                return False
+        return True
+
+    if sys.platform == "darwin":
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, "clonefile"):
+            return False
+        return libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+
+    return False
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
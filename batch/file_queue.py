@@ -0,0 +1,447 @@
+"""
+Shared-directory work queue so several farm machines can run one batch.
+
+Everything lives in plain files on a shared filesystem (no extra services):
+
+  <queue>/queue.json             input/output/report dirs + batch options
+  <queue>/prefilter.json         offline triage infos
+  <queue>/pending/<id>.json      job waiting to be claimed (<id> = <run>-<n>)
+  <queue>/claimed/<id>@<owner>.json
+                                 job being processed; mtime is the heartbeat
+  <queue>/done/<id>.json         run_on_file result (or skipped / failed record)
+
+Every queue has a run token (queue.json "run") that prefixes its job ids and
+done/ file names and is copied into the records; records of another run (a
+worker of an earlier batch still finishing into the same folder) never
+overwrite the current ones and are ignored. A worker stops once queue.json
+holds another run. create_queue() empties an existing queue unless
+resume=True, which keeps it and continues its jobs.
+
+A worker claims a job by renaming it from pending/ to claimed/ (atomic, only
+one rename wins). Claims whose heartbeat is older than stale_after_s are
+renamed back to pending/ by any worker. merge_queue() combines the done
+records into reports/batch_summary.json.
+
+Paths in jobs are absolute, so every machine must see the shares under the
+same path (or drive letter).
+
+    create_queue(queue_dir, input_dir, output_dir, options)   # once
+    run_queue_worker(queue_dir)                                # per machine, inside Max
+    merge_queue(queue_dir)                                     # once, at the end
+"""
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import uuid
+
+QUEUE_ENV = "MAX_SCENE_CLEANER_QUEUE"
+
+
+def _ensure_repo_on_path():
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if repo_root not in sys.path:
+        sys.path.insert(0, repo_root)
+
+
+def _write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _dirs(queue_dir):
+    return tuple(os.path.join(queue_dir, d) for d in ("pending", "claimed", "done"))
+
+
+def _job_id(name):
+    return name.split("@", 1)[0].split(".", 1)[0]
+
+
+def _run_token(queue_dir):
+    try:
+        return _read_json(os.path.join(queue_dir, "queue.json")).get("run")
+    except (OSError, ValueError):
+        return None
+
+
+def _clear_queue(queue_dir):
+    # Only the queue's own files; anything else in the folder is left alone
+    for d in _dirs(queue_dir):
+        try:
+            names = os.listdir(d)
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith(".json") or ".json." in name:
+                _remove(os.path.join(d, name))
+    for name in ("queue.json", "prefilter.json"):
+        _remove(os.path.join(queue_dir, name))
+
+
+def create_queue(queue_dir, input_dir, output_dir, options, resume=False):
+    """
+    Plan the batch (discovery, prefilter, quarantine) and materialize it as a queue.
+    Skipped files go straight to done/. Returns the number of pending jobs.
+
+    An existing queue in queue_dir is emptied first (its done/ records would
+    otherwise shadow the new jobs); with resume=True it is kept as is and its
+    remaining jobs are run instead of planning a new batch.
+    """
+    _ensure_repo_on_path()
+    from batch.batch_runner import plan_batch
+
+    if os.path.exists(os.path.join(queue_dir, "queue.json")):
+        if resume:
+            status = queue_status(queue_dir)
+            print(f"[file_queue] Resuming {queue_dir}: {status['pending']} pending, "
+                  f"{status['claimed']} claimed, {status['done']} done")
+            return status["pending"]
+        print(f"[file_queue] Clearing previous queue in {queue_dir}")
+        _clear_queue(queue_dir)
+
+    jobs, skipped_results, infos, report_dir = plan_batch(input_dir, output_dir, options)
+    # Part of every file name: no "." or "@" (see _job_id)
+    run = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    pending, claimed, done = _dirs(queue_dir)
+    for d in (pending, claimed, done):
+        os.makedirs(d, exist_ok=True)
+
+    _write_json(os.path.join(queue_dir, "prefilter.json"), infos)
+    _write_json(os.path.join(queue_dir, "queue.json"), {
+        "input_dir": os.path.abspath(input_dir),
+        "output_dir": os.path.abspath(output_dir),
+        "report_dir": report_dir,
+        "options": options,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "run": run,
+    })
+
+    # Ids keep the planned order (cheapest first); skipped records sort after jobs
+    for i, job in enumerate(jobs):
+        job = dict(job, id=f"{run}-{i:06d}", attempts=0, run=run)
+        _write_json(os.path.join(pending, f"{job['id']}.json"), job)
+    for i, result in enumerate(skipped_results):
+        _write_json(os.path.join(done, f"{run}-s{i:06d}.json"), dict(result, queue_run=run))
+
+    print(f"[file_queue] Queued {len(jobs)} jobs ({len(skipped_results)} skipped) in {queue_dir}")
+    return len(jobs)
+
+
+def claim_job(queue_dir, owner):
+    """
+    Claim the first pending job. Returns (job, claim_path) or None if nothing is pending.
+    """
+    pending, claimed, done = _dirs(queue_dir)
+    try:
+        names = sorted(n for n in os.listdir(pending) if n.endswith(".json"))
+    except OSError:
+        return None
+
+    for name in names:
+        claim_path = os.path.join(claimed, f"{_job_id(name)}@{owner}.json")
+        try:
+            os.rename(os.path.join(pending, name), claim_path)
+        except OSError:
+            continue  # another worker won the race
+        try:
+            os.utime(claim_path, None)
+            job = _read_json(claim_path)
+        except (OSError, ValueError):
+            continue
+        if _done_by_run(os.path.join(done, f"{job['id']}.json"), job.get("run")):
+            _remove(claim_path)  # finished by a worker that was presumed dead
+            continue
+        return job, claim_path
+    return None
+
+
+def complete_job(queue_dir, job, claim_path, result, options=None):
+    """
+    Record the result (plus one record per deduplicated identical input) and release the claim.
+    """
+    from batch.batch_runner import expand_duplicates
+
+    _, _, done = _dirs(queue_dir)
+    first, *copies = expand_duplicates(result, job, options or {})
+    for i, r in enumerate(copies):
+        _write_json(os.path.join(done, f"{job['id']}_d{i}.json"), dict(r, queue_run=job.get("run")))
+    _write_json(os.path.join(done, f"{job['id']}.json"), dict(first, queue_run=job.get("run")))
+    _remove(claim_path)
+
+
+def requeue_stale(queue_dir, stale_after_s, max_attempts=2, now=None):
+    """
+    Move claims without a heartbeat for stale_after_s back to pending/.
+    A job that was already claimed max_attempts times is failed instead
+    (it probably kills Max). Returns the number of claims handled.
+    """
+    pending, claimed, done = _dirs(queue_dir)
+    now = now if now is not None else time.time()
+    handled = 0
+
+    try:
+        names = [n for n in os.listdir(claimed) if n.endswith(".json")]
+    except OSError:
+        return 0
+
+    for name in names:
+        path = os.path.join(claimed, name)
+        try:
+            if now - os.path.getmtime(path) < stale_after_s:
+                continue
+            # Rename first so only one worker requeues a given claim
+            taken = f"{path}.requeue-{os.getpid()}-{socket.gethostname()}"
+            os.rename(path, taken)
+        except OSError:
+            continue
+
+        try:
+            job = _read_json(taken)
+        except (OSError, ValueError):
+            _remove(taken)
+            continue
+
+        owner = name[:-5].split("@", 1)[-1]
+        job["attempts"] = int(job.get("attempts", 0)) + 1
+        if job["attempts"] >= max_attempts:
+            print(f"[file_queue] Giving up on {job['src']} after {job['attempts']} stale claims")
+            complete_job(queue_dir, job, taken, {
+                "src_file": job["src"],
+                "dst_file": job["dst"],
+                "status": "failed",
+                "errors": [f"Worker stopped responding ({job['attempts']} attempts, last: {owner})"],
+                "actions": [],
+            })
+        else:
+            print(f"[file_queue] Requeueing {job['src']} (stale claim by {owner})")
+            _write_json(os.path.join(pending, f"{job['id']}.json"), job)
+        _remove(taken)
+        handled += 1
+    return handled
+
+
+class _Heartbeat:
+    """
+    Touches the claim file every `interval` seconds from a background thread
+    (until stop(), which may be after a background upload finished).
+    beat() can also be called from progress callbacks, in case Max keeps the
+    interpreter busy for a long stretch.
+    """
+
+    def __init__(self, claim_path, interval):
+        self.claim_path = claim_path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.beat()
+
+    def beat(self):
+        try:
+            os.utime(self.claim_path, None)
+        except OSError:
+            pass
+
+
+def run_queue_worker(queue_dir, owner=None, process=None):
+    """
+    Claim and process jobs until the queue is drained. Waits while other
+    workers still hold claims so their jobs can be taken over if they die.
+    Stops when the queue is re-created (queue.json holds another run); the
+    job in progress then gets no done record.
+
+    options keys (from queue.json):
+      - queue_heartbeat_s (default 30)
+      - queue_stale_after_s (default 300)
+      - queue_max_attempts (default 2)
+      - queue_poll_s (default 10)
+
+    process: `process(src, dst, report_dir, options, progress, uploader=None)`,
+    defaults to run_on_file. With option staging_dir a job stays claimed (and
+    heartbeating) until its outputs are uploaded.
+    Returns the number of jobs this worker processed.
+    """
+    _ensure_repo_on_path()
+    from batch.batch_runner import open_uploader
+    from core import tracing
+
+    if process is None:
+        from batch.batch_runner import run_on_file as process
+
+    meta = _read_json(os.path.join(queue_dir, "queue.json"))
+    run = meta.get("run")
+    options = meta.get("options") or {}
+    heartbeat_s = float(options.get("queue_heartbeat_s", 30))
+    stale_after_s = float(options.get("queue_stale_after_s", 300))
+    max_attempts = int(options.get("queue_max_attempts", 2))
+    poll_s = float(options.get("queue_poll_s", 10))
+
+    owner = owner or f"{socket.gethostname()}-{os.getpid()}"
+    _, claimed, _ = _dirs(queue_dir)
+    uploader = open_uploader(options)
+    tracing.start_from_options(options, owner)
+    inflight = {}  # id(result) -> (job, claim_path, heartbeat)
+    processed = 0
+
+    def finish(results):
+        for result in results:
+            job, claim_path, hb = inflight.pop(id(result))
+            hb.stop()
+            if _run_token(queue_dir) != job.get("run"):
+                print(f"[file_queue] {owner}: queue was re-created, dropping result of {job['src']}")
+                continue
+            result["worker"] = owner
+            complete_job(queue_dir, job, claim_path, result, options)
+
+    while True:
+        if _run_token(queue_dir) != run:
+            print(f"[file_queue] {owner}: queue was re-created, stopping")
+            break
+        requeue_stale(queue_dir, stale_after_s, max_attempts)
+        claim = claim_job(queue_dir, owner)
+        if claim is None:
+            if uploader is not None and inflight:
+                finish(uploader.drain())
+                continue
+            try:
+                busy = any(n.endswith(".json") for n in os.listdir(claimed))
+            except OSError:
+                busy = False
+            if not busy:
+                break
+            time.sleep(poll_s)
+            continue
+
+        job, claim_path = claim
+        print(f"[file_queue] {owner} processing: {job['src']}")
+        hb = _Heartbeat(claim_path, heartbeat_s).start()
+        result = process(job["src"], job["dst"], job["report_dir"], options, lambda phase: hb.beat(), uploader=uploader)
+        inflight[id(result)] = (job, claim_path, hb)
+        finish([result] if uploader is None else uploader.completed())
+        processed += 1
+
+    if uploader is not None:
+        finish(uploader.close())
+
+    tracing.stop_trace()
+    print(f"[file_queue] {owner} finished ({processed} jobs)")
+    return processed
+
+
+def queue_status(queue_dir):
+    pending, claimed, done = _dirs(queue_dir)
+
+    def _count(d):
+        try:
+            return sum(1 for n in os.listdir(d) if n.endswith(".json"))
+        except OSError:
+            return 0
+
+    return {"pending": _count(pending), "claimed": _count(claimed), "done": _count(done)}
+
+
+def read_new_done(queue_dir, seen, run=None):
+    """
+    done/ records of this run (queue.json, or `run`) not in `seen` (a set of
+    file names, updated in place).
+    """
+    run = run or _run_token(queue_dir)
+    _, _, done = _dirs(queue_dir)
+    out = []
+    try:
+        names = sorted(n for n in os.listdir(done) if n.endswith(".json") and n not in seen)
+    except OSError:
+        return out
+    for name in names:
+        try:
+            record = _read_json(os.path.join(done, name))
+        except (OSError, ValueError):
+            continue  # retried on the next poll
+        seen.add(name)
+        if record.get("queue_run") == run:
+            out.append(record)
+    return out
+
+
+def merge_queue(queue_dir):
+    """
+    Combine done/ records into <report_dir>/batch_summary.json (job order first,
+    then skipped files). Unfinished jobs are listed as "pending".
+    """
+    _ensure_repo_on_path()
+    from batch.batch_runner import attach_prefilter, write_batch_summary
+
+    meta = _read_json(os.path.join(queue_dir, "queue.json"))
+    try:
+        infos = _read_json(os.path.join(queue_dir, "prefilter.json"))
+    except (OSError, ValueError):
+        infos = {}
+
+    pending, claimed, done = _dirs(queue_dir)
+    summaries = []
+    for name in sorted(os.listdir(done)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            record = _read_json(os.path.join(done, name))
+        except (OSError, ValueError):
+            continue
+        if record.get("queue_run") == meta.get("run"):
+            summaries.append(attach_prefilter(record, infos))
+
+    for d in (claimed, pending):
+        for name in sorted(os.listdir(d)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                job = _read_json(os.path.join(d, name))
+            except (OSError, ValueError):
+                continue
+            for item in [job] + (job.get("duplicates") or []):
+                summaries.append({
+                    "src_file": item["src"],
+                    "dst_file": item["dst"],
+                    "status": "pending",
+                    "errors": [],
+                    "actions": [],
+                })
+
+    return write_batch_summary(meta["report_dir"], summaries, infos)
+
+
+def _done_by_run(path, run):
+    try:
+        return _read_json(path).get("queue_run") == run
+    except (OSError, ValueError):
+        return False
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    run_queue_worker(os.environ[QUEUE_ENV])
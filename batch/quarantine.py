@@ -0,0 +1,75 @@
+import os
+import json
+import time
+
+from core.config import cache_dir
+
+
+class Quarantine:
+    """
+    Persistent list of input files that blew their batch time budget.
+    Stored as JSON: {key: {"src", "reason", "count", "last", "size", "mtime"}}.
+    An entry is released automatically when the file changes (size/mtime).
+
+    add() and release() re-read the file before writing it, so several
+    instances (coordinator, batch_runner.release_quarantine) don't undo each
+    other's changes.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cache_dir(), "quarantine.json")
+        self._data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
+        except Exception:
+            pass
+        return {}
+
+    @staticmethod
+    def key(src):
+        return os.path.normcase(os.path.abspath(src))
+
+    def get(self, src):
+        entry = self._data.get(self.key(src))
+        if entry is None:
+            return None
+        try:
+            st = os.stat(src)
+        except OSError:
+            return entry
+        if entry.get("size") != st.st_size or entry.get("mtime") != st.st_mtime_ns:
+            return None  # file was re-saved since it was quarantined
+        return entry
+
+    def add(self, src, reason):
+        self._data = self._load()
+        key = self.key(src)
+        entry = self._data.get(key) or {"src": src, "count": 0}
+        try:
+            st = os.stat(src)
+            entry["size"], entry["mtime"] = st.st_size, st.st_mtime_ns
+        except OSError:
+            pass
+        entry["reason"] = reason
+        entry["count"] = int(entry.get("count", 0)) + 1
+        entry["last"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._data[key] = entry
+        self.save()
+        return entry
+
+    def release(self, src):
+        self._data = self._load()
+        if self._data.pop(self.key(src), None) is not None:
+            self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=2)
+        os.replace(tmp, self.path)
@@ -0,0 +1,59 @@
+"""
+Stand-in batch worker for exercising the coordinator without 3ds Max.
+
+Speaks the same protocol as batch/worker.py but only sleeps through the
+load / clean / save phases. Per-file sleep comes from options["stub_sleep_s"]
+({basename: seconds} or a number, default 0.1 per phase).
+
+options["stub_crash"] ({basename: phase}) makes the process exit in that phase
+("load" / "clean" / "save"), or with "start" right before the file is reported
+as started; a "start" crash happens once per file (marker in its report dir).
+
+    run_batch_workers(src, dst, options, worker_cmd=[sys.executable, "batch/sleep_worker.py"])
+
+With MAX_SCENE_CLEANER_QUEUE set it drains a shared queue instead (see batch.file_queue).
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch.worker import JOB_ENV, run_worker
+from batch.file_queue import QUEUE_ENV, run_queue_worker
+
+
+def sleep_on_file(src, dst, report_dir, options, progress, uploader=None):
+    delay = options.get("stub_sleep_s", 0.1)
+    if isinstance(delay, dict):
+        delay = delay.get(os.path.basename(src), 0.1)
+
+    crash = (options.get("stub_crash") or {}).get(os.path.basename(src))
+    if crash == "start":
+        marker = os.path.join(report_dir, os.path.basename(src) + ".crashed")
+        if not os.path.exists(marker):
+            os.makedirs(report_dir, exist_ok=True)
+            open(marker, "w").close()
+            os._exit(3)
+
+    for phase in ("load", "clean", "save"):
+        progress(phase)
+        if phase == crash:
+            os._exit(3)
+        time.sleep(float(delay))
+
+    result = {"src_file": src, "dst_file": dst, "status": "ok", "errors": [], "actions": []}
+    if uploader is not None and dst:
+        # Stage a copy of the source as the "saved" scene
+        staged = uploader.stage_path(dst)
+        with open(src, "rb") as fs, open(staged, "wb") as fd:
+            fd.write(fs.read())
+        uploader.submit(result, [(staged, dst, True)])
+    return result
+
+
+if __name__ == "__main__":
+    if os.environ.get(QUEUE_ENV):
+        run_queue_worker(os.environ[QUEUE_ENV], process=sleep_on_file)
+    else:
+        run_worker(os.environ[JOB_ENV], process=sleep_on_file)
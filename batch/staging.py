@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import hashlib
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.file_hashing import CHUNK_SIZE, hash_file
+
+
+class StagingUploader:
+    """
+    Batch outputs are written to a fast local staging folder and moved to the
+    (slow, network) destination by background threads, so Max can load the
+    next file while the previous one uploads.
+
+    Each upload is copied to <dst>.part, read back and checksum-verified,
+    then renamed over dst (atomic on the destination share).
+
+    Backpressure: stage_path() and submit() block while more than max_bytes
+    are waiting to be uploaded, so staging never holds much more than
+    max_bytes + one file.
+
+    Results handed to submit() come back from completed() / drain() in
+    submission order once their uploads finished, with result["upload"] filled
+    in (and status "failed" if an upload failed). A result's report JSON is
+    only written then, so it records the upload outcome. Staged files whose
+    upload failed are kept (the record's "staged" path) so the output can be
+    recovered; they count against max_bytes, and once they alone fill it
+    stage_path() raises instead of staging more. Files left in staging_dir
+    by an earlier run count too.
+    """
+
+    def __init__(self, staging_dir, workers=2, max_bytes=20 * 1024 ** 3, retries=2):
+        self.staging_dir = os.path.abspath(staging_dir)
+        self.max_bytes = int(max_bytes)
+        self.retries = int(retries)
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(workers)))
+        self._cond = threading.Condition()
+        self._pending_bytes = 0
+        leftovers = [os.path.join(self.staging_dir, n) for n in os.listdir(self.staging_dir)]
+        self._kept_bytes = sum(_size(p) for p in leftovers if os.path.isfile(p))
+        self._queue = []  # [(result, futures, report_path)] in submission order
+        self._counter = itertools.count()
+
+    def stage_path(self, final_path):
+        """
+        Free local path to save final_path's file to. Raises OSError when
+        failed uploads kept in staging already take max_bytes.
+        """
+        with self._cond:
+            while self._pending_bytes and self._kept_bytes + self._pending_bytes >= self.max_bytes:
+                self._cond.wait()
+            if self._kept_bytes >= self.max_bytes:
+                raise OSError(f"Staging full: {self._kept_bytes / 1024 ** 2:.0f} MB of failed uploads "
+                              f"kept in {self.staging_dir}")
+        while True:
+            path = os.path.join(self.staging_dir, f"{next(self._counter):06d}_{os.path.basename(final_path)}")
+            if not os.path.exists(path):
+                return path
+
+    def submit(self, result, items, report_path=None):
+        """
+        items: [(local_path, final_path, delete_local)]; delete_local is False
+        when uploading a file that isn't ours (e.g. an unchanged source scene).
+        report_path: where to write the result as JSON once the uploads are done.
+        """
+        sizes = [_size(local) for local, _, _ in items]
+        total = sum(sizes)
+        with self._cond:
+            while self._pending_bytes and self._kept_bytes + self._pending_bytes + total > self.max_bytes:
+                self._cond.wait()
+            self._pending_bytes += total
+
+        futures = [
+            self._pool.submit(self._upload, local, final, delete, size)
+            for (local, final, delete), size in zip(items, sizes)
+        ]
+        self._queue.append((result, futures, report_path))
+
+    def completed(self):
+        """
+        Results whose uploads are all done, in order (non-blocking).
+        """
+        out = []
+        while self._queue and all(f.done() for f in self._queue[0][1]):
+            out.append(self._finish(*self._queue.pop(0)))
+        return out
+
+    def drain(self):
+        out = []
+        while self._queue:
+            out.append(self._finish(*self._queue.pop(0)))
+        return out
+
+    def close(self):
+        out = self.drain()
+        self._pool.shutdown(wait=True)
+        return out
+
+    def _finish(self, result, futures, report_path):
+        uploads = [f.result() for f in futures]
+        result["upload"] = uploads
+        for u in uploads:
+            if not u["ok"]:
+                result["status"] = "failed"
+                kept = f" (kept in staging: {u['staged']})" if u.get("staged") else ""
+                result["errors"].append(f"Upload failed: {u['dst']}: {u['error']}{kept}")
+        if report_path:
+            try:
+                _write_report(report_path, result)
+            except OSError as e:
+                result["errors"].append(f"Report not written: {report_path}: {e}")
+        return result
+
+    def _upload(self, local, final, delete_local, size):
+        record = {"dst": final, "bytes": size, "ok": False, "error": None, "seconds": 0.0}
+        start = time.time()
+        kept = 0
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    _upload_verified(local, final)
+                    record["ok"] = True
+                    record["error"] = None
+                    break
+                except Exception as e:
+                    record["error"] = str(e)
+                    record["attempts"] = attempt + 1
+            if delete_local and record["ok"]:
+                try:
+                    os.remove(local)
+                except OSError:
+                    pass
+            elif delete_local:
+                # The staged file is the only copy of the output
+                record["staged"] = local
+                kept = size
+        finally:
+            record["seconds"] = round(time.time() - start, 2)
+            with self._cond:
+                self._pending_bytes -= size
+                self._kept_bytes += kept
+                self._cond.notify_all()
+        return record
+
+
+def _write_report(path, result):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _upload_verified(local, final):
+    os.makedirs(os.path.dirname(os.path.abspath(final)), exist_ok=True)
+    part = final + ".part"
+    try:
+        digest = _copy_hashed(local, part)
+        if hash_file(part) != digest:
+            raise IOError("checksum mismatch after copy")
+        os.replace(part, final)
+    finally:
+        if os.path.exists(part):
+            os.remove(part)
+
+
+def _copy_hashed(src, dst):
+    # Hash while copying so the local file is read once
+    h = hashlib.blake2b(digest_size=20)
+    with open(src, "rb") as fs, open(dst, "wb") as fd:
+        while True:
+            chunk = fs.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+            fd.write(chunk)
+        fd.flush()
+        os.fsync(fd.fileno())
+    return h.hexdigest()
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
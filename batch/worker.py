@@ -0,0 +1,127 @@
+"""
+Max-side batch worker.
+
+Started by batch.coordinator inside a 3ds Max process (e.g. 3dsmaxbatch.exe worker.py).
+Reads its job file from the MAX_SCENE_CLEANER_JOB environment variable, processes
+jobs in order and appends one JSON line per event to the results file:
+
+  {"event": "result", ...run_on_file result...}
+  {"event": "recycle", "reason": "..."}   worker stops early, coordinator restarts it
+  {"event": "done"}                       all jobs processed
+
+Progress for the coordinator's watchdog goes to the status file (rewritten atomically):
+  {"worker", "pid", "src", "phase", "file_started", "phase_started"}
+
+Job file:
+  {"worker_id", "options", "jobs": [{"src","dst","report_dir"}], "results_path",
+   "status_path", "max_files", "max_rss_mb"}
+"""
+import os
+import sys
+import json
+import time
+
+JOB_ENV = "MAX_SCENE_CLEANER_JOB"
+
+
+def _ensure_repo_on_path():
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if repo_root not in sys.path:
+        sys.path.insert(0, repo_root)
+
+
+def append_event(results_path, event, **fields):
+    record = dict(fields)
+    record["event"] = event
+    with open(results_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+
+
+def write_status(status_path, **fields):
+    tmp = status_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(fields, f)
+    os.replace(tmp, status_path)
+
+
+def recycle_reason(files_done, rss_mb, max_files, max_rss_mb):
+    if max_files and files_done >= max_files:
+        return f"processed {files_done} files (limit {max_files})"
+    if max_rss_mb and rss_mb is not None and rss_mb >= max_rss_mb:
+        return f"RSS {rss_mb:.0f} MB >= {max_rss_mb:.0f} MB"
+    return None
+
+
+def run_worker(job_path, process=None):
+    """
+    Process a job file. `process(src, dst, report_dir, options, progress, uploader=None)`
+    defaults to batch_runner.run_on_file; stand-in workers pass their own.
+    With option staging_dir, results are emitted once their uploads finished
+    and the worker drains uploads before recycling or exiting.
+    """
+    _ensure_repo_on_path()
+    from batch.memory import current_rss_mb
+    from batch.batch_runner import open_uploader
+    from core import tracing
+
+    if process is None:
+        from batch.batch_runner import run_on_file as process
+
+    with open(job_path, "r", encoding="utf-8") as f:
+        job = json.load(f)
+
+    options = job.get("options") or {}
+    results_path = job["results_path"]
+    status_path = job.get("status_path")
+    worker_id = job.get("worker_id")
+    max_files = int(job.get("max_files") or 0)
+    max_rss_mb = float(job.get("max_rss_mb") or 0)
+
+    uploader = open_uploader(options)
+    # One trace file per worker process; the coordinator merges them
+    tracing.start_from_options(options, worker_id or "worker")
+
+    def emit(results):
+        for result in results:
+            result["worker"] = worker_id
+            append_event(results_path, "result", **result)
+
+    def drain(src):
+        if uploader is None:
+            return
+        if status_path:
+            now = time.time()
+            write_status(status_path, worker=worker_id, pid=os.getpid(), src=src, phase="upload",
+                         file_started=now, phase_started=now)
+        with tracing.span("upload_drain", "batch"):
+            emit(uploader.close())
+
+    jobs = job.get("jobs") or []
+    for i, j in enumerate(jobs):
+        file_started = time.time()
+
+        def progress(phase, src=j["src"], file_started=file_started):
+            if status_path:
+                write_status(status_path, worker=worker_id, pid=os.getpid(), src=src, phase=phase,
+                             file_started=file_started, phase_started=time.time())
+
+        result = process(j["src"], j["dst"], j["report_dir"], options, progress, uploader=uploader)
+        emit([result] if uploader is None else uploader.completed())
+
+        if i + 1 < len(jobs):
+            reason = recycle_reason(i + 1, current_rss_mb(), max_files, max_rss_mb)
+            if reason:
+                drain(j["src"])
+                tracing.instant("recycle", "batch", reason=reason)
+                tracing.stop_trace()
+                append_event(results_path, "recycle", reason=reason, worker=worker_id)
+                return
+
+    drain(jobs[-1]["src"] if jobs else None)
+    tracing.stop_trace()
+    append_event(results_path, "done", worker=worker_id)
+
+
+if __name__ == "__main__":
+    run_worker(os.environ[JOB_ENV])
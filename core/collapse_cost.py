@@ -0,0 +1,204 @@
+"""
+Collapse-cost prediction for clean_transforms.
+
+Before anything is collapsed, each node's modifier stack is read (class,
+enabled, iterations, vertex percent) together with its base object's face
+count. Known modifiers scale the face count (a TurboSmooth at 4 iterations
+is 4^4 = 256x); the predicted cost is linear in the faces every stage has
+to produce. Nodes over config/collapse_budget.json are skipped (default) or,
+with "defer", collapsed in a separate pass after the rest; both are reported.
+
+Measured per-node times are appended to a calibration log
+(<cache>/collapse_calibration.jsonl); once it holds enough samples, the cost
+line (seconds_base + seconds_per_mface * Mfaces) is fitted to it instead of
+using the config values (records of the same reset / collapse settings only).
+
+options keys:
+  - collapse_budget (default True; False = collapse every node, no estimates)
+  - collapse_budget_config (path to budget JSON, default config/collapse_budget.json)
+  - collapse_over_budget ("skip" or "defer", overrides the config)
+  - collapse_calibration (default True: fit the cost line to the calibration log)
+  - collapse_calibration_log (path, default <cache>/collapse_calibration.jsonl)
+"""
+import os
+import json
+import time
+
+from core.config import cache_dir, load_config
+
+
+DEFAULT_BUDGET = {
+    "max_faces": 2000000,          # predicted faces after collapse, per node (0 = off)
+    "max_seconds": 20.0,           # predicted collapse time, per node (0 = off)
+    "over_budget": "skip",         # "skip": leave the node alone, "defer": clean it in a second pass
+    "seconds_base": 0.005,
+    "seconds_per_mface": 1.5,      # per million faces produced by the stack
+    "modifiers": {
+        # class: per_iteration (faces x n^iterations), factor, or percent (vertex %)
+        "TurboSmooth": {"per_iteration": 4},
+        "MeshSmooth": {"per_iteration": 4},
+        "OpenSubdiv": {"per_iteration": 4},
+        "Tessellate": {"per_iteration": 3},
+        "Symmetry": {"factor": 2},
+        "Shell": {"factor": 2},
+        "Optimize": {"factor": 0.5},
+        "ProOptimizer": {"percent": True},
+        "MultiRes": {"percent": True},
+    },
+}
+
+MIN_CALIBRATION_SAMPLES = 20
+CALIBRATION_KEEP = 5000        # log lines kept when the file is trimmed
+CALIBRATION_MAX_BYTES = 4 * 1024 ** 2
+CALIBRATION_MIN_FACES = 10000  # smaller nodes only add timer noise
+CALIBRATION_PER_RUN = 1000     # heaviest nodes logged per cleanup
+
+
+def load_budget(options):
+    """
+    Budget config with option overrides and, when available, the cost line
+    fitted to the calibration log ("calibrated": sample count, 0 = config values).
+    """
+    budget = load_config("collapse_budget", DEFAULT_BUDGET, path=options.get("collapse_budget_config"))
+    if options.get("collapse_over_budget"):
+        budget["over_budget"] = options["collapse_over_budget"]
+    budget["modifiers"] = {str(k).lower(): v for k, v in (budget.get("modifiers") or {}).items()}
+
+    budget["calibrated"] = 0
+    if options.get("collapse_calibration", True):
+        reset = bool(options.get("reset_xform", True))
+        collapse = bool(options.get("collapse_stack", True))
+        records = [r for r in read_calibration(calibration_path(options))
+                   if r.get("reset") == reset and r.get("collapse") == collapse]
+        fit = fit_calibration(records)
+        if fit is not None:
+            budget["seconds_base"], budget["seconds_per_mface"], budget["calibrated"] = fit
+    return budget
+
+
+def estimate(base_faces, stack, budget):
+    """
+    (faces, work, seconds, heavy) for one node.
+
+    stack: [(class, enabled, iterations, vertex_percent), ...] bottom to top.
+    work: faces produced summed over the base and every stage (Mfaces).
+    heavy: short labels of the modifiers that multiply the face count.
+    """
+    table = budget.get("modifiers") or {}
+    faces = float(max(0, base_faces))
+    work = faces
+    heavy = []
+    for cls, enabled, iterations, percent in stack:
+        rule = table.get(str(cls).lower())
+        if not enabled or not rule:
+            continue
+        if "per_iteration" in rule:
+            n = max(0, int(iterations or 0))
+            scale = float(rule["per_iteration"]) ** n
+            label = f"{cls} x{n}"
+        elif rule.get("percent"):
+            scale = max(0.0, float(percent if percent is not None else 100.0)) / 100.0
+            label = f"{cls} {scale:.0%}"
+        else:
+            scale = float(rule.get("factor", 1.0))
+            label = str(cls)
+        faces *= scale
+        work += faces
+        if scale > 1.0:
+            heavy.append(label)
+
+    work /= 1e6
+    seconds = float(budget.get("seconds_base", 0.0)) + float(budget.get("seconds_per_mface", 0.0)) * work
+    return int(faces), work, seconds, heavy
+
+
+def over_budget(faces, seconds, budget):
+    """
+    Reason string when a prediction exceeds the budget, else "".
+    """
+    max_faces = int(budget.get("max_faces", 0) or 0)
+    max_seconds = float(budget.get("max_seconds", 0) or 0)
+    if max_faces and faces > max_faces:
+        return f"budget {max_faces:,} faces"
+    if max_seconds and seconds > max_seconds:
+        return f"budget {max_seconds:g} s"
+    return ""
+
+
+def calibration_path(options):
+    return options.get("collapse_calibration_log") or os.path.join(cache_dir(), "collapse_calibration.jsonl")
+
+
+def read_calibration(path, limit=CALIBRATION_KEEP):
+    """
+    Last `limit` records of the calibration log ([] if missing).
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()[-limit:]
+    except OSError:
+        return []
+
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue  # cut-off line of a killed session
+    return records
+
+
+def append_calibration(path, records):
+    """
+    Append measured nodes (dicts with work, seconds, ...) to the log; the
+    heaviest CALIBRATION_PER_RUN at or above CALIBRATION_MIN_FACES of work.
+    The file is trimmed to its last CALIBRATION_KEEP lines when it grows
+    past CALIBRATION_MAX_BYTES.
+    """
+    records = [r for r in records if r["work"] * 1e6 >= CALIBRATION_MIN_FACES]
+    records = sorted(records, key=lambda r: r["work"], reverse=True)[:CALIBRATION_PER_RUN]
+    if not records:
+        return
+
+    stamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for r in records:
+                f.write(json.dumps(dict(r, time=stamp), separators=(",", ":")) + "\n")
+
+        if os.path.getsize(path) > CALIBRATION_MAX_BYTES:
+            keep = read_calibration(path, CALIBRATION_KEEP)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for r in keep:
+                    f.write(json.dumps(r, separators=(",", ":")) + "\n")
+            os.replace(tmp, path)
+    except OSError as e:
+        print(f"[collapse] Could not write calibration log {path}: {e}")
+
+
+def fit_calibration(records, min_samples=MIN_CALIBRATION_SAMPLES):
+    """
+    Least-squares seconds = base + per_mface * work over the log.
+    Returns (base, per_mface, samples), or None with too few / degenerate samples.
+    """
+    pairs = []
+    for r in records:
+        try:
+            pairs.append((float(r["work"]), float(r["seconds"])))
+        except (KeyError, TypeError, ValueError):
+            continue
+    n = len(pairs)
+    if n < min_samples:
+        return None
+
+    mean_x = sum(x for x, _ in pairs) / n
+    mean_y = sum(y for _, y in pairs) / n
+    var = sum((x - mean_x) ** 2 for x, _ in pairs)
+    if var <= 0:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in pairs) / var
+    if slope <= 0:
+        return None
+    return max(0.0, mean_y - slope * mean_x), slope, n
@@ -0,0 +1,62 @@
+import os
+import json
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Studios can point these at a shared location (e.g. a pipeline config share)
+CONFIG_DIR_ENV = "MAX_SCENE_CLEANER_CONFIG"
+CACHE_DIR_ENV = "MAX_SCENE_CLEANER_CACHE"
+
+_loaded = {}  # path -> (mtime, data)
+
+
+def config_dir():
+    return os.environ.get(CONFIG_DIR_ENV) or os.path.join(REPO_ROOT, "config")
+
+
+def config_path(name):
+    return os.path.join(config_dir(), f"{name}.json")
+
+
+def load_config(name, defaults=None, path=None):
+    """
+    Load a JSON config by name (config/<name>.json) or explicit path.
+    Values are shallow-merged over `defaults`. A missing or broken file
+    falls back to the defaults, so tools keep working without config.
+    Re-reads the file only when its mtime changes.
+    """
+    path = path or config_path(name)
+    data = dict(defaults or {})
+
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return data
+
+    cached = _loaded.get(path)
+    if cached is None or cached[0] != mtime:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+        except Exception:
+            loaded = {}
+        if not isinstance(loaded, dict):
+            loaded = {}
+        cached = (mtime, loaded)
+        _loaded[path] = cached
+
+    data.update(cached[1])
+    return data
+
+
+def cache_dir():
+    """
+    Per-user cache folder (hash caches, header caches, ...). Created on demand.
+    """
+    root = os.environ.get(CACHE_DIR_ENV)
+    if not root:
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+        root = os.path.join(base, "MaxSceneCleaner")
+    os.makedirs(root, exist_ok=True)
+    return root
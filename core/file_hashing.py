@@ -0,0 +1,164 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.config import cache_dir
+
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_WORKERS = 8
+
+
+class HashCache:
+    """
+    Content hashes keyed by (path, size, mtime), persisted as JSON in the user
+    cache folder, so repeat runs only hash files that changed.
+
+    One entry per path: put() replaces the entry of an older version of the
+    file. Beyond max_entries the least recently used entries are dropped.
+    """
+
+    def __init__(self, path=None, max_entries=100000):
+        self.path = path or os.path.join(cache_dir(), "file_hashes.json")
+        self.max_entries = int(max_entries)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._data = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._data = data
+        except Exception:
+            self._data = {}
+        # path -> key of its current entry (older files may hold several)
+        self._by_path = {}
+        for key in list(self._data):
+            old = self._by_path.get(key.rsplit("|", 2)[0])
+            if old is not None:
+                del self._data[old]
+                self._dirty = True
+            self._by_path[key.rsplit("|", 2)[0]] = key
+
+    @staticmethod
+    def key(path, size, mtime):
+        return f"{path}|{size}|{mtime}"
+
+    def get(self, path, size, mtime):
+        key = self.key(path, size, mtime)
+        with self._lock:
+            value = self._data.pop(key, None)
+            if value is not None:
+                self._data[key] = value  # most recently used last
+            return value
+
+    def put(self, path, size, mtime, digest):
+        key = self.key(path, size, mtime)
+        with self._lock:
+            old = self._by_path.get(path)
+            if old is not None and old != key:
+                self._data.pop(old, None)
+            self._data.pop(key, None)
+            self._data[key] = digest
+            self._by_path[path] = key
+            while len(self._data) > self.max_entries:
+                oldest = next(iter(self._data))
+                del self._data[oldest]
+                self._by_path.pop(oldest.rsplit("|", 2)[0], None)
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp = self.path + ".tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self._data, f)
+                os.replace(tmp, self.path)
+                self._dirty = False
+            except Exception:
+                pass
+
+
+_default_cache = None
+
+
+def get_hash_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = HashCache()
+    return _default_cache
+
+
+def hash_file(path, chunk_size=CHUNK_SIZE):
+    """
+    Streamed BLAKE2b of a file (constant memory).
+    """
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def group_identical_files(paths, workers=DEFAULT_WORKERS, cache=None):
+    """
+    Group files with identical content.
+
+    1) stat every path once and bucket by size (unique sizes can't be duplicates)
+    2) hash only size collisions, in chunks, across a thread pool
+    3) bucket by (size, hash)
+
+    Returns (groups, errors): groups is list[list[path]] with 2+ members,
+    errors is {path: message} for files that could not be read.
+    """
+    cache = cache if cache is not None else get_hash_cache()
+
+    by_size = {}
+    stats = {}
+    errors = {}
+    for p in dict.fromkeys(paths):
+        try:
+            st = os.stat(p)
+        except OSError as e:
+            errors[p] = str(e)
+            continue
+        stats[p] = (st.st_size, st.st_mtime_ns)
+        by_size.setdefault(st.st_size, []).append(p)
+
+    to_hash = [p for group in by_size.values() if len(group) > 1 for p in group]
+
+    def _hash(p):
+        size, mtime = stats[p]
+        digest = cache.get(p, size, mtime)
+        if digest is None:
+            try:
+                digest = hash_file(p)
+            except OSError as e:
+                return p, None, str(e)
+            cache.put(p, size, mtime, digest)
+        return p, digest, None
+
+    digests = {}
+    if to_hash:
+        with ThreadPoolExecutor(max_workers=max(1, int(workers or 1))) as pool:
+            for p, digest, err in pool.map(_hash, to_hash):
+                if err is not None:
+                    errors[p] = err
+                else:
+                    digests[p] = digest
+        cache.save()
+
+    buckets = {}
+    for p, digest in digests.items():
+        buckets.setdefault((stats[p][0], digest), []).append(p)
+
+    groups = [sorted(g) for g in buckets.values() if len(g) > 1]
+    groups.sort()
+    return groups, errors
@@ -0,0 +1,167 @@
+import pymxs
+rt = pymxs.runtime
+
+from core import tracing
+from core.config import load_config
+from core.results import Level, register_rule
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional inside Max
+    np = None
+
+
+DEFAULT_BUDGET = {
+    "max_node_faces": 1000000,     # per node (instances count once per node)
+    "max_node_verts": 1000000,
+    "max_uv_channels": 4,          # map channels 1..n
+    "max_layer_faces": 5000000,
+    "max_scene_faces": 20000000,
+    "top_offenders": 10,           # nodes listed by face count (0 = none)
+}
+
+NODE_FACES = register_rule(130, "geometry_node_faces", "Faces over budget: {0:,} (budget {1:,})")
+NODE_VERTS = register_rule(131, "geometry_node_verts", "Vertices over budget: {0:,} (budget {1:,})")
+NODE_UVS = register_rule(132, "geometry_uv_channels", "UV channels over budget: {0} (budget {1})")
+LAYER_FACES = register_rule(133, "geometry_layer_faces", "Layer faces over budget: {0:,} in {1} nodes (budget {2:,})")
+SCENE_FACES = register_rule(134, "geometry_scene_faces", "Scene faces over budget: {0:,} (budget {1:,})")
+SUMMARY = register_rule(135, "geometry_summary",
+                        "Geometry: {0:,} faces, {1:,} verts in {2} nodes; faces per node p50 {3:,}, p90 {4:,}, p99 {5:,}")
+TOP_OFFENDER = register_rule(136, "geometry_top", "Top {0} by faces: {1:,} faces, {2:,} verts ({3:.1f}% of scene)")
+
+# One call for every geometry node: parallel arrays of names, layers, face,
+# vertex and map channel counts. getPolygonCount reads the evaluated object
+# without building a mesh; channel counts only fall back to a mesh copy for
+# objects that are neither poly nor mesh at the top of the stack.
+_STATS_MS = r"""
+(
+    local names = #()
+    local layers = #()
+    local faces = #()
+    local verts = #()
+    local maps = #()
+    for o in geometry where not (isKindOf o TargetObject) do
+    (
+        local pc = #(0, 0)
+        try (pc = getPolygonCount o) catch()
+        local n = 0
+        try (n = polyop.getNumMaps o) catch (try (n = meshop.getNumMaps o.mesh) catch())
+        append names o.name
+        append layers o.layer.name
+        append faces pc[1]
+        append verts pc[2]
+        append maps (amax 0 (n - 1))
+    )
+    #(names, layers, faces, verts, maps)
+)
+"""
+
+
+def scan_geometry_budget(options, out):
+    """
+    Face / vertex / UV channel statistics for all geometry, checked against
+    per-node, per-layer and scene budgets (config/geometry_budget.json).
+    Adds Issues to `out` (core.results.IssueCollector).
+
+    options keys:
+      - geometry_budget_config (path to budget JSON, default config/geometry_budget.json)
+    """
+    if np is None:
+        out.extend([_info("Geometry", "NumPy not available; geometry budget scan skipped")])
+        return
+
+    budget = load_config("geometry_budget", DEFAULT_BUDGET, path=options.get("geometry_budget_config"))
+    try:
+        names, layers, faces, verts, maps = collect_geometry_stats()
+    except Exception as e:
+        out.extend([_warning("Geometry", f"Geometry statistics failed: {e}")])
+        return
+    if not names:
+        return
+
+    stats = geometry_stats(layers, faces, verts, maps, int(budget.get("top_offenders", 0) or 0))
+    _add_results(out, names, faces, verts, maps, stats, budget)
+
+
+def collect_geometry_stats():
+    """
+    Returns (names, layers, faces, verts, uv_channels); the counts as int64 arrays.
+    """
+    with tracing.span("ms.geometry_stats", "maxscript"):
+        res = rt.execute(_STATS_MS)
+
+    names = [str(n) for n in res[0]]
+    layers = [str(n) for n in res[1]]
+    count = len(names)
+    faces = np.fromiter(res[2], dtype=np.int64, count=count)
+    verts = np.fromiter(res[3], dtype=np.int64, count=count)
+    maps = np.fromiter(res[4], dtype=np.int64, count=count)
+    return names, layers, faces, verts, maps
+
+
+def geometry_stats(layers, faces, verts, maps, top=10):
+    """
+    Totals, face-count percentiles, per-layer totals and the `top` nodes by
+    faces (indices), all with NumPy reductions.
+    """
+    layer_names, layer_index = np.unique(np.asarray(layers, dtype=str), return_inverse=True)
+    layer_index = layer_index.ravel()
+    p50, p90, p99 = np.percentile(faces, [50, 90, 99]) if faces.size else (0, 0, 0)
+
+    top_index = np.argsort(faces, kind="stable")[::-1][:top] if top > 0 else np.empty(0, dtype=np.int64)
+    return {
+        "nodes": int(faces.size),
+        "faces": int(faces.sum()),
+        "verts": int(verts.sum()),
+        "max_uv_channels": int(maps.max()) if maps.size else 0,
+        "faces_p50": int(round(p50)),
+        "faces_p90": int(round(p90)),
+        "faces_p99": int(round(p99)),
+        "layers": {
+            str(name): {"faces": int(f), "verts": int(v), "nodes": int(n)}
+            for name, f, v, n in zip(
+                layer_names,
+                np.bincount(layer_index, weights=faces, minlength=len(layer_names)),
+                np.bincount(layer_index, weights=verts, minlength=len(layer_names)),
+                np.bincount(layer_index, minlength=len(layer_names)),
+            )
+        },
+        "top": [int(i) for i in top_index if faces[i] > 0],
+    }
+
+
+def _add_results(out, names, faces, verts, maps, stats, budget):
+    max_faces = int(budget.get("max_node_faces", 0) or 0)
+    max_verts = int(budget.get("max_node_verts", 0) or 0)
+    max_uvs = int(budget.get("max_uv_channels", 0) or 0)
+    max_layer = int(budget.get("max_layer_faces", 0) or 0)
+    max_scene = int(budget.get("max_scene_faces", 0) or 0)
+
+    # Only the (few) nodes over a budget are visited in Python
+    checks = ((max_faces, faces, NODE_FACES), (max_verts, verts, NODE_VERTS), (max_uvs, maps, NODE_UVS))
+    for limit, values, code in checks:
+        if limit:
+            for i in np.flatnonzero(values > limit):
+                out.add(code, Level.WARNING, names[i], (int(values[i]), limit))
+
+    if max_layer:
+        for name, layer in sorted(stats["layers"].items()):
+            if layer["faces"] > max_layer:
+                out.add(LAYER_FACES, Level.WARNING, f"Layer:{name}", (layer["faces"], layer["nodes"], max_layer))
+
+    if max_scene and stats["faces"] > max_scene:
+        out.add(SCENE_FACES, Level.WARNING, "Geometry", (stats["faces"], max_scene))
+    out.add(SUMMARY, Level.INFO, "Geometry", (stats["faces"], stats["verts"], stats["nodes"],
+                                               stats["faces_p50"], stats["faces_p90"], stats["faces_p99"]))
+
+    total = float(stats["faces"]) or 1.0
+    for rank, i in enumerate(stats["top"], 1):
+        out.add(TOP_OFFENDER, Level.INFO, names[i], (f"#{rank}", int(faces[i]), int(verts[i]), 100.0 * int(faces[i]) / total))
+
+
+def _info(node, message):
+    return {"level": "INFO", "node": node, "message": message}
+
+
+def _warning(node, message):
+    return {"level": "WARNING", "node": node, "message": message}
@@ -0,0 +1,271 @@
+import os
+import re
+import hashlib
+
+import pymxs
+rt = pymxs.runtime
+
+from core import tracing
+from core.material_graph import get_material_graph
+
+
+# Max appends " #2", " #3", ... when merging same-named materials
+_COPY_SUFFIX = re.compile(r"\s*#\d+$")
+
+# Non-reference parameter values for a list of anim handles. Values that are
+# materials/maps (or arrays of them) are skipped: they are graph edges.
+_PARAMS_MS = r"""
+(
+    fn isMtlRef v =
+    (
+        local sc = undefined
+        try(sc = superClassOf v)catch()
+        sc == material or sc == textureMap
+    )
+
+    local out = #()
+    for h in #(%HANDLES%) do
+    (
+        local props = #()
+        local a = getAnimByHandle h
+        if a != undefined do
+        (
+            local names = #()
+            try(names = getPropNames a)catch()
+            for p in names do
+            (
+                local v = undefined
+                local ok = true
+                try(v = getProperty a p)catch(ok = false)
+                if ok and not (isMtlRef v) do
+                (
+                    if classOf v == Array then
+                    (
+                        local refs = false
+                        for x in v while not refs do refs = isMtlRef x
+                        if not refs do append props ((p as string) + "=" + (v as string))
+                    )
+                    else if classOf v != Bitmap do
+                    (
+                        append props ((p as string) + "=" + (v as string))
+                    )
+                )
+            )
+        )
+        append out props
+    )
+    out
+)
+"""
+
+
+def compute_structural_hashes(graph, params):
+    """
+    Canonical hash per graph item: class + sorted parameter values + child hashes
+    by slot. Names are ignored. Memoized post-order walk, linear in items + edges.
+    params: list[list[str]] aligned with graph.items ("prop=value").
+    """
+    by_parent = [[] for _ in graph.items]
+    for parent, kind, slot, child in graph.edges:
+        by_parent[parent].append((kind, slot, child))
+
+    hashes = [None] * len(graph.items)
+    in_progress = set()
+
+    for start in range(len(graph.items)):
+        if hashes[start] is not None:
+            continue
+        stack = [(start, False)]
+        while stack:
+            i, expanded = stack.pop()
+            if hashes[i] is not None:
+                continue
+            if not expanded:
+                in_progress.add(i)
+                stack.append((i, True))
+                for _, _, child in by_parent[i]:
+                    if hashes[child] is None and child not in in_progress:
+                        stack.append((child, False))
+                continue
+
+            _, kind, cls, _ = graph.items[i]
+            h = hashlib.blake2b(digest_size=16)
+            h.update(f"{kind}|{cls}\n".encode("utf-8", "replace"))
+            for p in sorted(_normalize_param(p) for p in params[i]):
+                h.update(p.encode("utf-8", "replace"))
+                h.update(b"\n")
+            for slot_kind, slot, child in sorted(by_parent[i]):
+                # Reference cycles (rare) hash the back edge as a constant
+                child_hash = hashes[child] or b"cycle"
+                h.update(f"{slot_kind}{slot}=".encode("ascii"))
+                h.update(child_hash)
+            hashes[i] = h.digest()
+            in_progress.discard(i)
+
+    return hashes
+
+
+def find_duplicate_groups(graph, hashes):
+    """
+    Returns list of (survivor_index, [duplicate_indices]) per hash group.
+    The survivor is the copy with the plainest name (no " #n" suffix), then lowest index.
+    Untouched default Material Editor slots (graph.defaults) are never grouped.
+    """
+    groups = {}
+    for i, h in enumerate(hashes):
+        if i not in graph.defaults:
+            groups.setdefault(h, []).append(i)
+
+    out = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda i: (bool(_COPY_SUFFIX.search(graph.items[i][3])), len(graph.items[i][3]), i))
+        out.append((members[0], members[1:]))
+    return out
+
+
+def scan_duplicate_materials(options=None):
+    """
+    Report groups of structurally identical materials and maps.
+    Returns list[dict]: {"level","node","message"}
+    """
+    try:
+        graph, groups = _analyze()
+    except Exception as e:
+        return [_warning("Materials", f"Duplicate material scan failed: {e}")]
+
+    out = []
+    for survivor, dups in groups:
+        _, kind, cls, name = graph.items[survivor]
+        what = "material" if kind == "m" else "map"
+        others = ", ".join(graph.items[i][3] for i in dups[:5])
+        if len(dups) > 5:
+            others += f", ... (+{len(dups) - 5})"
+        out.append(_warning(name or cls, f"Duplicate {what} ({cls}): {len(dups)} identical copies [{others}]"))
+
+    if groups:
+        total = sum(len(d) for _, d in groups)
+        out.append(_info("Materials", f"Duplicate material/map groups: {len(groups)} ({total} redundant copies)"))
+    else:
+        out.append(_info("Materials", "No duplicate materials or maps detected."))
+    return out
+
+
+def merge_duplicate_materials(options=None):
+    """
+    Reassign nodes (and sub-material / map slots) from each duplicate to its
+    group's survivor, in a single undo block. The leftover copies become unused
+    and are removed by the unused-material purge.
+    """
+    try:
+        graph, groups = _analyze(refresh=True)
+    except Exception as e:
+        return [_warning("Materials", f"Duplicate material merge failed: {e}")]
+
+    if not groups:
+        return [_info("Materials", "No duplicate materials to merge.")]
+
+    survivor_of = {}
+    for survivor, dups in groups:
+        for i in dups:
+            survivor_of[i] = survivor
+
+    remap = []
+    for i, s in survivor_of.items():
+        if graph.items[i][1] == "m":
+            remap.append(f"PutDictValue remap {graph.items[i][0]} {graph.items[s][0]}")
+
+    slots = []
+    for parent, kind, slot, child in graph.edges:
+        s = survivor_of.get(child)
+        if s is not None and parent not in survivor_of:
+            slots.append(f"#({graph.items[parent][0]}, \"{kind}\", {slot}, {graph.items[s][0]})")
+
+    ms = """
+    undo "MaxSceneCleaner_MergeMaterials" on
+    (
+        local reassigned = 0
+        local rewired = 0
+        local remap = Dictionary #integer
+        %REMAP%
+
+        for n in objects do
+        (
+            if n.material != undefined do
+            (
+                local h = getHandleByAnim n.material
+                if HasDictValue remap h do
+                (
+                    local s = getAnimByHandle (GetDictValue remap h)
+                    if s != undefined do (n.material = s; reassigned += 1)
+                )
+            )
+        )
+
+        for e in #(%SLOTS%) do
+        (
+            local p = getAnimByHandle e[1]
+            local s = getAnimByHandle e[4]
+            if p != undefined and s != undefined do
+            (
+                try
+                (
+                    if e[2] == "m" then setSubMtl p e[3] s else setSubTexmap p e[3] s
+                    rewired += 1
+                )
+                catch()
+            )
+        )
+
+        #(reassigned, rewired)
+    )
+    """.replace("%REMAP%", "\n        ".join(remap)).replace("%SLOTS%", ", ".join(slots))
+
+    try:
+        with tracing.span("ms.merge_materials", "maxscript"):
+            res = rt.execute(ms)
+        reassigned, rewired = int(res[0]), int(res[1])
+    except Exception as e:
+        return [_warning("Materials", f"Duplicate material merge failed: {e}")]
+
+    total = sum(len(d) for _, d in groups)
+    return [
+        _info("Materials", f"Merged {total} duplicate materials/maps into {len(groups)} survivors"),
+        _info("Materials", f"Nodes reassigned: {reassigned}, slots rewired: {rewired}"),
+    ]
+
+
+def _analyze(refresh=False):
+    graph = get_material_graph(refresh=refresh)
+    params = _fetch_params(graph)
+    hashes = compute_structural_hashes(graph, params)
+    return graph, find_duplicate_groups(graph, hashes)
+
+
+def _fetch_params(graph):
+    if not graph.items:
+        return []
+    handles = ", ".join(str(it[0]) for it in graph.items)
+    with tracing.span("ms.material_params", "maxscript", items=len(graph.items)):
+        res = rt.execute(_PARAMS_MS.replace("%HANDLES%", handles))
+    params = [[str(p) for p in props] for props in list(res)]
+    if len(params) != len(graph.items):
+        raise RuntimeError("parameter extraction size mismatch")
+    return params
+
+
+def _normalize_param(p):
+    # Map file paths compare case/separator-insensitively
+    name, _, value = p.partition("=")
+    if name.lower() in ("filename", "filenamestring", "filepath") and value:
+        value = os.path.normcase(os.path.normpath(value)).replace("\\", "/").lower()
+    return f"{name.lower()}={value}"
+
+
+def _info(node, message):
+    return {"level": "INFO", "node": node, "message": message}
+
+
+def _warning(node, message):
+    return {"level": "WARNING", "node": node, "message": message}
@@ -0,0 +1,341 @@
+import pymxs
+rt = pymxs.runtime
+
+from core import tracing
+
+
+# Cached per scene; the key is bumped by MAXScript callbacks whenever
+# material assignments, nodes or the scene file change.
+_cache = {"key": None, "graph": None}
+
+_EPOCH_MS = r"""
+(
+    global MaxSceneCleaner_MatGraphEpoch
+    if MaxSceneCleaner_MatGraphEpoch == undefined do
+    (
+        MaxSceneCleaner_MatGraphEpoch = 0
+        callbacks.removeScripts id:#MaxSceneCleaner_MatGraph
+        for e in #(#mtlRefAdded, #mtlRefDeleted, #filePostOpen, #filePostMerge, #systemPostReset, \
+                   #systemPostNew, #sceneNodeAdded, #nodePostDelete, #postNodesCloned, #sceneUndo, #sceneRedo) do
+        (
+            try(callbacks.addScript e "MaxSceneCleaner_MatGraphEpoch += 1" id:#MaxSceneCleaner_MatGraph)catch()
+        )
+    )
+    #(MaxSceneCleaner_MatGraphEpoch, maxFilePath + maxFileName)
+)
+"""
+
+# One bulk extraction: every material/texmap instance, their sub-slot edges,
+# the materials assigned to nodes and the untouched default Material Editor
+# slots ("01 - Default" in slot 1, ..., no maps or sub-materials), which
+# getClassInstances also returns. Identity = anim handle.
+_EXTRACT_MS = r"""
+(
+    local items = #()   -- #(handle, kind, class, name)
+    local edges = #()   -- #(parentHandle, slotKind, slotIndex, childHandle)
+    local roots = #()
+    local defaults = #()
+
+    local all = #()
+    for c in material.classes do join all (getClassInstances c)
+    local matCount = all.count
+    for c in textureMap.classes do join all (getClassInstances c)
+
+    for i = 1 to all.count do
+    (
+        local m = all[i]
+        local h = getHandleByAnim m
+        local kind = if i <= matCount then "m" else "t"
+        local nm = ""
+        try(nm = m.name)catch()
+        append items #(h, kind, (classOf m) as string, nm)
+
+        if kind == "m" do
+        (
+            local ns = 0
+            try(ns = getNumSubMtls m)catch()
+            for s = 1 to ns do
+            (
+                local sm = undefined
+                try(sm = getSubMtl m s)catch()
+                if sm != undefined do append edges #(h, "m", s, getHandleByAnim sm)
+            )
+        )
+
+        local nt = 0
+        try(nt = getNumSubTexmaps m)catch()
+        for s = 1 to nt do
+        (
+            local st = undefined
+            try(st = getSubTexmap m s)catch()
+            if st != undefined do append edges #(h, "t", s, getHandleByAnim st)
+        )
+    )
+
+    for n in objects do
+    (
+        if n.material != undefined do append roots (getHandleByAnim n.material)
+    )
+    try(if environmentMap != undefined do append roots (getHandleByAnim environmentMap))catch()
+
+    for i = 1 to meditMaterials.count do
+    (
+        local m = meditMaterials[i]
+        local untouched = false
+        try(untouched = m.name == ((formattedPrint i format:"02d") + " - Default"))catch()
+        if untouched do
+        (
+            local n = 0
+            try(n = getNumSubTexmaps m)catch()
+            for s = 1 to n while untouched do
+            (
+                local st = undefined
+                try(st = getSubTexmap m s)catch()
+                if st != undefined do untouched = false
+            )
+            n = 0
+            try(n = getNumSubMtls m)catch()
+            for s = 1 to n while untouched do
+            (
+                local sm = undefined
+                try(sm = getSubMtl m s)catch()
+                if sm != undefined do untouched = false
+            )
+        )
+        if untouched do append defaults (getHandleByAnim m)
+    )
+
+    #(items, edges, roots, defaults)
+)
+"""
+
+
+class MaterialGraph:
+    """
+    Material / sub-material / map reference graph.
+
+    items: list of (handle, kind, class, name), kind "m" (material) or "t" (texmap)
+    edges: list of (parent_index, slot_kind, slot_index, child_index)
+    roots: set of item indices assigned to nodes (or kept alive outside the material tree)
+    defaults: set of item indices of untouched default Material Editor slots;
+    never reported, purged or merged (a purge would only put new defaults there)
+    """
+
+    def __init__(self, items, edges, roots, defaults=()):
+        self.items = items
+        self.index = {it[0]: i for i, it in enumerate(items)}
+        self.edges = edges
+        self.children = [set() for _ in items]
+        for parent, _, _, child in edges:
+            self.children[parent].add(child)
+        self.roots = set(roots)
+        self.defaults = set(defaults)
+        self._reachable = None
+
+    @classmethod
+    def from_extraction(cls, raw_items, raw_edges, raw_roots, raw_defaults=()):
+        items = [(int(it[0]), str(it[1]), str(it[2]), str(it[3])) for it in raw_items]
+        index = {it[0]: i for i, it in enumerate(items)}
+
+        edges = []
+        for e in raw_edges:
+            p = index.get(int(e[0]))
+            c = index.get(int(e[3]))
+            if p is not None and c is not None:
+                edges.append((p, str(e[1]), int(e[2]), c))
+
+        roots = set()
+        for h in raw_roots:
+            i = index.get(int(h))
+            if i is not None:
+                roots.add(i)
+
+        defaults = {index[int(h)] for h in raw_defaults if int(h) in index}
+        return cls(items, edges, roots, defaults)
+
+    def reachable(self):
+        if self._reachable is None:
+            seen = set()
+            stack = list(self.roots)
+            while stack:
+                i = stack.pop()
+                if i in seen:
+                    continue
+                seen.add(i)
+                stack.extend(self.children[i] - seen)
+            self._reachable = seen
+        return self._reachable
+
+    def unreachable(self):
+        reach = self.reachable()
+        return [i for i in range(len(self.items)) if i not in reach]
+
+    def unused(self):
+        """
+        Unreachable items minus the untouched default Material Editor slots.
+        """
+        return [i for i in self.unreachable() if i not in self.defaults]
+
+    def add_roots(self, indices):
+        before = len(self.roots)
+        self.roots.update(indices)
+        if len(self.roots) != before:
+            self._reachable = None
+
+
+def scene_key():
+    try:
+        res = rt.execute(_EPOCH_MS)
+        return (int(res[0]), str(res[1]))
+    except Exception:
+        return None
+
+
+def get_material_graph(refresh=False):
+    """
+    Return the cached MaterialGraph for the current scene, rebuilding it
+    when the scene changed (or refresh=True).
+    """
+    key = scene_key()
+    if not refresh and key is not None and _cache["key"] == key and _cache["graph"] is not None:
+        return _cache["graph"]
+
+    with tracing.span("ms.extract_material_graph", "maxscript"):
+        res = rt.execute(_EXTRACT_MS)
+    graph = MaterialGraph.from_extraction(list(res[0]), list(res[1]), list(res[2]), list(res[3]))
+    _confirm_unreachable(graph)
+
+    _cache["key"] = key
+    _cache["graph"] = graph
+    return graph
+
+
+def invalidate_material_graph():
+    _cache["key"] = None
+    _cache["graph"] = None
+
+
+def _confirm_unreachable(graph):
+    """
+    Maps/materials can also be held by modifiers, lights, atmospherics, ...
+    Only the (usually small) unreachable set is checked for dependent nodes;
+    anything still driving a node becomes an extra root.
+    """
+    candidates = graph.unused()
+    if not candidates:
+        return
+
+    handles = ", ".join(str(graph.items[i][0]) for i in candidates)
+    ms = f"""
+    (
+        local out = #()
+        for h in #({handles}) do
+        (
+            local a = getAnimByHandle h
+            if a != undefined and (refs.dependentNodes a).count > 0 do append out h
+        )
+        out
+    )
+    """
+    try:
+        held = [graph.index[int(h)] for h in list(rt.execute(ms)) if int(h) in graph.index]
+    except Exception:
+        held = []
+    graph.add_roots(held)
+
+
+def scan_unused_materials(options=None):
+    """
+    Report materials and maps that are not reachable from any node.
+    Returns list[dict]: {"level","node","message"}
+    """
+    try:
+        graph = get_material_graph()
+    except Exception as e:
+        return [_warning("Materials", f"Material graph extraction failed: {e}")]
+
+    out = []
+    unused = graph.unused()
+    mats = 0
+    maps = 0
+    for i in unused:
+        _, kind, cls, name = graph.items[i]
+        if kind == "m":
+            mats += 1
+            out.append(_info(name or cls, f"Unused material ({cls}): not assigned to any node"))
+        else:
+            maps += 1
+            out.append(_info(name or cls, f"Unused map ({cls}): not reachable from any assigned material"))
+
+    total = len(graph.items) - len(graph.defaults)
+    if unused:
+        out.append(_warning("Materials", f"Unused: {mats} materials, {maps} maps (of {total} in scene)"))
+    else:
+        out.append(_info("Materials", f"No unused materials or maps ({total} in scene)"))
+    return out
+
+
+def build_purge_script(graph):
+    """
+    MAXScript fragment (meant to run inside the cleanup undo block) that releases
+    unreachable materials/maps from Material Editor slots, sceneMaterials and
+    Slate views. Every target is re-checked for dependent nodes first.
+    Increments the caller's `purgedMaterials` local.
+    """
+    handles = [graph.items[i][0] for i in graph.unused()]
+    if not handles:
+        return ""
+
+    handle_list = ", ".join(str(h) for h in handles)
+    return f"""
+            for h in #({handle_list}) do
+            (
+                local a = getAnimByHandle h
+                if a != undefined and (refs.dependentNodes a).count == 0 do
+                (
+                    local hit = false
+
+                    for i = 1 to meditMaterials.count do
+                    (
+                        if meditMaterials[i] == a do
+                        (
+                            try(meditMaterials[i] = PhysicalMaterial name:((formattedPrint i format:"02d") + " - Default"); hit = true)catch()
+                        )
+                    )
+
+                    for i = sceneMaterials.count to 1 by -1 do
+                    (
+                        if sceneMaterials[i] == a do
+                        (
+                            try(deleteItem sceneMaterials i; hit = true)catch()
+                        )
+                    )
+
+                    try
+                    (
+                        for v = 1 to sme.GetNumViews() do
+                        (
+                            local view = sme.GetView v
+                            local nd = view.GetNodeByRef a
+                            if nd != undefined do
+                            (
+                                view.SetSelectedNodes #(nd)
+                                view.DeleteSelection()
+                                hit = true
+                            )
+                        )
+                    )
+                    catch()
+
+                    if hit do purgedMaterials += 1
+                )
+            )
+    """
+
+
+def _info(node, message):
+    return {"level": "INFO", "node": node, "message": message}
+
+
+def _warning(node, message):
+    return {"level": "WARNING", "node": node, "message": message}
@@ -1,6 +1,8 @@
 import pymxs
 rt = pymxs.runtime
 
+from core import tracing
+
 
 def scan_materials_and_textures(options=None):
     """
@@ -8,9 +10,13 @@ def scan_materials_and_textures(options=None):
     Returns list[dict]: {"level","node","message"}
 
     We detect:
-      - missing bitmap files
+      - missing external files of any asset type (see core.scene_assets)
       - high scene material count (best-effort)
+      - structurally identical materials/maps (option: merge_duplicate_materials)
+      - texture memory over budget, from image headers (option: audit_texture_memory)
+      - the same image under several files / paths (option: detect_duplicate_textures)
     """
+    options = options or {}
     results = []
 
     # 1) High material count (best-effort)
@@ -24,56 +30,66 @@ def scan_materials_and_textures(options=None):
     except Exception:
         pass
 
-    # 2) Missing textures (robust via MAXScript bitmap collection)
+    # 2) Missing external files of every asset type (bitmaps, OSL, IES, proxies,
+    #    caches, XRefs) in one enumeration + one parallel stat pass
+    from core.scene_assets import scan_missing_assets
+    with tracing.span("scan.missing_assets", "scan"):
+        results.extend(scan_missing_assets(options))
+
+    # 3) Duplicate materials/maps (structural hash of each material tree)
+    if options.get("merge_duplicate_materials", False):
+        from core.material_dedup import scan_duplicate_materials
+        with tracing.span("scan.duplicate_materials", "scan"):
+            results.extend(scan_duplicate_materials(options))
+
+    # 4) Texture memory budget (header-only reads, no pixel decoding)
+    if options.get("audit_texture_memory", False):
+        from core.texture_audit import scan_texture_memory
+        with tracing.span("scan.texture_memory", "scan"):
+            results.extend(scan_texture_memory(options))
+
+    # 5) Duplicate texture files / path spellings (hashes every referenced image)
+    if options.get("detect_duplicate_textures", False):
+        from core.texture_dedup import scan_duplicate_textures
+        with tracing.span("scan.duplicate_textures", "scan"):
+            results.extend(scan_duplicate_textures(options))
+
+    return results
+
+
+def collect_bitmap_textures():
+    """
+    All BitmapTexture instances with a file path, in one MAXScript call.
+    Returns list[(bitmaptexture, owner_name, path)].
+    """
     ms = r"""
     (
-        local out = #()  -- array of strings "owner|path"
-        local bms = getClassInstances BitmapTexture
-
-        for bt in bms do
+        local out = #()
+        for bt in (getClassInstances BitmapTexture) do
         (
             if bt != undefined do
             (
                 local p = bt.filename
                 if p != undefined and p != "" do
                 (
-                    if (doesFileExist p) == false do
-                    (
-                        local owner = ""
-                        try(owner = bt.name)catch(owner = "BitmapTexture")
-                        append out (owner + "|" + p)
-                    )
+                    local owner = ""
+                    try(owner = bt.name)catch(owner = "BitmapTexture")
+                    append out #(bt, owner, p)
                 )
             )
         )
-
         out
     )
     """
-
-    missing = []
+    out = []
     try:
-        missing = rt.execute(ms)  # returns MAXScript array
-    except Exception:
-        missing = []
-
-    try:
-        # Convert MAXScript array-ish to python iterable
-        for s in list(missing):
-            try:
-                parts = str(s).split("|", 1)
-                owner = parts[0] if len(parts) > 0 else "Bitmap"
-                path = parts[1] if len(parts) > 1 else str(s)
-                results.append(_warning(owner, f"Missing texture: {path}"))
-            except Exception:
-                pass
+        with tracing.span("ms.collect_bitmap_textures", "maxscript"):
+            items = list(rt.execute(ms))
+        for item in items:
+            out.append((item[0], str(item[1]), str(item[2])))
     except Exception:
         pass
-
-    if not missing:
-        results.append(_info("Textures", "No missing bitmap textures detected (BitmapTexture)."))
-
-    return results
+    return out
 
 
 def _info(node, message):
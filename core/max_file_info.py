@@ -0,0 +1,498 @@
+import os
+import mmap
+import struct
+
+
+# Compound File Binary (OLE2) constants
+_CFB_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+_ENDOFCHAIN = 0xFFFFFFFE
+_MAX_REGSECT = 0xFFFFFFFA
+
+# Property set types used by the summary streams
+_VT_I2 = 2
+_VT_I4 = 3
+_VT_BOOL = 11
+_VT_VARIANT = 12
+_VT_UI4 = 19
+_VT_LPSTR = 30
+_VT_LPWSTR = 31
+_VT_FILETIME = 64
+_VT_VECTOR = 0x1000
+
+
+class _Stream:
+    """
+    Random-access view of a sector chain; reads only the sectors touched.
+    """
+
+    def __init__(self, read_fn, sectors, sector_size, size):
+        self._read_fn = read_fn
+        self._sectors = sectors
+        self._sector_size = sector_size
+        self.size = size
+
+    def read(self, pos, n):
+        n = max(0, min(n, self.size - pos))
+        out = []
+        ss = self._sector_size
+        while n > 0:
+            idx, within = divmod(pos, ss)
+            if idx >= len(self._sectors):
+                break
+            take = min(n, ss - within)
+            out.append(self._read_fn(self._sectors[idx] + within, take))
+            pos += take
+            n -= take
+        return b"".join(out)
+
+    def read_all(self):
+        return self.read(0, self.size)
+
+
+class CompoundFile:
+    """
+    Minimal read-only reader for the OLE compound document container .max
+    files are stored in. The file is memory-mapped and only the header,
+    FAT, directory and the requested stream sectors are touched.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        try:
+            self._mm.close()
+        except Exception:
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read(self, offset, n):
+        return self._mm[offset:offset + n]
+
+    def _parse(self):
+        head = self._read(0, 512)
+        if len(head) < 512 or head[:8] != _CFB_MAGIC:
+            raise ValueError("not a compound document (.max) file")
+
+        sector_shift, mini_shift = struct.unpack_from("<HH", head, 30)
+        self.sector_size = 1 << sector_shift
+        self.mini_sector_size = 1 << mini_shift
+        (num_fat, first_dir, _, self.mini_cutoff,
+         first_minifat, num_minifat, first_difat, num_difat) = struct.unpack_from("<IIIIIIII", head, 44)
+
+        # DIFAT -> FAT sector list
+        fat_sectors = [s for s in struct.unpack_from("<109I", head, 76) if s < _MAX_REGSECT]
+        sect = first_difat
+        per = self.sector_size // 4 - 1
+        seen = 0
+        while sect < _MAX_REGSECT and seen < num_difat:
+            vals = struct.unpack(f"<{per + 1}I", self._read(self._offset(sect), self.sector_size))
+            fat_sectors.extend(s for s in vals[:per] if s < _MAX_REGSECT)
+            sect = vals[per]
+            seen += 1
+        fat_sectors = fat_sectors[:num_fat]
+
+        per_sector = self.sector_size // 4
+        fat = []
+        for s in fat_sectors:
+            fat.extend(struct.unpack(f"<{per_sector}I", self._read(self._offset(s), self.sector_size)))
+        self._fat = fat
+
+        # Directory entries
+        dir_bytes = self._chain_stream(first_dir, None).read_all()
+        self.entries = []
+        for i in range(len(dir_bytes) // 128):
+            raw = dir_bytes[i * 128:(i + 1) * 128]
+            name_len = struct.unpack_from("<H", raw, 64)[0]
+            name = raw[:max(0, name_len - 2)].decode("utf-16-le", "replace")
+            start = struct.unpack_from("<I", raw, 116)[0]
+            size = struct.unpack_from("<Q", raw, 120)[0]
+            if self.sector_size == 512:
+                size &= 0xFFFFFFFF
+            self.entries.append({"name": name, "type": raw[66], "start": start, "size": size})
+
+        # Mini stream (small streams live inside the root entry's chain)
+        root = self.entries[0] if self.entries else {"start": _ENDOFCHAIN, "size": 0}
+        self._mini_stream = self._chain_stream(root["start"], root["size"])
+        minifat_bytes = self._chain_stream(first_minifat, None).read_all() if num_minifat else b""
+        self._minifat = list(struct.unpack(f"<{len(minifat_bytes) // 4}I", minifat_bytes))
+
+    def _offset(self, sector):
+        return (sector + 1) * self.sector_size
+
+    def _walk(self, table, start):
+        out = []
+        sect = start
+        limit = len(table) + 1
+        while sect < _MAX_REGSECT and len(out) < limit:
+            out.append(sect)
+            sect = table[sect] if sect < len(table) else _ENDOFCHAIN
+        return out
+
+    def _chain_stream(self, start, size):
+        sectors = [self._offset(s) for s in self._walk(self._fat, start)]
+        if size is None:
+            size = len(sectors) * self.sector_size
+        return _Stream(self._read, sectors, self.sector_size, size)
+
+    def stream_names(self):
+        """
+        Top-level stream names (.max keeps all its streams in the root storage).
+        """
+        return [e["name"] for e in self.entries if e["type"] == 2]
+
+    def open_stream(self, name):
+        for e in self.entries:
+            if e["type"] == 2 and e["name"] == name:
+                if e["size"] < self.mini_cutoff:
+                    ms = self.mini_sector_size
+                    sectors = [s * ms for s in self._walk(self._minifat, e["start"])]
+                    return _Stream(self._mini_stream.read, sectors, ms, e["size"])
+                return self._chain_stream(e["start"], e["size"])
+        raise KeyError(name)
+
+    def read_stream(self, name):
+        return self.open_stream(name).read_all()
+
+
+def read_property_set(data):
+    """
+    Parse an OLE property set stream (SummaryInformation / DocumentSummaryInformation).
+    Returns list of sections, each {propid: value}. Code page 65001/1200 aware.
+    """
+    if len(data) < 28 or struct.unpack_from("<H", data, 0)[0] != 0xFFFE:
+        raise ValueError("not a property set stream")
+
+    num_sets = struct.unpack_from("<I", data, 24)[0]
+    sections = []
+    for i in range(num_sets):
+        offset = struct.unpack_from("<I", data, 28 + i * 20 + 16)[0]
+        sections.append(_read_section(data, offset))
+    return sections
+
+
+def _read_section(data, base):
+    _, count = struct.unpack_from("<II", data, base)
+    ids = [struct.unpack_from("<II", data, base + 8 + i * 8) for i in range(count)]
+
+    codepage = 1252
+    for pid, off in ids:
+        if pid == 1:
+            codepage = struct.unpack_from("<h", data, base + off + 4)[0] & 0xFFFF
+
+    props = {}
+    for pid, off in ids:
+        if pid == 0:
+            continue  # dictionary (user-defined names), not needed here
+        try:
+            props[pid] = _read_value(data, base + off, codepage)[0]
+        except (struct.error, ValueError):
+            props[pid] = None
+    return props
+
+
+def _decode(raw, codepage):
+    raw = raw.split(b"\x00", 1)[0]
+    if codepage == 65001:
+        return raw.decode("utf-8", "replace")
+    try:
+        return raw.decode(f"cp{codepage}", "replace")
+    except LookupError:
+        return raw.decode("latin-1", "replace")
+
+
+def _read_value(data, pos, codepage):
+    """
+    Returns (value, end_pos) for the typed value at pos.
+    """
+    vt = struct.unpack_from("<I", data, pos)[0] & 0xFFFF
+    pos += 4
+
+    if vt & _VT_VECTOR:
+        count = struct.unpack_from("<I", data, pos)[0]
+        pos += 4
+        out = []
+        for _ in range(count):
+            if vt & 0xFFF == _VT_VARIANT:
+                v, pos = _read_value(data, pos, codepage)
+            else:
+                v, pos = _read_scalar(data, pos, vt & 0xFFF, codepage)
+            out.append(v)
+        return out, pos
+
+    return _read_scalar(data, pos, vt, codepage)
+
+
+def _read_scalar(data, pos, vt, codepage):
+    if vt == _VT_I2:
+        return struct.unpack_from("<h", data, pos)[0], pos + 4
+    if vt in (_VT_I4, _VT_UI4):
+        return struct.unpack_from("<i" if vt == _VT_I4 else "<I", data, pos)[0], pos + 4
+    if vt == _VT_BOOL:
+        return struct.unpack_from("<h", data, pos)[0] != 0, pos + 4
+    if vt == _VT_FILETIME:
+        return struct.unpack_from("<Q", data, pos)[0], pos + 8
+    if vt == _VT_LPSTR:
+        n = struct.unpack_from("<I", data, pos)[0]
+        raw = data[pos + 4:pos + 4 + n]
+        text = raw.decode("utf-16-le", "replace").split("\x00", 1)[0] if codepage == 1200 else _decode(raw, codepage)
+        return text, pos + 4 + ((n + 3) & ~3)
+    if vt == _VT_LPWSTR:
+        n = struct.unpack_from("<I", data, pos)[0]
+        raw = data[pos + 4:pos + 4 + n * 2]
+        return raw.decode("utf-16-le", "replace").split("\x00", 1)[0], pos + 4 + ((n * 2 + 3) & ~3)
+    raise ValueError(f"unsupported property type {vt}")
+
+
+# ---------------------------
+# .max specific
+# ---------------------------
+# Superclass IDs (ClassDirectory3 entries)
+_SUPERCLASS_MATERIAL = 0xC00
+_SUPERCLASS_TEXMAP = 0xC10
+_SUPERCLASS_LAYER = 0x10F0
+
+_SCENE_TOTAL_KEYS = {
+    "Objects": "objects", "Shapes": "shapes", "Lights": "lights", "Cameras": "cameras",
+    "Helpers": "helpers", "Space Warps": "space_warps", "Total": "total",
+}
+
+
+def read_max_file_info(path, check_assets=True):
+    """
+    Offline triage of a .max file without 3ds Max.
+
+    Returns dict:
+      path, size, max_version, saved_as_version, build, compressed,
+      vertices, faces, objects {objects, shapes, lights, cameras, helpers, space_warps, total},
+      materials, maps, layers (None when the scene stream is compressed),
+      external_files [{"type","path","exists"}], missing_files [path], plugins [dll]
+    Raises ValueError for files that are not .max containers.
+    """
+    info = {
+        "path": path,
+        "size": os.path.getsize(path),
+        "max_version": None,
+        "saved_as_version": None,
+        "build": None,
+        "compressed": False,
+        "vertices": None,
+        "faces": None,
+        "objects": {},
+        "materials": None,
+        "maps": None,
+        "layers": None,
+        "external_files": [],
+        "missing_files": [],
+        "plugins": [],
+    }
+
+    with CompoundFile(path) as cf:
+        names = set(cf.stream_names())
+
+        if "\x05DocumentSummaryInformation" in names:
+            _apply_doc_summary(info, cf.read_stream("\x05DocumentSummaryInformation"))
+
+        for stream in ("FileAssetMetaData3", "FileAssetMetaData2"):
+            if stream in names:
+                info["external_files"] = _parse_asset_metadata(cf.read_stream(stream))
+                break
+
+        if not info["compressed"] and "ClassDirectory3" in names and "Scene" in names:
+            superclasses = _read_class_superclasses(cf.read_stream("ClassDirectory3"))
+            counts = _count_scene_superclasses(cf.open_stream("Scene"), superclasses)
+            info["materials"] = counts.get(_SUPERCLASS_MATERIAL, 0)
+            info["maps"] = counts.get(_SUPERCLASS_TEXMAP, 0)
+            info["layers"] = counts.get(_SUPERCLASS_LAYER, 0)
+
+    if check_assets:
+        base_dir = os.path.dirname(os.path.abspath(path))
+        for asset in info["external_files"]:
+            asset["exists"] = _asset_exists(asset["path"], base_dir)
+        info["missing_files"] = [a["path"] for a in info["external_files"] if not a["exists"]]
+
+    return info
+
+
+def _apply_doc_summary(info, data):
+    try:
+        props = read_property_set(data)[0]
+    except (ValueError, struct.error, IndexError):
+        return
+
+    headings = props.get(12) or []
+    parts = props.get(13) or []
+
+    # HeadingPairs: [name, count, name, count, ...] slicing TitlesOfParts
+    pos = 0
+    for i in range(0, len(headings) - 1, 2):
+        heading, count = headings[i], headings[i + 1]
+        if not isinstance(count, int):
+            break
+        items = parts[pos:pos + count]
+        pos += count
+
+        if heading == "General":
+            for item in items:
+                key, _, value = str(item).partition(":")
+                value = value.strip()
+                if key == "3ds Max Version":
+                    info["max_version"] = _to_float(value)
+                elif key == "Saved As Version":
+                    info["saved_as_version"] = _to_float(value)
+                elif key == "Build":
+                    info["build"] = value
+                elif key.strip().lower() == "compressed":
+                    info["compressed"] = True
+        elif heading == "Mesh Totals":
+            for item in items:
+                key, _, value = str(item).partition(":")
+                if key == "Vertices":
+                    info["vertices"] = _to_int(value)
+                elif key == "Faces":
+                    info["faces"] = _to_int(value)
+        elif heading == "Scene Totals":
+            for item in items:
+                key, _, value = str(item).partition(":")
+                if key in _SCENE_TOTAL_KEYS:
+                    info["objects"][_SCENE_TOTAL_KEYS[key]] = _to_int(value)
+        elif heading == "External Dependencies" and not info["external_files"]:
+            # Basenames only; FileAssetMetaData has the full paths when present
+            info["external_files"] = [{"type": "Unknown", "path": str(p)} for p in items]
+        elif heading == "Used Plug-Ins":
+            info["plugins"] = [str(p) for p in items]
+
+
+def _parse_asset_metadata(data):
+    """
+    FileAssetMetaData2/3: repeated <GUID, u32 len, type utf16, u32 len, path utf16>.
+    Strings may carry a trailing UTF-16 NUL.
+    """
+    out = []
+    pos = 0
+    size = len(data)
+    while pos + 24 <= size:
+        pos += 16  # asset GUID
+        asset_type, pos = _read_utf16(data, pos)
+        if asset_type is None:
+            break
+        asset_path, pos = _read_utf16(data, pos)
+        if asset_path is None:
+            break
+        if asset_path:
+            out.append({"type": asset_type, "path": asset_path})
+    return out
+
+
+def _read_utf16(data, pos):
+    if pos + 4 > len(data):
+        return None, pos
+    n = struct.unpack_from("<I", data, pos)[0]
+    pos += 4
+    if n > 32768 or pos + n * 2 > len(data):
+        return None, pos
+    text = data[pos:pos + n * 2].decode("utf-16-le", "replace").rstrip("\x00")
+    pos += n * 2
+    if data[pos:pos + 2] == b"\x00\x00":
+        pos += 2
+    return text, pos
+
+
+def _chunk_headers(read, start, end):
+    """
+    Yield (chunk_id, is_container, data_start, data_end) for the .max chunk format.
+    Only headers are read (6 bytes, or 14 for 64-bit sizes).
+    """
+    pos = start
+    while pos + 6 <= end:
+        cid, size = struct.unpack("<HI", read(pos, 6))
+        header = 6
+        if size == 0:
+            size = struct.unpack("<Q", read(pos + 6, 8))[0]
+            header = 14
+            container = bool(size & (1 << 63))
+            size &= (1 << 63) - 1
+        else:
+            container = bool(size & 0x80000000)
+            size &= 0x7FFFFFFF
+        if size < header:
+            return
+        yield cid, container, pos + header, pos + size
+        pos += size
+
+
+def _read_class_superclasses(data):
+    """
+    ClassDirectory3 -> list of superclass IDs indexed like the Scene chunk ids.
+    """
+    read = lambda p, n: data[p:p + n]
+    out = []
+    for _, _, start, end in _chunk_headers(read, 0, len(data)):
+        sc = None
+        for cid, _, s, e in _chunk_headers(read, start, end):
+            if cid == 0x2060 and e - s >= 16:
+                sc = struct.unpack_from("<iIII", data, s)[3]
+        out.append(sc)
+    return out
+
+
+def _count_scene_superclasses(stream, superclasses):
+    counts = {}
+    for _, _, start, end in _chunk_headers(stream.read, 0, stream.size):
+        for cid, _, _, _ in _chunk_headers(stream.read, start, end):
+            if cid < len(superclasses):
+                sc = superclasses[cid]
+                counts[sc] = counts.get(sc, 0) + 1
+        break  # single top-level scene container
+    return counts
+
+
+def _asset_exists(path, base_dir):
+    if os.path.isfile(path):
+        return True
+    # Max also resolves assets next to the scene file
+    return os.path.isfile(os.path.join(base_dir, os.path.basename(path.replace("\\", "/"))))
+
+
+def _to_float(s):
+    try:
+        return float(str(s).strip())
+    except ValueError:
+        return None
+
+
+def _to_int(s):
+    try:
+        return int(str(s).strip())
+    except ValueError:
+        return None
+
+
+def triage_max_files(paths, workers=8):
+    """
+    Read info for many .max files concurrently (I/O bound, header/directory reads only).
+    Returns {path: info} with {"path", "error"} entries for unreadable files.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def _one(p):
+        try:
+            return p, read_max_file_info(p)
+        except Exception as e:
+            return p, {"path": p, "error": str(e) or type(e).__name__}
+
+    with ThreadPoolExecutor(max_workers=max(1, int(workers or 1))) as pool:
+        return dict(pool.map(_one, paths))
@@ -0,0 +1,231 @@
+import os
+import struct
+import hashlib
+import tempfile
+
+import pymxs
+rt = pymxs.runtime
+
+from core import tracing
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional inside Max
+    np = None
+
+
+# Max Face = 3 vertex indices + smoothing group + flags (DWORDs), vertex = Point3
+_BYTES_PER_VERT = 12
+_BYTES_PER_FACE = 20
+
+_HEADER = struct.Struct("<4I")  # handle, instance key, numverts, numfaces
+
+
+def scan_duplicate_meshes(options):
+    """
+    Detect geometry that was copied instead of instanced.
+
+    Mesh data is exported in bulk by MAXScript into a temporary binary file,
+    streamed back one mesh at a time, normalized in object space and hashed
+    with NumPy (no per-vertex Python loops). Nodes that already share a base
+    object (instances) count as one copy.
+
+    Vertices are snapped to a grid of `tolerance` cells: copies whose float
+    noise straddles a cell boundary hash differently and are not reported.
+    The scan can miss near-identical copies, it never groups meshes that
+    differ by more than the tolerance.
+
+    options keys:
+      - duplicate_mesh_tolerance (vertex quantization step in scene units, default 0.001)
+    """
+    if np is None:
+        return [_info("Geometry", "NumPy not available; duplicate mesh scan skipped")]
+
+    tolerance = float(options.get("duplicate_mesh_tolerance", 0.001) or 0.001)
+
+    fd, path = tempfile.mkstemp(prefix="msc_meshes_", suffix=".bin")
+    os.close(fd)
+    try:
+        names = _export_meshes(path)
+        with open(path, "rb") as f:
+            groups = group_duplicate_meshes(f, tolerance)
+    except Exception as e:
+        return [_warning("Geometry", f"Mesh export failed: {e}")]
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    return _build_results(groups, names)
+
+
+def group_duplicate_meshes(f, tolerance=0.001):
+    """
+    Read the packed mesh export from binary file `f` and group records by
+    geometry hash. Each record is read and hashed on its own (its size comes
+    from the header counts), so only one mesh is held in memory at a time.
+    Returns list[dict] with keys: indices, instance_keys, verts, faces, bytes.
+    Only groups with more than one distinct base object are returned.
+    """
+    by_hash = {}
+    index = 0
+
+    while True:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            break
+        _, key, nv, nf = _HEADER.unpack(header)
+
+        vert_bytes = f.read(nv * 12)
+        face_bytes = f.read(nf * 12)
+        if len(vert_bytes) < nv * 12 or len(face_bytes) < nf * 12:
+            break  # cut-off last record
+        verts = np.frombuffer(vert_bytes, dtype="<f4").reshape(-1, 3)
+        faces = np.frombuffer(face_bytes, dtype="<i4")
+
+        digest = _hash_mesh(verts, faces, tolerance)
+        entry = by_hash.get(digest)
+        if entry is None:
+            entry = by_hash[digest] = {
+                "indices": [],
+                "instance_keys": set(),
+                "verts": nv,
+                "faces": nf,
+                "bytes": nv * _BYTES_PER_VERT + nf * _BYTES_PER_FACE,
+            }
+        entry["indices"].append(index)
+        entry["instance_keys"].add(key)
+        index += 1
+
+    return [g for g in by_hash.values() if len(g["instance_keys"]) > 1]
+
+
+def _hash_mesh(verts, faces, tolerance):
+    # Center on the bounding box so pivot placement does not change the hash,
+    # then snap to the tolerance grid so float noise hashes identically.
+    if len(verts):
+        center = (verts.min(axis=0) + verts.max(axis=0)) * 0.5
+        quantized = np.rint((verts - center) / tolerance).astype("<i8")
+    else:
+        quantized = np.empty((0, 3), dtype="<i8")
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(struct.pack("<2I", len(verts), len(faces) // 3))
+    h.update(quantized.tobytes())
+    h.update(np.ascontiguousarray(faces, dtype="<i4").tobytes())
+    return h.digest()
+
+
+def _export_meshes(path):
+    """
+    Write every geometry node's object-space mesh to `path` in one MAXScript pass.
+    node.mesh is already in object space, so vertices are written as they are
+    (no per-vertex transform); MAXScript has no bulk binary write, so the
+    remaining loops only copy values to the file.
+    Record layout: <handle, instanceKey, numVerts, numFaces> uint32, float32 xyz * numVerts,
+    int32 (0-based) face indices * numFaces * 3. Returns node names in record order.
+    """
+    ms = r"""
+    (
+        local out = #()
+        local f = fopen @"%PATH%" "wb"
+
+        for n in geometry do
+        (
+            if isValidNode n and (canConvertTo n TriMeshGeometry) do
+            (
+                local m = undefined
+                try(m = n.mesh)catch(m = undefined)
+
+                if m != undefined do
+                (
+                    local nv = m.numverts
+                    local nf = m.numfaces
+
+                    -- Instances share a key (lowest handle) so they are not counted as copies
+                    local key = n.inode.handle
+                    local inst = #()
+                    try
+                    (
+                        InstanceMgr.GetInstances n &inst
+                        for i in inst do if i.inode.handle < key do key = i.inode.handle
+                    )
+                    catch()
+
+                    WriteLong f n.inode.handle #unsigned
+                    WriteLong f key #unsigned
+                    WriteLong f nv #unsigned
+                    WriteLong f nf #unsigned
+
+                    for v = 1 to nv do
+                    (
+                        local p = getVert m v
+                        WriteFloat f p.x
+                        WriteFloat f p.y
+                        WriteFloat f p.z
+                    )
+
+                    for i = 1 to nf do
+                    (
+                        local fc = getFace m i
+                        WriteLong f ((fc.x as integer) - 1) #signed
+                        WriteLong f ((fc.y as integer) - 1) #signed
+                        WriteLong f ((fc.z as integer) - 1) #signed
+                    )
+
+                    try(delete m)catch()
+                    append out n.name
+                )
+            )
+        )
+
+        fclose f
+        out
+    )
+    """.replace("%PATH%", path)
+
+    with tracing.span("ms.export_meshes", "maxscript"):
+        return [str(n) for n in list(rt.execute(ms))]
+
+
+def _build_results(groups, names):
+    out = []
+    if not groups:
+        out.append(_info("Geometry", "No duplicate (non-instanced) meshes detected."))
+        return out
+
+    # Biggest savings first
+    groups.sort(key=lambda g: g["bytes"] * (len(g["instance_keys"]) - 1), reverse=True)
+
+    total_saved = 0
+    for g in groups:
+        copies = len(g["instance_keys"])
+        saved = g["bytes"] * (copies - 1)
+        total_saved += saved
+
+        members = [names[i] if i < len(names) else f"#{i}" for i in g["indices"]]
+        preview = ", ".join(members[:5])
+        if len(members) > 5:
+            preview += f", ... (+{len(members) - 5})"
+
+        out.append(_warning(
+            members[0],
+            f"Duplicate geometry: {copies} copies not instanced "
+            f"({g['verts']} verts, {g['faces']} faces) - instancing saves ~{_mb(saved)} [{preview}]",
+        ))
+
+    out.append(_info("Geometry", f"Duplicate mesh groups: {len(groups)} (estimated savings ~{_mb(total_saved)})"))
+    return out
+
+
+def _mb(n):
+    return f"{n / (1024.0 * 1024.0):.2f} MB"
+
+
+def _info(node, message):
+    return {"level": "INFO", "node": node, "message": message}
+
+
+def _warning(node, message):
+    return {"level": "WARNING", "node": node, "message": message}
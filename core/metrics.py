@@ -0,0 +1,220 @@
+"""
+OpenMetrics text export for farm monitoring (node-exporter textfile collector).
+
+Nothing is served over the network: the metrics file is the interface. It is
+rewritten atomically (tmp file + rename) after every update, so a scraper never
+reads a half-written file.
+
+    metrics = open_metrics(options, "batch")     # None when not configured
+    record_results(metrics, [result, ...])       # batch_runner results
+    record_operation(metrics, "scan", seconds, results)
+
+options keys:
+  - metrics_path (default $MAX_SCENE_CLEANER_METRICS): .prom file, or a folder
+    that gets max_scene_cleaner_<job>.prom (one file per job, so the batch and
+    the interactive tool don't overwrite each other)
+"""
+import os
+import time
+
+from core.results import Issue, SAMPLE_ESTIMATE, TRUNCATED
+
+METRICS_ENV = "MAX_SCENE_CLEANER_METRICS"
+PREFIX = "max_scene_cleaner_"
+
+# Seconds; load/save of heavy scenes runs into minutes
+DURATION_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+# name -> (type, help)
+METRICS = {
+    "files": ("counter", "Batch files finished, by status"),
+    "phase_seconds": ("histogram", "Per-file time spent in each batch phase"),
+    "issues": ("counter", "Scan issues found, by level"),
+    "issues_by_rule": ("counter", "Scan issues found, by rule"),
+    "actions": ("counter", "Cleanup actions, by level"),
+    "read_bytes": ("counter", "Scene bytes read"),
+    "written_bytes": ("counter", "Scene bytes written (saved, copied or uploaded)"),
+    "operations": ("counter", "Interactive operations run"),
+    "operation_seconds": ("histogram", "Interactive operation duration"),
+    "last_update_timestamp_seconds": ("gauge", "Unix time of the last update"),
+}
+
+
+class MetricsFile:
+    """
+    Counters, gauges and histograms kept in memory and written as one
+    OpenMetrics text file. Every sample carries the label source=<job>
+    ("job" itself is set by the scraper).
+    """
+
+    def __init__(self, path, job="batch"):
+        self.path = path
+        self.job = job
+        self._values = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts, sum, count]
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        self._values[(name, _labels(labels))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, _labels(labels))
+        h = self._histograms.get(key)
+        if h is None:
+            h = self._histograms[key] = [[0] * len(DURATION_BUCKETS), 0.0, 0]
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                h[0][i] += 1
+        h[1] += value
+        h[2] += 1
+
+    def render(self):
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            values = sorted((labels, v) for (n, labels), v in self._values.items() if n == name)
+            hists = sorted((labels, h) for (n, labels), h in self._histograms.items() if n == name)
+            if not values and not hists:
+                continue
+            full = PREFIX + name
+            lines.append(f"# TYPE {full} {kind}")
+            lines.append(f"# HELP {full} {help_text}")
+            suffix = "_total" if kind == "counter" else ""
+            for labels, v in values:
+                lines.append(f"{full}{suffix}{self._fmt_labels(labels)} {_num(v)}")
+            for labels, (buckets, total, count) in hists:
+                for bound, n in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f"{full}_bucket{self._fmt_labels(labels + (('le', _num(bound)),))} {n}")
+                lines.append(f"{full}_bucket{self._fmt_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{full}_sum{self._fmt_labels(labels)} {_num(total)}")
+                lines.append(f"{full}_count{self._fmt_labels(labels)} {count}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        self.set("last_update_timestamp_seconds", round(time.time(), 3))
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+            f.write(self.render())
+        os.replace(tmp, self.path)
+        return self.path
+
+    def _fmt_labels(self, labels):
+        pairs = (("source", self.job),) + labels
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+# One MetricsFile per path, so interactive counters keep growing for the session
+_OPEN = {}
+
+
+def open_metrics(options, job):
+    """
+    MetricsFile for option metrics_path / $MAX_SCENE_CLEANER_METRICS, or None.
+    """
+    path = (options or {}).get("metrics_path") or os.environ.get(METRICS_ENV)
+    if not path:
+        return None
+    if os.path.isdir(path) or path.endswith(("/", "\\")):
+        path = os.path.join(path, f"max_scene_cleaner_{job}.prom")
+    path = os.path.abspath(path)
+    if path not in _OPEN:
+        _OPEN[path] = MetricsFile(path, job)
+    return _OPEN[path]
+
+
+def record_results(metrics, results):
+    """
+    Book finished batch results (run_on_file / scan_file / skipped records)
+    and rewrite the file. No-op when metrics is None.
+    """
+    if metrics is None:
+        return
+    for r in results:
+        metrics.inc("files", status=r.get("status") or "unknown")
+        for phase, seconds in (r.get("phases") or {}).items():
+            metrics.observe("phase_seconds", seconds, phase=phase)
+        for u in r.get("upload") or []:
+            metrics.observe("phase_seconds", u.get("seconds", 0.0), phase="upload")
+        metrics.inc("read_bytes", r.get("read_bytes", 0))
+        metrics.inc("written_bytes", r.get("written_bytes", 0))
+
+        summary = r.get("summary") or {}
+        if "warnings" in summary:
+            metrics.inc("issues", summary["warnings"], level="WARNING")
+            metrics.inc("issues", summary.get("infos", 0), level="INFO")
+        for rule, n in (summary.get("rules") or {}).items():
+            metrics.inc("issues_by_rule", n, rule=rule)
+        for a in r.get("actions") or []:
+            metrics.inc("actions", level=a.get("level") or "INFO")
+    _write(metrics)
+
+
+def record_operation(metrics, operation, seconds, results=(), kind="issues"):
+    """
+    Book an interactive scan / clean. kind: "issues" (scan results) or "actions".
+    """
+    if metrics is None:
+        return
+    metrics.inc("operations", operation=operation)
+    metrics.observe("operation_seconds", seconds, operation=operation)
+    for level, n in count_by_level(results).items():
+        metrics.inc(kind, n, level=level)
+    if kind == "issues":
+        for rule, n in count_by_rule(results).items():
+            metrics.inc("issues_by_rule", n, rule=rule)
+    _write(metrics)
+
+
+def count_by_level(results):
+    counts = {}
+    for r in results:
+        if isinstance(r, Issue) and r.code in (TRUNCATED, SAMPLE_ESTIMATE):
+            continue
+        level = r.get("level") or "INFO"
+        counts[level] = counts.get(level, 0) + 1
+    return counts
+
+
+def count_by_rule(results):
+    """
+    {rule: count}; full counts for capped rules (ScanResults.stats), classic
+    dict results under "other".
+    """
+    counts = {}
+    for r in results:
+        if isinstance(r, Issue):
+            if r.code in (TRUNCATED, SAMPLE_ESTIMATE):
+                continue
+            rule = r.rule
+        else:
+            rule = r.get("rule") or "other"
+        counts[rule] = counts.get(rule, 0) + 1
+    for rule, s in (getattr(results, "stats", None) or {}).items():
+        counts[rule] = s["count"]
+    return counts
+
+
+def _write(metrics):
+    try:
+        metrics.write()
+    except OSError as e:
+        print(f"[metrics] Could not write {metrics.path}: {e}")
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _num(v):
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v)) if abs(v) < 1e15 else repr(v)
+    return str(v)
@@ -0,0 +1,240 @@
+import re
+
+import pymxs
+rt = pymxs.runtime
+
+from core import tracing
+from core.config import load_config, config_path
+from core.results import IssueCollector, Level, register_rule
+
+
+INVALID_CHARS = register_rule(200, "invalid_chars", "Name contains {0}")
+TOO_LONG = register_rule(201, "too_long", "Name longer than {0} characters ({1})")
+PREFIX_WRONG = register_rule(202, "prefix_wrong", "Prefix '{0}' used on {1} (expected '{2}')")
+PREFIX_MISSING = register_rule(203, "prefix_missing", "Missing prefix '{0}' for {1}")
+SUFFIX_MISMATCH = register_rule(204, "suffix_mismatch", "Numeric suffix '{0}' does not match naming convention")
+SUFFIX_MISSING = register_rule(205, "suffix_missing", "Missing numeric suffix")
+UPPERCASE = register_rule(206, "uppercase", "Name contains uppercase (studio pipelines often prefer lowercase)")
+DUPLICATE = register_rule(210, "duplicate", "Duplicate name ({0} nodes)")
+DUPLICATE_CASE = register_rule(211, "duplicate_case", "Names differ only by case: {0}")
+DUPLICATE_SUFFIX = register_rule(212, "duplicate_suffix", "Names differ only by numeric suffix ({0}): {1}")
+
+
+DEFAULT_RULES = {
+    # Regex character-class body of allowed characters (spaces are not allowed)
+    "allowed_chars": "A-Za-z0-9_.\\-",
+    "max_length": 64,
+    # Expected prefix per superclass (lower-case MAXScript superclass name)
+    "prefix_by_class": {},
+    "require_prefix": False,
+    # Numeric suffix convention; trailing digits that don't match it are flagged
+    "suffix_pattern": "_\\d{3}",
+    "require_suffix": False,
+    "prefer_lowercase": True,
+    "levels": {
+        "invalid_chars": "WARNING",
+        "too_long": "WARNING",
+        "prefix": "WARNING",
+        "suffix": "INFO",
+        "uppercase": "INFO",
+        "duplicate": "WARNING",
+        "duplicate_case": "WARNING",
+        "duplicate_suffix": "WARNING",
+    },
+}
+
+_TRAILING_NUMBER = re.compile(r"[ _.\-]*\d+$")
+
+_compiled = {}  # path -> (rules dict, NamingRules)
+
+
+class NamingRules:
+    """
+    Naming conventions compiled into one regex.
+
+    A single match per name yields every check through named groups:
+      bad    - first character outside the allowed set
+      upper  - first uppercase character
+      long   - present when the name exceeds max_length
+      prefix - leading known prefix (any class)
+      suffix - trailing suffix matching the convention
+      digits - trailing digits that did not match the convention
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.levels = dict(DEFAULT_RULES["levels"])
+        self.levels.update(rules.get("levels") or {})
+
+        self.prefix_by_class = {str(k).lower(): v for k, v in (rules.get("prefix_by_class") or {}).items()}
+        self.require_prefix = bool(rules.get("require_prefix", False))
+        self.require_suffix = bool(rules.get("require_suffix", False))
+        self.prefer_lowercase = bool(rules.get("prefer_lowercase", True))
+        self.max_length = int(rules.get("max_length", 0) or 0)
+
+        allowed = rules.get("allowed_chars") or DEFAULT_RULES["allowed_chars"]
+        self.has_suffix = bool(rules.get("suffix_pattern"))
+        suffix = rules.get("suffix_pattern") or r"(?!)"
+
+        # Longest first so "geo_hi_" wins over "geo_"
+        prefixes = sorted(set(p for p in self.prefix_by_class.values() if p), key=len, reverse=True)
+        prefix_alt = "|".join(re.escape(p) for p in prefixes) or r"(?!)"
+
+        long_check = r"(?=(?P<long>.{%d})?)" % (self.max_length + 1) if self.max_length > 0 else r"(?P<long>(?!))?"
+
+        self.pattern = re.compile(
+            r"^(?=(?:.*?(?P<bad>[^%s]))?)" % allowed
+            + r"(?=(?:.*?(?P<upper>[A-Z]))?)"
+            + long_check
+            + r"(?P<prefix>%s)?(?P<stem>.*?)(?P<suffix>%s)?(?P<digits>\d*)$" % (prefix_alt, suffix),
+            re.DOTALL,
+        )
+
+    def check(self, name, superclass):
+        """
+        Returns list[(rule, code, args)] for one name; the message is
+        core.results.RULES[code] formatted with args.
+        """
+        m = self.pattern.match(name)
+        if m is None:
+            return []
+
+        out = []
+        bad = m.group("bad")
+        if bad is not None:
+            what = "spaces" if bad == " " or " " in name else f"invalid character {bad!r}"
+            out.append(("invalid_chars", INVALID_CHARS, (what,)))
+
+        if m.group("long") is not None:
+            out.append(("too_long", TOO_LONG, (self.max_length, len(name))))
+
+        expected = self.prefix_by_class.get(superclass)
+        prefix = m.group("prefix")
+        if prefix and expected and prefix != expected:
+            out.append(("prefix", PREFIX_WRONG, (prefix, superclass, expected)))
+        elif not prefix and expected and self.require_prefix:
+            out.append(("prefix", PREFIX_MISSING, (expected, superclass)))
+
+        if self.has_suffix and m.group("digits"):
+            out.append(("suffix", SUFFIX_MISMATCH, (m.group("digits"),)))
+        elif self.has_suffix and self.require_suffix and not m.group("suffix"):
+            out.append(("suffix", SUFFIX_MISSING, ()))
+
+        if self.prefer_lowercase and m.group("upper") is not None:
+            out.append(("uppercase", UPPERCASE, ()))
+
+        return out
+
+    def level(self, rule):
+        try:
+            return Level[str(self.levels.get(rule, "INFO")).upper()]
+        except KeyError:
+            return Level.INFO
+
+
+def get_naming_rules(path=None):
+    """
+    Load naming rules (config/naming_rules.json unless `path` given) and
+    return the compiled NamingRules. Compiled once per config file version.
+    """
+    path = path or config_path("naming_rules")
+    rules = load_config("naming_rules", DEFAULT_RULES, path=path)
+
+    cached = _compiled.get(path)
+    if cached is not None and cached[0] == rules:
+        return cached[1]
+
+    compiled = NamingRules(rules)
+    _compiled[path] = (rules, compiled)
+    return compiled
+
+
+def scan_naming(options=None, out=None, indices=None):
+    """
+    Evaluate naming conventions for every scene node in a single pass.
+    Names and superclasses are fetched in one MAXScript call.
+
+    out: core.results.IssueCollector to add to (caps / sampling); without it a
+    plain list of Issues is returned.
+    indices: node subset for the per-node checks (sampling); duplicate-name
+    detection always uses every name.
+
+    options keys:
+      - naming_config (path to a naming rules JSON, default config/naming_rules.json)
+    """
+    options = options or {}
+    collector = out if out is not None else IssueCollector(cap=0)
+    try:
+        rules = get_naming_rules(options.get("naming_config"))
+    except re.error as e:
+        collector.extend([_warning("Naming", f"Invalid naming rules config: {e}")])
+        return collector if out is not None else collector.issues
+
+    names, classes = _fetch_names()
+
+    for i in (indices if indices is not None else range(len(names))):
+        if i >= len(names):
+            break
+        for rule, code, args in rules.check(names[i], classes[i]):
+            collector.add(code, rules.level(rule), names[i], args, per_node=True)
+
+    _scan_duplicates(names, rules, collector)
+    return collector if out is not None else collector.issues
+
+
+def _fetch_names():
+    ms = r"""
+    (
+        local names = #()
+        local classes = #()
+        for o in objects do
+        (
+            append names o.name
+            append classes (toLower ((superClassOf o) as string))
+        )
+        #(names, classes)
+    )
+    """
+    try:
+        with tracing.span("ms.fetch_names", "maxscript"):
+            res = rt.execute(ms)
+        return [str(n) for n in res[0]], [str(c) for c in res[1]]
+    except Exception:
+        return [], []
+
+
+def _scan_duplicates(names, rules, out):
+    """
+    Hash indexes over exact, case-folded and suffix-stripped names.
+    """
+    exact = {}
+    folded = {}
+    stripped = {}
+
+    for name in names:
+        exact[name] = exact.get(name, 0) + 1
+        low = name.lower()
+        folded.setdefault(low, set()).add(name)
+        stripped.setdefault(_TRAILING_NUMBER.sub("", low), set()).add(low)
+
+    for name, count in exact.items():
+        if count > 1:
+            out.add(DUPLICATE, rules.level("duplicate"), name, (count,))
+
+    for low, variants in folded.items():
+        if len(variants) > 1:
+            shown = ", ".join(sorted(variants))
+            out.add(DUPLICATE_CASE, rules.level("duplicate_case"), sorted(variants)[0], (shown,))
+
+    for base, variants in stripped.items():
+        if len(variants) > 1:
+            ordered = sorted(variants)
+            shown = ", ".join(ordered[:5])
+            if len(ordered) > 5:
+                shown += f", ... (+{len(ordered) - 5})"
+            out.add(DUPLICATE_SUFFIX, rules.level("duplicate_suffix"), base or ordered[0],
+                    (len(ordered), shown))
+
+
+def _warning(node, message):
+    return {"level": "WARNING", "node": node, "message": message}
@@ -0,0 +1,95 @@
+import re
+
+from core.config import load_config, config_path
+
+
+DEFAULT_REMAP = {
+    # Ordered rules, each applied to the result of the previous ones:
+    #   {"name", "type": "prefix", "from", "to"}   (case-insensitive, / and \ equal)
+    #   {"name", "type": "regex", "pattern", "replace"}   (re.sub, first match)
+    "rules": [],
+    "stat_workers": 16,
+}
+
+_compiled = {}  # path -> (config dict, PathRemapper)
+
+
+class PathRemapper:
+    """
+    Ordered prefix / regex rewrite rules for moved asset paths
+    (drive letter -> UNC, old project root -> new, renamed folders).
+    stat_workers: threads for the existence checks (config "stat_workers").
+    """
+
+    def __init__(self, rules, stat_workers=16):
+        self.stat_workers = max(1, int(stat_workers or 1))
+        self.rules = []
+        for i, rule in enumerate(rules or []):
+            name = rule.get("name") or f"rule {i + 1}"
+            kind = rule.get("type", "prefix")
+            if kind == "prefix" and rule.get("from"):
+                self.rules.append((name, kind, _sep_fold(rule["from"]), rule.get("to", "")))
+            elif kind == "regex" and rule.get("pattern"):
+                flags = 0 if rule.get("case_sensitive") else re.IGNORECASE
+                self.rules.append((name, kind, re.compile(rule["pattern"], flags), rule.get("replace", "")))
+
+    def candidates(self, path):
+        """
+        [(rule_name, new_path)] for every rule that rewrote the path, in order.
+        """
+        out = []
+        current = path
+        for name, kind, match, repl in self.rules:
+            if kind == "prefix":
+                if not _sep_fold(current).startswith(match):
+                    continue
+                new = repl + current[len(match):]
+            else:
+                new, n = match.subn(repl, current, count=1)
+                if not n:
+                    continue
+            if new != current:
+                out.append((name, new))
+                current = new
+        return out
+
+    def resolve(self, paths, stat_cache, workers=16):
+        """
+        Bulk-resolve paths: all candidates are stat'ed once (in parallel) and
+        the first existing one wins.
+        Returns (resolved {path: (new_path, rule_name)}, stats {rule_name: {"matched", "hits"}}).
+        """
+        stats = {name: {"matched": 0, "hits": 0} for name, _, _, _ in self.rules}
+        per_path = {p: self.candidates(p) for p in dict.fromkeys(paths)}
+        stat_cache.prefetch([c for cands in per_path.values() for _, c in cands], workers)
+
+        resolved = {}
+        for p, cands in per_path.items():
+            for name, new in cands:
+                stats[name]["matched"] += 1
+            for name, new in cands:
+                if stat_cache.isfile(new):
+                    resolved[p] = (new, name)
+                    stats[name]["hits"] += 1
+                    break
+        return resolved, stats
+
+
+def get_path_remapper(path=None):
+    """
+    Load config/path_remap.json (or `path`) and return the compiled PathRemapper.
+    """
+    path = path or config_path("path_remap")
+    config = load_config("path_remap", DEFAULT_REMAP, path=path)
+
+    cached = _compiled.get(path)
+    if cached is not None and cached[0] == config:
+        return cached[1]
+
+    compiled = PathRemapper(config.get("rules"), config.get("stat_workers", 16))
+    _compiled[path] = (config, compiled)
+    return compiled
+
+
+def _sep_fold(s):
+    return str(s).replace("/", "\\").lower()
@@ -2,6 +2,9 @@ import os
 import json
 import datetime
 
+from core import tracing
+from core.results import as_dict, count_levels
+
 
 TOOL_NAME = "Max Scene Cleaner"
 TOOL_VERSION = "1.0"
@@ -11,40 +14,52 @@ def now_iso():
     return datetime.datetime.now().isoformat(timespec="seconds")
 
 
-def build_report(options, scan_results, action_results):
+def build_report(options, scan_results, action_results, scan_diff=None):
+    # Issues are rendered to plain dicts only here, at export time
+    # scan_diff: optional core.scan_diff.diff_scans() result (pre/post clean)
+    scan_counts = count_levels(scan_results)
+    action_counts = count_levels(action_results)
     return {
         "tool": {"name": TOOL_NAME, "version": TOOL_VERSION},
         "timestamp": now_iso(),
         "options": options,
-        "scan_results": scan_results,
-        "actions": action_results,
+        "scan_results": [as_dict(r) for r in scan_results],
+        "actions": [as_dict(r) for r in action_results],
+        # Per-rule totals; differ from the listed results when capped or sampled
+        "scan_stats": getattr(scan_results, "stats", {}),
+        "scan_sample": getattr(scan_results, "sample", None),
+        "scan_diff": scan_diff,
         "summary": {
-            "scan_warning_count": sum(1 for r in scan_results if r.get("level") == "WARNING"),
-            "scan_info_count": sum(1 for r in scan_results if r.get("level") == "INFO"),
-            "action_warning_count": sum(1 for r in action_results if r.get("level") == "WARNING"),
-            "action_info_count": sum(1 for r in action_results if r.get("level") == "INFO"),
+            "scan_warning_count": scan_counts.get("WARNING", 0),
+            "scan_info_count": scan_counts.get("INFO", 0),
+            "action_warning_count": action_counts.get("WARNING", 0),
+            "action_info_count": action_counts.get("INFO", 0),
         },
     }
 
 
+def _esc(s):
+    return (
+        str(s)
+        .replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
+    )
+
+
 def save_json(report, path):
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(report, f, indent=2)
+    with tracing.span("report.save_json", "report"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
     return path
 
 
 def save_html(report, path):
     os.makedirs(os.path.dirname(path), exist_ok=True)
 
-    def esc(s):
-        return (
-            str(s)
-            .replace("&", "&amp;")
-            .replace("<", "&lt;")
-            .replace(">", "&gt;")
-            .replace('"', "&quot;")
-        )
+    esc = _esc
 
     scan_rows = "\n".join(
         "<tr><td>{}</td><td>{}</td><td>{}</td></tr>".format(
@@ -60,6 +75,39 @@ def save_html(report, path):
         for r in report.get("actions", [])
     )
 
+    stats = report.get("scan_stats") or {}
+    stat_rows = "\n".join(
+        "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>".format(
+            esc(rule),
+            s["count"],
+            s["shown"],
+            "~{} ({}-{})".format(s["estimate"], s["ci_low"], s["ci_high"]) if s.get("sampled") else "",
+        )
+        for rule, s in sorted(stats.items())
+        if s.get("truncated") or s.get("sampled")
+    )
+    sample = report.get("scan_sample")
+    sample_note = ""
+    if sample:
+        sample_note = "<p class=\"small\">Sampled scan: {} of {} nodes (seed {}). Estimates are 95% intervals.</p>".format(
+            sample["sampled"], sample["nodes"], sample["seed"])
+    stats_html = ""
+    if stat_rows or sample_note:
+        stats_html = """<h2>Truncated / Sampled Rules</h2>
+{}
+<table>
+<thead><tr><th>Rule</th><th>Found</th><th>Listed</th><th>Scene estimate</th></tr></thead>
+<tbody>
+{}
+</tbody>
+</table>
+""".format(sample_note, stat_rows)
+
+    diff_html = ""
+    if report.get("scan_diff"):
+        from core.scan_diff import diff_html_section
+        diff_html = diff_html_section(report["scan_diff"], "Pre / Post Clean")
+
     html = """<!doctype html>
 <html>
 <head>
@@ -93,6 +141,8 @@ code {{ background: #f7f7f7; padding: 2px 6px; border-radius: 4px; }}
 <h2>Options</h2>
 <pre>{options}</pre>
 
+{stats_html}
+{diff_html}
 <h2>Scan Results</h2>
 <table>
 <thead><tr><th>Level</th><th>Node</th><th>Message</th></tr></thead>
@@ -120,11 +170,76 @@ code {{ background: #f7f7f7; padding: 2px 6px; border-radius: 4px; }}
         aw=report["summary"]["action_warning_count"],
         ai=report["summary"]["action_info_count"],
         options=esc(json.dumps(report.get("options", {}), indent=2)),
+        stats_html=stats_html,
+        diff_html=diff_html,
         scan_rows=scan_rows,
         act_rows=act_rows,
     )
 
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(html)
+    with tracing.span("report.save_html", "report"):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+
+    return path
+
+
+def save_batch_html(summaries, path, title="Batch Summary"):
+    """
+    One-table HTML view of a batch summary (batch_summary.json entries).
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    counts = {}
+    for s in summaries:
+        counts[s.get("status")] = counts.get(s.get("status"), 0) + 1
+
+    rows = "\n".join(
+        "<tr class=\"status-{st}\"><td>{src}</td><td>{st}</td><td>{mode}</td><td>{n}</td><td>{err}</td></tr>".format(
+            src=_esc(s.get("src_file")),
+            st=_esc(s.get("status")),
+            mode=_esc(s.get("save_mode") or s.get("mode") or ""),
+            n=len(s.get("actions") or []),
+            err=_esc(s.get("reason") or (s.get("errors") or [""])[0]),
+        )
+        for s in summaries
+    )
+
+    html = """<!doctype html>
+<html>
+<head>
+<meta charset="utf-8"/>
+<title>{title}</title>
+<style>
+body {{ font-family: Arial, sans-serif; margin: 24px; }}
+table {{ border-collapse: collapse; width: 100%; margin: 12px 0 28px; }}
+th, td {{ border: 1px solid #ddd; padding: 8px; font-size: 13px; }}
+th {{ background: #f5f5f5; text-align: left; }}
+.status-failed td {{ color: #b91c1c; }}
+.status-skipped td {{ color: #666; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p>{tool} {version} - {timestamp} - {counts}</p>
+<table>
+<thead><tr><th>File</th><th>Status</th><th>Output</th><th>Actions</th><th>Reason / first error</th></tr></thead>
+<tbody>
+{rows}
+</tbody>
+</table>
+</body>
+</html>
+""".format(
+        title=_esc(title),
+        tool=_esc(TOOL_NAME),
+        version=_esc(TOOL_VERSION),
+        timestamp=_esc(now_iso()),
+        counts=_esc(", ".join(f"{k}: {v}" for k, v in sorted(counts.items(), key=lambda kv: str(kv[0])))),
+        rows=rows,
+    )
+
+    with tracing.span("report.save_html", "report"):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
 
     return path
@@ -0,0 +1,224 @@
+import math
+import random
+from enum import IntEnum
+
+
+class Level(IntEnum):
+    INFO = 0
+    WARNING = 1
+    ERROR = 2
+
+
+# code -> (rule name, message template); templates use str.format on the payload
+RULES = {}
+
+
+def register_rule(code, name, template):
+    existing = RULES.get(code)
+    if existing is not None and existing[0] != name:
+        raise ValueError(f"Rule code {code} already used by {existing[0]}")
+    RULES[code] = (name, template)
+    return code
+
+
+class Issue:
+    """
+    Compact scan result: numeric rule code, Level, node and raw payload.
+    The message is only formatted when read, so large scans store a few
+    pointers per issue instead of a dict plus a formatted string.
+
+    Reads like the classic {"level", "node", "message"} dict (issue["level"],
+    issue.get("message"), dict(issue)), with level as its name ("WARNING").
+    """
+
+    __slots__ = ("code", "level", "node", "args")
+
+    _KEYS = ("level", "node", "message")
+
+    def __init__(self, code, level, node, args=()):
+        self.code = code
+        self.level = level
+        self.node = node
+        self.args = args
+
+    @property
+    def rule(self):
+        return RULES[self.code][0]
+
+    @property
+    def message(self):
+        return RULES[self.code][1].format(*self.args)
+
+    def __getitem__(self, key):
+        if key == "level":
+            return self.level.name
+        if key == "node":
+            return self.node
+        if key == "message":
+            return self.message
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self._KEYS
+
+    def to_dict(self):
+        return {"level": self.level.name, "node": self.node, "message": self.message}
+
+    def __repr__(self):
+        return f"Issue({self.rule}, {self.level.name}, {self.node!r}, {self.args!r})"
+
+
+def as_dict(result):
+    """
+    JSON-ready dict for an Issue or a classic result dict.
+    """
+    return result.to_dict() if isinstance(result, Issue) else result
+
+
+def count_levels(results):
+    """
+    {"WARNING": n, "INFO": n, ...} without formatting any message.
+    """
+    counts = {}
+    for r in results:
+        level = r.level.name if isinstance(r, Issue) else r.get("level")
+        counts[level] = counts.get(level, 0) + 1
+    return counts
+
+
+def wilson_interval(hits, n, z=1.96):
+    """
+    95% (z=1.96) Wilson score interval for a proportion hits/n.
+    """
+    if n <= 0:
+        return 0.0, 1.0
+    p = hits / float(n)
+    denom = 1.0 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4.0 * n * n)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+TRUNCATED = register_rule(1, "truncated", "{0}: {1} issues, first {2} listed (cap reached)")
+SAMPLE_ESTIMATE = register_rule(2, "sample_estimate",
+                                "{0}: ~{1} of {2} nodes (95% CI {3}-{4}; {5} hits in {6} sampled)")
+
+
+class ScanResults(list):
+    """
+    Result list plus .stats {rule: {"count", "shown", "truncated", ...}} and
+    .sample {"nodes", "sampled", "seed"} (None when the full scene was scanned).
+    """
+
+    def __init__(self, items=(), stats=None, sample=None):
+        super().__init__(items)
+        self.stats = stats or {}
+        self.sample = sample
+
+
+# Smallest useful sample; fewer nodes give meaningless intervals
+MIN_SAMPLE = 100
+
+
+class IssueCollector:
+    """
+    Counts every issue per rule but materializes only the first `cap`
+    (per-rule overrides in `caps`, 0 = unlimited).
+
+    With sampling, per-node rules run on `sample_indices` only and finish()
+    adds an estimate with a Wilson confidence interval for the whole scene.
+
+    options keys:
+      - issue_cap_per_rule (default 1000, 0 = no cap)
+      - issue_caps ({rule name: cap})
+      - scan_sample (0 = off; <= 1 fraction of nodes, 1.0 = all; > 1 node count;
+        at least MIN_SAMPLE nodes are sampled)
+      - scan_sample_seed (default random)
+    """
+
+    def __init__(self, cap=1000, caps=None):
+        self.cap = int(cap or 0)
+        self.caps = dict(caps or {})
+        self.issues = []
+        self.counts = {}
+        self.levels = {}
+        self.population = None
+        self.sample_indices = None
+        self.seed = None
+        self._sampled_codes = set()
+
+    @classmethod
+    def from_options(cls, options):
+        return cls(options.get("issue_cap_per_rule", 1000), options.get("issue_caps"))
+
+    def set_sample(self, population, sample, seed=None):
+        """
+        Pick the node subset. Returns sorted indices (all nodes when sample is off).
+        """
+        self.population = population
+        sample = float(sample or 0)
+        size = int(round(population * sample)) if sample <= 1 else int(sample)
+        size = max(size, MIN_SAMPLE)
+        if sample <= 0 or size >= population:
+            self.sample_indices = None
+            return range(population)
+
+        self.seed = seed if seed is not None else random.randrange(1 << 30)
+        self.sample_indices = sorted(random.Random(self.seed).sample(range(population), size))
+        return self.sample_indices
+
+    @property
+    def sampling(self):
+        return self.sample_indices is not None
+
+    def add(self, code, level, node, args=(), per_node=False):
+        count = self.counts.get(code, 0) + 1
+        self.counts[code] = count
+        self.levels[code] = level
+        if per_node and self.sampling:
+            self._sampled_codes.add(code)
+        limit = self.caps.get(RULES[code][0], self.cap)
+        if not limit or count <= limit:
+            self.issues.append(Issue(code, level, node, args))
+
+    def extend(self, results):
+        for r in results:
+            if isinstance(r, Issue):
+                self.add(r.code, r.level, r.node, r.args)
+            else:
+                self.issues.append(r)
+
+    def finish(self):
+        stats = {}
+        tail = []
+        for code, count in self.counts.items():
+            rule = RULES[code][0]
+            limit = self.caps.get(rule, self.cap)
+            shown = min(count, limit) if limit else count
+            entry = {"count": count, "shown": shown, "truncated": shown < count}
+            if entry["truncated"]:
+                tail.append(Issue(TRUNCATED, Level.INFO, "Scan", (rule, count, shown)))
+
+            if code in self._sampled_codes:
+                n = len(self.sample_indices)
+                low, high = wilson_interval(count, n)
+                entry.update({
+                    "sampled": True,
+                    "estimate": int(round(count / float(n) * self.population)),
+                    "ci_low": int(math.floor(low * self.population)),
+                    "ci_high": int(math.ceil(high * self.population)),
+                })
+                tail.append(Issue(SAMPLE_ESTIMATE, self.levels[code], "Scan", (
+                    rule, entry["estimate"], self.population, entry["ci_low"], entry["ci_high"], count, n)))
+            stats[rule] = entry
+
+        sample = None
+        if self.sampling:
+            sample = {"nodes": self.population, "sampled": len(self.sample_indices), "seed": self.seed}
+        return ScanResults(tail + self.issues, stats, sample)
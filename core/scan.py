@@ -1,55 +1,98 @@
 import pymxs
 rt = pymxs.runtime
 
+from core import tracing
+from core.results import IssueCollector, Level, register_rule
 
-def scan_scene(options):
+
+# Per-node rules produce compact Issues; messages are formatted on display/export
+POSITION_NOT_RESET = register_rule(100, "position_not_reset", "Position not reset: ({0:.3f}, {1:.3f}, {2:.3f})")
+ROTATION_NOT_RESET = register_rule(101, "rotation_not_reset", "Rotation not reset: ({0:.2f}, {1:.2f}, {2:.2f})")
+SCALE_NOT_ONE = register_rule(102, "scale_not_one", "Scale not 1: ({0:.3f}, {1:.3f}, {2:.3f})")
+HIGH_MODIFIER_COUNT = register_rule(103, "high_modifier_count", "High modifier stack count: {0} (consider collapsing)")
+HIDDEN_OBJECT = register_rule(110, "hidden_object", "Object is hidden (cleanup option enabled)")
+FROZEN_HELPER = register_rule(111, "frozen_helper", "Frozen helper detected (cleanup option enabled)")
+FROZEN_OBJECT = register_rule(112, "frozen_object", "Frozen object detected (cleanup option enabled)")
+EMPTY_LAYER = register_rule(120, "empty_layer", "Empty layer")
+
+
+def scan_scene(options, on_step=None):
     """
     Day 3: real scene scanning (read-only).
 
+    Steps run cheapest first so early results arrive quickly; on_step(name, results)
+    is called after each step with everything collected so far.
+    Per-rule caps and node sampling: see core.results.IssueCollector. Returns a
+    ScanResults list (.stats per rule, .sample when sampled); truncated counts
+    and sampled estimates are listed first.
+
     options keys:
       - reset_xform (not applied today, but influences severity messaging)
       - collapse_stack (not applied today)
       - delete_hidden (flag hidden objects)
       - delete_frozen_helpers (flag frozen helpers)
       - delete_empty_layers (flag empty layers)
-      - remove_unused_materials (best-effort warning today)
+      - remove_unused_materials (report materials/maps unreachable from nodes)
+      - detect_duplicate_meshes (group copied, non-instanced geometry)
+      - scan_geometry (face/vertex/UV budgets, see core.geometry_stats)
+      - naming_config (naming rules JSON, default config/naming_rules.json)
+      - issue_cap_per_rule (default 1000), issue_caps ({rule: cap})
+      - scan_sample (0 or 1.0 = full scan; fraction <= 1 or node count > 1), scan_sample_seed
     """
-    results = []
+    out = IssueCollector.from_options(options)
 
     objs = list(rt.objects)
     if not objs:
-        return results
+        return out.finish()
+
+    indices = out.set_sample(len(objs), options.get("scan_sample", 0), options.get("scan_sample_seed"))
+    sampled = objs if not out.sampling else [objs[i] for i in indices]
 
-    # 1) Transform issues (pos/rot/scale)
-    results.extend(_scan_transforms(objs))
+    def step(name, fn, *args):
+        with tracing.span(f"scan.{name}", "scan", nodes=len(sampled)):
+            fn(*args)
+        if on_step is not None:
+            on_step(name, out.issues)
 
-    # 2) Hidden objects (only if option enabled)
+    # 1) Hidden objects (only if option enabled) - one property per node
     if options.get("delete_hidden", False):
-        results.extend(_scan_hidden(objs))
+        step("hidden", _scan_hidden, sampled, out)
 
-    # 3) Frozen helpers (only if option enabled)
+    # 2) Frozen helpers (only if option enabled)
     if options.get("delete_frozen_helpers", False):
-        results.extend(_scan_frozen_helpers(objs))
+        step("frozen", _scan_frozen_helpers, sampled, out)
 
-    # 4) Empty layers (only if option enabled)
+    # 3) Empty layers (only if option enabled) - per layer, not per node
     if options.get("delete_empty_layers", False):
-        results.extend(_scan_empty_layers())
+        step("layers", _scan_empty_layers, out)
 
-    # 5) Materials (best-effort today)
+    # 4) Naming conventions + duplicate names (always on) - one bulk fetch
+    step("naming", _scan_naming, options, out, None if not out.sampling else indices)
+
+    # 5) Transform issues (pos/rot/scale) - several property reads per node
+    step("transforms", _scan_transforms, sampled, out)
+
+    # 6) Geometry weight vs budgets - one bulk MAXScript call + NumPy
+    if options.get("scan_geometry", False):
+        from core.geometry_stats import scan_geometry_budget
+        step("geometry", scan_geometry_budget, options, out)
+
+    # 7) Unused materials / maps (reference-graph reachability)
     if options.get("remove_unused_materials", False):
-        results.extend(_scan_materials_best_effort())
+        step("materials", lambda: out.extend(_scan_unused_materials(options)))
 
-    # 6) Light naming checks (always on, small signal)
-    results.extend(_scan_naming(objs))
+    # 8) Duplicate (copied, not instanced) geometry - exports all meshes
+    if options.get("detect_duplicate_meshes", False):
+        from core.mesh_dedup import scan_duplicate_meshes
+        step("meshes", lambda: out.extend(scan_duplicate_meshes(options)))
 
-    return results
+    return out.finish()
 
 
 # ---------------------------
 # Scans
 # ---------------------------
-def _scan_transforms(objs):
-    out = []
+def _scan_transforms(objs, out):
     for o in objs:
         # Skip cameras/lights if you want a cleaner signal (optional)
         cls = rt.classOf(o)
@@ -60,7 +103,7 @@ def _scan_transforms(objs):
         try:
             p = o.position
             if _abs(p.x) > 0.001 or _abs(p.y) > 0.001 or _abs(p.z) > 0.001:
-                out.append(_warning(o.name, f"Position not reset: ({p.x:.3f}, {p.y:.3f}, {p.z:.3f})"))
+                out.add(POSITION_NOT_RESET, Level.WARNING, o.name, (p.x, p.y, p.z), per_node=True)
         except Exception:
             pass
 
@@ -70,7 +113,7 @@ def _scan_transforms(objs):
             # rotation can be a quat; convert to euler angles
             e = rt.eulerAngles(r)
             if _abs(e.x) > 0.01 or _abs(e.y) > 0.01 or _abs(e.z) > 0.01:
-                out.append(_warning(o.name, f"Rotation not reset: ({e.x:.2f}, {e.y:.2f}, {e.z:.2f})"))
+                out.add(ROTATION_NOT_RESET, Level.WARNING, o.name, (e.x, e.y, e.z), per_node=True)
         except Exception:
             pass
 
@@ -79,7 +122,7 @@ def _scan_transforms(objs):
             s = o.scale
             # scale can be Point3
             if _abs(s.x - 1.0) > 0.001 or _abs(s.y - 1.0) > 0.001 or _abs(s.z - 1.0) > 0.001:
-                out.append(_warning(o.name, f"Scale not 1: ({s.x:.3f}, {s.y:.3f}, {s.z:.3f})"))
+                out.add(SCALE_NOT_ONE, Level.WARNING, o.name, (s.x, s.y, s.z), per_node=True)
         except Exception:
             pass
 
@@ -87,42 +130,35 @@ def _scan_transforms(objs):
         try:
             mod_count = o.modifiers.count
             if mod_count > 8:
-                out.append(_info(o.name, f"High modifier stack count: {mod_count} (consider collapsing)"))
+                out.add(HIGH_MODIFIER_COUNT, Level.INFO, o.name, (mod_count,), per_node=True)
         except Exception:
             pass
 
-    return out
-
 
-def _scan_hidden(objs):
-    out = []
+def _scan_hidden(objs, out):
     for o in objs:
         try:
             if o.isHidden:
-                out.append(_info(o.name, "Object is hidden (cleanup option enabled)"))
+                out.add(HIDDEN_OBJECT, Level.INFO, o.name, per_node=True)
         except Exception:
             pass
-    return out
 
 
-def _scan_frozen_helpers(objs):
-    out = []
+def _scan_frozen_helpers(objs, out):
     for o in objs:
         try:
             if o.isFrozen:
                 # Helpers include Point, Dummy, etc. Class check is a bit fuzzy, so use superclass
                 sc = rt.superClassOf(o)
                 if str(sc) == "helper":
-                    out.append(_info(o.name, "Frozen helper detected (cleanup option enabled)"))
+                    out.add(FROZEN_HELPER, Level.INFO, o.name, per_node=True)
                 else:
-                    out.append(_info(o.name, "Frozen object detected (cleanup option enabled)"))
+                    out.add(FROZEN_OBJECT, Level.INFO, o.name, per_node=True)
         except Exception:
             pass
-    return out
 
 
-def _scan_empty_layers():
-    out = []
+def _scan_empty_layers(out):
     try:
         lm = rt.LayerManager
         layer_count = lm.count
@@ -166,40 +202,27 @@ def _scan_empty_layers():
                     node_count = 0  # fail-safe
 
             if int(node_count) == 0:
-                out.append(_info(f"Layer:{layer.name}", "Empty layer"))
+                out.add(EMPTY_LAYER, Level.INFO, f"Layer:{layer.name}")
 
     except Exception:
         pass
 
-    return out
-
-def _scan_materials_best_effort():
-    out = []
+def _scan_unused_materials(options):
+    # Graph is cached per scene, so a following Clean reuses it
+    from core.material_graph import scan_unused_materials
     try:
-        # Scene material library (not perfect for unused detection)
-        scene_mats = rt.sceneMaterials
-        count = scene_mats.count
-        if count > 50:
-            out.append(_warning("Scene", f"High material count: {count} (unused cleanup recommended)"))
-        elif count > 0:
-            out.append(_info("Scene", f"Scene materials detected: {count} (unused cleanup later)"))
-    except Exception:
-        pass
-    return out
+        return scan_unused_materials(options)
+    except Exception as e:
+        return [_warning("Materials", f"Unused material scan failed: {e}")]
 
 
-def _scan_naming(objs):
-    out = []
-    for o in objs:
-        try:
-            name = o.name
-            if " " in name:
-                out.append(_warning(name, "Name contains spaces"))
-            if any(c.isupper() for c in name):
-                out.append(_info(name, "Name contains uppercase (studio pipelines often prefer lowercase)"))
-        except Exception:
-            pass
-    return out
+def _scan_naming(options, out, indices=None):
+    # Studio naming conventions (config/naming_rules.json) + duplicate-name index
+    from core.naming_rules import scan_naming
+    try:
+        scan_naming(options, out, indices)
+    except Exception as e:
+        out.extend([_warning("Naming", f"Naming scan failed: {e}")])
 
 
 # ---------------------------
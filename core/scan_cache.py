@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import hashlib
+
+from core.config import cache_dir, config_dir
+from core.results import RULES, Issue, Level, ScanResults
+
+
+# Bump when the cached record layout changes
+SCHEMA = 2
+
+# Batch plumbing options that don't change what a scan finds
+_RUNTIME_PREFIXES = ("metrics_", "trace_", "staging_", "queue_", "recycle_", "quarantine_", "scan_cache",
+                     "max_batch_exe", "file_timeout_s", "phase_timeouts_s", "worker_start_timeout_s", "stub_")
+
+
+class ScanCache:
+    """
+    On-disk cache of scan results, one JSON file per entry in
+    <cache>/scan_cache. Keyed by scene identity (see scene_identity), scan
+    kind, options, tool version and the config files' mtimes, so editing
+    naming rules or budgets invalidates old entries.
+
+    Results that depend on files outside the scene (missing assets, texture
+    headers) store those files' stats with the entry (see note_files); a
+    hit whose files changed, appeared or disappeared since is a miss.
+
+    LRU: a hit touches the entry's mtime; put() evicts the least recently
+    used entries once the folder is over max_bytes.
+    """
+
+    def __init__(self, folder=None, max_bytes=256 * 1024 ** 2):
+        self.folder = folder or os.path.join(cache_dir(), "scan_cache")
+        self.max_bytes = int(max_bytes)
+        os.makedirs(self.folder, exist_ok=True)
+
+    def key(self, identity, kind, options):
+        from core.reporting import TOOL_VERSION
+
+        relevant = {k: v for k, v in (options or {}).items() if not k.startswith(_RUNTIME_PREFIXES)}
+        payload = json.dumps([SCHEMA, TOOL_VERSION, identity, kind, relevant, _config_stamp(options)],
+                             sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key):
+        """
+        ScanResults for key, or None (missing, unreadable or unknown rule codes).
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            results = _decode(entry)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        deps = entry.get("files") or []
+        if deps and _file_stamps([d[0] for d in deps]) != deps:
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return results
+
+    def put(self, key, results, files=()):
+        """
+        Store results; `files` are the external files they were computed from.
+        """
+        entry = {
+            "schema": SCHEMA,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "files": _file_stamps(sorted(set(files))),
+            "results": [_encode(r) for r in results],
+            "stats": getattr(results, "stats", {}),
+            "sample": getattr(results, "sample", None),
+        }
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f, separators=(",", ":"), default=str)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError):
+            _remove(tmp)
+            return
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.folder):
+            if not name.endswith(".json"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.folder, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+            total += st.st_size
+
+        entries.sort()
+        while entries and total > self.max_bytes:
+            _, size, name = entries.pop(0)
+            _remove(os.path.join(self.folder, name))
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.folder):
+            _remove(os.path.join(self.folder, name))
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.json")
+
+
+def get_scan_cache(options):
+    """
+    ScanCache, or None when disabled.
+
+    options keys:
+      - scan_cache (default True)
+      - scan_cache_max_mb (default 256)
+      - scan_cache_key ("stat" default: path + size + mtime, "content": file hash)
+    """
+    if not options.get("scan_cache", True):
+        return None
+    try:
+        return ScanCache(max_bytes=float(options.get("scan_cache_max_mb", 256)) * 1024 ** 2)
+    except OSError:
+        return None
+
+
+def scene_identity(path, options=None):
+    """
+    Identity of a saved scene file: (path, size, mtime), or its content hash
+    and folder with option scan_cache_key "content" (survives touch-only
+    changes and renames; copies in other folders resolve relative asset
+    paths differently, so they don't share entries). None if the file can't
+    be read.
+    """
+    options = options or {}
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    if options.get("scan_cache_key", "stat") == "content":
+        from core.file_hashing import get_hash_cache, hash_file
+
+        hashes = get_hash_cache()
+        digest = hashes.get(path, st.st_size, st.st_mtime)
+        if digest is None:
+            digest = hash_file(path)
+            hashes.put(path, st.st_size, st.st_mtime, digest)
+            hashes.save()
+        return ["content", digest, os.path.normcase(os.path.dirname(os.path.abspath(path)))]
+    return ["stat", os.path.normcase(os.path.abspath(path)), st.st_size, st.st_mtime]
+
+
+def current_scene_identity(options=None):
+    """
+    scene_identity() of the open scene, or None when it is untitled or has
+    unsaved changes (the file on disk no longer describes it).
+    """
+    import pymxs
+    rt = pymxs.runtime
+
+    try:
+        name = str(rt.maxFileName)
+        if not name or rt.getSaveRequired():
+            return None
+        return scene_identity(os.path.join(str(rt.maxFilePath), name), options)
+    except Exception:
+        return None
+
+
+# External files noted by the scan cached_scan() is computing (None = not recording)
+_noted = None
+
+
+def note_files(paths):
+    """
+    Called by scans whose results depend on files outside the scene
+    (asset existence, texture headers): the cached entry is only reused
+    while these files keep their size and mtime (or stay missing).
+    """
+    if _noted is not None:
+        _noted.update(os.path.normcase(os.path.abspath(p)) for p in paths if p)
+
+
+def cached_scan(kind, options, identity, compute):
+    """
+    compute() through the cache. Returns (results, hit).
+    Without identity (unsaved scene) or with the cache disabled this is compute().
+    """
+    global _noted
+
+    cache = get_scan_cache(options) if identity is not None else None
+    if cache is None:
+        return compute(), False
+
+    key = cache.key(identity, kind, options)
+    results = cache.get(key)
+    if results is not None:
+        return results, True
+
+    outer, _noted = _noted, set()
+    try:
+        results = compute()
+        files = _noted
+    finally:
+        _noted = outer
+    cache.put(key, results, files)
+    return results, False
+
+
+def _encode(r):
+    if isinstance(r, Issue):
+        return {"c": r.code, "l": int(r.level), "n": r.node, "a": list(r.args)}
+    return {"d": dict(r)}
+
+
+def _decode(entry):
+    if entry.get("schema") != SCHEMA:
+        raise ValueError("schema")
+    out = []
+    for item in entry["results"]:
+        if "d" in item:
+            out.append(item["d"])
+        else:
+            if item["c"] not in RULES:
+                raise KeyError(item["c"])
+            out.append(Issue(item["c"], Level(item["l"]), item["n"], tuple(item["a"])))
+    return ScanResults(out, entry.get("stats"), entry.get("sample"))
+
+
+def _config_stamp(options):
+    # mtimes of config/*.json and of any *_config file given in the options
+    folder = config_dir()
+    try:
+        paths = [os.path.join(folder, n) for n in sorted(os.listdir(folder)) if n.endswith(".json")]
+    except OSError:
+        paths = []
+    paths += [v for k, v in sorted((options or {}).items()) if k.endswith("_config") and isinstance(v, str)]
+
+    stamp = []
+    for p in paths:
+        try:
+            stamp.append([p, os.path.getmtime(p)])
+        except OSError:
+            continue
+    return stamp
+
+
+def _file_stamps(paths):
+    # [[path, size, mtime]], size/mtime None for missing files; stat'ed in parallel
+    from core.stat_cache import StatCache
+
+    stats = StatCache()
+    stats.prefetch(paths)
+    out = []
+    for p in paths:
+        st = stats.stat(p)
+        out.append([p, st.st_size, st.st_mtime] if st is not None else [p, None, None])
+    return out
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,256 @@
+import os
+import json
+
+from core.results import Issue, ScanResults
+
+# Summary records of a capped / sampled scan; never matched across runs
+_META_RULES = ("truncated", "sample_estimate")
+
+
+def issue_key(result):
+    """
+    Identity of a scan result across runs: (rule, node) for Issues. Classic
+    dict results have no rule code, so their message is part of the key.
+    """
+    if isinstance(result, Issue):
+        return (result.rule, result.node)
+    if isinstance(result, (list, tuple)):
+        # Compact batch scan report row: [level, node, message, rule]
+        rule = result[3] if len(result) > 3 else None
+        return (rule, result[1]) if rule else ("", result[1], result[2])
+    rule = result.get("rule")
+    return (rule, result.get("node")) if rule else ("", result.get("node"), result.get("message"))
+
+
+def index_results(results):
+    """
+    {key: result}; repeated keys (e.g. two nodes with the same name) get an
+    occurrence number so they are matched one to one.
+    """
+    index = {}
+    seen = {}
+    for r in results:
+        key = issue_key(r)
+        n = seen.get(key, 0)
+        seen[key] = n + 1
+        index[key + (n,) if n else key] = r
+    return index
+
+
+def diff_scans(before, after, limit=1000):
+    """
+    Compare two scan result lists (Issues, result dicts or compact report rows)
+    in linear time through hash indexes.
+
+    Rules that were capped or sampled on either side (ScanResults.stats) only
+    list part of their issues, so they are not diffed issue by issue: they
+    get {"diffable": False, "before", "after"} totals instead. Scans meant
+    for diffing should run with issue_cap_per_rule 0 and no scan_sample
+    (see full_scan_options).
+
+    Returns a JSON-ready dict:
+      counts: {"added", "resolved", "persisting", "not_diffable" (rules)}
+      by_rule: {rule: {"added", "resolved", "persisting"}}
+      added / resolved: [[level, rule, node, message]], first `limit` each (0 = all)
+    """
+    old_stats = getattr(before, "stats", None) or {}
+    new_stats = getattr(after, "stats", None) or {}
+    partial = {rule for stats in (old_stats, new_stats) for rule, s in stats.items()
+               if s.get("truncated") or s.get("sampled")}
+
+    old = _index_diffable(before, partial)
+    new = _index_diffable(after, partial)
+
+    by_rule = {}
+    for rule in partial:
+        by_rule[rule] = {"added": 0, "resolved": 0, "persisting": 0, "diffable": False,
+                         "before": old_stats.get(rule, {}).get("count", 0),
+                         "after": new_stats.get(rule, {}).get("count", 0)}
+    added = []
+    resolved = []
+    persisting = 0
+
+    def bump(key, what):
+        entry = by_rule.setdefault(key[0] or "other", {"added": 0, "resolved": 0, "persisting": 0})
+        entry[what] += 1
+
+    for key, r in new.items():
+        if key in old:
+            persisting += 1
+            bump(key, "persisting")
+        else:
+            bump(key, "added")
+            if not limit or len(added) < limit:
+                added.append(_row(key, r))
+
+    for key, r in old.items():
+        if key not in new:
+            bump(key, "resolved")
+            if not limit or len(resolved) < limit:
+                resolved.append(_row(key, r))
+
+    counts = {"added": 0, "resolved": 0, "persisting": persisting, "not_diffable": len(partial)}
+    for entry in by_rule.values():
+        counts["added"] += entry["added"]
+        counts["resolved"] += entry["resolved"]
+
+    return {
+        "counts": counts,
+        "by_rule": by_rule,
+        "added": added,
+        "resolved": resolved,
+        "truncated": bool(limit) and (counts["added"] > limit or counts["resolved"] > limit),
+    }
+
+
+def full_scan_options(options):
+    """
+    Scan options for a diffable scan: every issue listed, no sampling.
+    """
+    return dict(options, issue_cap_per_rule=0, issue_caps={}, scan_sample=0)
+
+
+def is_complete(results):
+    """
+    True if no rule of `results` was capped or sampled.
+    """
+    if getattr(results, "sample", None):
+        return False
+    return not any(s.get("truncated") or s.get("sampled") for s in (getattr(results, "stats", None) or {}).values())
+
+
+def diff_report_dirs(before_dir, after_dir, limit=1000):
+    """
+    Diff two batch report folders file by file (<name>_scan.json reports from
+    scan-only runs, matched by their path below the folder, e.g. "sub/name").
+    Files present on one side only are listed as such.
+    """
+    before = _scan_reports(before_dir)
+    after = _scan_reports(after_dir)
+
+    files = {}
+    totals = {"added": 0, "resolved": 0, "persisting": 0, "not_diffable": 0}
+    for name in sorted(set(before) | set(after)):
+        if name not in after:
+            files[name] = {"status": "removed"}
+            continue
+        if name not in before:
+            files[name] = {"status": "new"}
+            continue
+        diff = diff_scans(_load_rows(before[name]), _load_rows(after[name]), limit)
+        diff["status"] = "compared"
+        files[name] = diff
+        for k in totals:
+            totals[k] += diff["counts"][k]
+
+    return {"before": os.path.abspath(before_dir), "after": os.path.abspath(after_dir),
+            "counts": totals, "files": files}
+
+
+def diff_html_section(diff, title="Scan Diff"):
+    """
+    HTML block for a diff_scans() (or diff_report_dirs()) result.
+    """
+    from core.reporting import _esc
+
+    c = diff["counts"]
+    parts = [
+        f"<h2>{_esc(title)}</h2>",
+        f"<p>Resolved: <b>{c['resolved']}</b> - New: <b>{c['added']}</b> - Persisting: <b>{c['persisting']}</b></p>",
+    ]
+    if c.get("not_diffable"):
+        parts.append(f"<p class=\"small\">{c['not_diffable']} capped or sampled rule(s) compared by totals only; "
+                     "rescan with issue_cap_per_rule 0 and no scan_sample for a full diff.</p>")
+
+    if "files" in diff:
+        rows = "\n".join(
+            "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>".format(
+                _esc(name), _esc(d["status"]),
+                *((d["counts"]["resolved"], d["counts"]["added"], d["counts"]["persisting"]) if "counts" in d else ("", "", ""))
+            )
+            for name, d in diff["files"].items()
+        )
+        parts.append("<table>\n<thead><tr><th>File</th><th>Status</th><th>Resolved</th><th>New</th>"
+                     "<th>Persisting</th></tr></thead>\n<tbody>\n" + rows + "\n</tbody>\n</table>")
+        return "\n".join(parts)
+
+    rule_rows = "\n".join(
+        "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>".format(
+            _esc(rule), e["resolved"], e["added"], e["persisting"]) if e.get("diffable", True) else
+        "<tr><td>{}</td><td colspan=\"3\">not diffable (capped/sampled): {} -> {} issues</td></tr>".format(
+            _esc(rule), e["before"], e["after"])
+        for rule, e in sorted(diff["by_rule"].items())
+    )
+    parts.append("<table>\n<thead><tr><th>Rule</th><th>Resolved</th><th>New</th><th>Persisting</th></tr></thead>\n"
+                 "<tbody>\n" + rule_rows + "\n</tbody>\n</table>")
+
+    for what, label in (("resolved", "Resolved"), ("added", "New")):
+        rows = "\n".join(
+            "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>".format(*(_esc(x) for x in row))
+            for row in diff[what]
+        )
+        parts.append(f"<h3>{label}</h3>\n<table>\n<thead><tr><th>Level</th><th>Rule</th><th>Node</th>"
+                     "<th>Message</th></tr></thead>\n<tbody>\n" + rows + "\n</tbody>\n</table>")
+    if diff.get("truncated"):
+        parts.append("<p class=\"small\">Lists truncated; counts are complete.</p>")
+    return "\n".join(parts)
+
+
+def save_diff(diff, path, html=True):
+    """
+    Write <path>.json (+ <path>.html). Returns the JSON path.
+    """
+    from core.reporting import save_json
+
+    base = os.path.splitext(path)[0]
+    json_path = save_json(diff, base + ".json")
+    if html:
+        with open(base + ".html", "w", encoding="utf-8") as f:
+            f.write("<!doctype html>\n<html>\n<head><meta charset=\"utf-8\"/><title>Scan Diff</title>\n"
+                    "<style>body { font-family: Arial, sans-serif; margin: 24px; } "
+                    "table { border-collapse: collapse; width: 100%; margin: 12px 0 28px; } "
+                    "th, td { border: 1px solid #ddd; padding: 8px; font-size: 13px; } "
+                    "th { background: #f5f5f5; text-align: left; }</style>\n</head>\n<body>\n"
+                    + diff_html_section(diff) + "\n</body>\n</html>\n")
+    return json_path
+
+
+def _index_diffable(results, partial):
+    return index_results(r for r in results if _rule_of(r) not in partial and _rule_of(r) not in _META_RULES)
+
+
+def _rule_of(r):
+    if isinstance(r, Issue):
+        return r.rule
+    if isinstance(r, (list, tuple)):
+        return r[3] if len(r) > 3 else None
+    return r.get("rule")
+
+
+def _row(key, r):
+    if isinstance(r, (list, tuple)):
+        return [r[0], key[0], r[1], r[2]]
+    return [r.get("level"), key[0], r.get("node"), r.get("message")]
+
+
+def _scan_reports(report_dir):
+    # Keyed by the path below report_dir ("sub/name"), as batch runs mirror
+    # the input folders there; same-named scenes in different folders differ
+    suffix = "_scan.json"
+    reports = {}
+    for root, _, names in os.walk(report_dir):
+        rel = os.path.relpath(root, report_dir)
+        for n in names:
+            if n.endswith(suffix):
+                key = n[:-len(suffix)] if rel == os.curdir else os.path.join(rel, n[:-len(suffix)])
+                reports[key.replace(os.sep, "/")] = os.path.join(root, n)
+    return reports
+
+
+def _load_rows(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return ScanResults(report.get("issues") or [], report.get("stats"))
@@ -0,0 +1,222 @@
+import os
+
+import pymxs
+rt = pymxs.runtime
+
+from core import tracing
+from core.scan_cache import note_files
+from core.stat_cache import StatCache
+
+
+# Fallback when the asset manager has no (or a generic) type for a file
+_EXT_TYPES = {
+    ".ies": "photometric",
+    ".osl": "osl",
+    ".oso": "osl",
+    ".max": "xref",
+    ".abc": "cache",
+    ".pc2": "cache",
+    ".xml": "cache",
+    ".vdb": "cache",
+    ".vrmesh": "proxy",
+    ".ass": "proxy",
+    ".xmesh": "proxy",
+    ".rs": "proxy",
+    ".avi": "video",
+    ".mov": "video",
+    ".mp4": "video",
+    ".wav": "sound",
+}
+_IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".tga", ".tif", ".tiff", ".exr", ".hdr", ".dds", ".bmp", ".psd", ".tx", ".gif")
+
+# One call: asset manager types, then enumerateFiles per material, per node and
+# once for the whole scene (environment, render settings, xref scenes).
+# The first owner that reports a file keeps it. Returns #(#(type, owner, path), ...).
+_ENUMERATE_MS = r"""
+(
+    fn collectFile fname arg = (append arg fname; ok)
+
+    local out = #()
+    local seen = Dictionary #string
+    local types = Dictionary #string
+    try
+    (
+        for i = 1 to AssetManager.GetNumAssets() do
+        (
+            local a = AssetManager.GetAssetByIndex i
+            local f = a.GetFileName()
+            if f != undefined and f != "" do types[toLower f] = (a.GetType()) as string
+        )
+    )
+    catch()
+
+    fn addFiles owner files out seen types =
+    (
+        for f in files where f != undefined and f != "" do
+        (
+            local k = toLower f
+            if not (hasDictValue seen k) do
+            (
+                seen[k] = true
+                local t = if hasDictValue types k then types[k] else ""
+                append out #(t, owner, f)
+            )
+        )
+    )
+
+    for m in sceneMaterials do
+    (
+        local files = #()
+        try (enumerateFiles m collectFile files) catch()
+        addFiles m.name files out seen types
+    )
+    for o in objects do
+    (
+        local files = #()
+        try (enumerateFiles o collectFile files) catch()
+        addFiles o.name files out seen types
+    )
+    local files = #()
+    try (enumerateFiles collectFile files) catch()
+    addFiles "Scene" files out seen types
+
+    out
+)
+"""
+
+
+def enumerate_assets():
+    """
+    Every external file the scene references (bitmaps of any renderer, OSL,
+    IES, proxies, caches, XRefs, ...) in one MAXScript call.
+    Returns list[(asset_type, owner, path)], one entry per path.
+    """
+    out = []
+    try:
+        with tracing.span("ms.enumerate_assets", "maxscript"):
+            items = list(rt.execute(_ENUMERATE_MS))
+    except Exception:
+        return out
+
+    for item in items:
+        try:
+            kind, owner, path = str(item[0]), str(item[1]), str(item[2])
+        except Exception:
+            continue
+        out.append((_asset_type(kind, path), owner, path))
+    return out
+
+
+def find_missing_assets(assets=None, stat_cache=None, workers=16):
+    """
+    Existence check for enumerated assets: each distinct path is stat'ed once,
+    in parallel. Relative paths are resolved against the scene folder.
+    Returns list[(asset_type, owner, path)] of missing files.
+    """
+    assets = enumerate_assets() if assets is None else assets
+    stat_cache = stat_cache or StatCache()
+
+    base = _scene_dir()
+    resolved = {path: _absolute(path, base) for _, _, path in assets}
+    note_files(resolved.values())
+    with tracing.span("assets.stat", "io", paths=len(resolved)):
+        stat_cache.prefetch(resolved.values(), workers)
+    return [a for a in assets if not stat_cache.isfile(resolved[a[2]])]
+
+
+def scan_missing_assets(options=None):
+    """
+    Results for missing external files of any type.
+    """
+    options = options or {}
+    missing = find_missing_assets(workers=options.get("asset_stat_workers", 16))
+    results = [_warning(owner, f"Missing {_label(kind)}: {path}") for kind, owner, path in missing]
+    if not missing:
+        results.append(_info("Assets", "No missing external files detected (all asset types)."))
+    return results
+
+
+def retarget_assets(mapping):
+    """
+    Point assets at new paths, for any asset type, through the asset tracking
+    system (ATSOps changes the folder, the file name stays). BitmapTextures can
+    also be renamed; other assets whose file name changed are reported.
+    mapping: {old_path: new_path}. Returns (retargeted {old: new}, failed {old: reason}).
+    """
+    retargeted = {}
+    failed = {}
+    renamed = {}
+
+    try:
+        rt.ATSOps.Refresh()
+    except Exception:
+        pass
+
+    for old, new in mapping.items():
+        if os.path.basename(old).lower() != os.path.basename(new).lower():
+            renamed[old] = new
+            continue
+        try:
+            rt.ATSOps.ClearSelection()
+            rt.ATSOps.SelectFiles([old])
+            if rt.ATSOps.SetPathOnSelection(os.path.dirname(new)) is False:
+                failed[old] = "asset tracking refused the new path"
+            else:
+                retargeted[old] = new
+        except Exception as e:
+            failed[old] = str(e)
+
+    if renamed:
+        from core.material_scan import collect_bitmap_textures
+
+        for bt, _, path in collect_bitmap_textures():
+            if path in renamed:
+                try:
+                    bt.filename = renamed[path]
+                    retargeted[path] = renamed[path]
+                except Exception as e:
+                    failed[path] = str(e)
+        for old in renamed:
+            if old not in retargeted and old not in failed:
+                failed[old] = "file name changed (only BitmapTexture paths can be renamed)"
+
+    try:
+        rt.ATSOps.ClearSelection()
+    except Exception:
+        pass
+    return retargeted, failed
+
+
+def _asset_type(kind, path):
+    kind = kind.lower().lstrip("#")
+    if kind and kind not in ("other", "undefined"):
+        return kind
+    ext = os.path.splitext(path)[1].lower()
+    if ext in _IMAGE_EXTS:
+        return "bitmap"
+    return _EXT_TYPES.get(ext, "other")
+
+
+def _label(kind):
+    return "texture" if kind == "bitmap" else f"{kind} file"
+
+
+def _scene_dir():
+    try:
+        return str(rt.maxFilePath) or None
+    except Exception:
+        return None
+
+
+def _absolute(path, base):
+    if os.path.isabs(path) or not base:
+        return path
+    return os.path.join(base, path)
+
+
+def _info(node, message):
+    return {"level": "INFO", "node": node, "message": message}
+
+
+def _warning(node, message):
+    return {"level": "WARNING", "node": node, "message": message}
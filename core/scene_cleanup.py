@@ -1,10 +1,13 @@
 import pymxs
 rt = pymxs.runtime
 
+from core import tracing
+
 
 def clean_scene(options):
     """
-    Day 5: Cleanup actions (delete hidden, delete frozen helpers, delete empty layers)
+    Day 5: Cleanup actions (delete hidden, delete frozen helpers, delete empty layers,
+    purge unused materials/maps)
     Runs as a single MAXScript undo block (reliable Ctrl+Z once).
 
     Max 2026 notes (based on your runtime behavior):
@@ -16,6 +19,19 @@ def clean_scene(options):
     do_hidden = bool(options.get("delete_hidden", False))
     do_frozen_helpers = bool(options.get("delete_frozen_helpers", False))
     do_empty_layers = bool(options.get("delete_empty_layers", False))
+    do_unused_mats = bool(options.get("remove_unused_materials", False))
+
+    # Reuses the graph built by the scan when the scene has not changed
+    purge_ms = ""
+    unused_before = 0
+    if do_unused_mats:
+        try:
+            from core.material_graph import get_material_graph, build_purge_script
+            graph = get_material_graph()
+            unused_before = len(graph.unused())
+            purge_ms = build_purge_script(graph)
+        except Exception:
+            purge_ms = ""
 
     before = {
         "hidden": _count_hidden_objects() if do_hidden else 0,
@@ -26,6 +42,7 @@ def clean_scene(options):
     ms_hidden = "true" if do_hidden else "false"
     ms_frozen = "true" if do_frozen_helpers else "false"
     ms_layers = "true" if do_empty_layers else "false"
+    ms_mats = "true" if purge_ms else "false"
 
     # Robust empty-layer detection: scan all objects and check node.layer == lyr
     # Robust deletion: use LayerManager.deleteLayerByName (available in your build), fallback lyr.delete()
@@ -35,6 +52,7 @@ def clean_scene(options):
         local deletedHidden = 0
         local deletedFrozenHelpers = 0
         local deletedEmptyLayers = 0
+        local purgedMaterials = 0
 
         -- Delete hidden objects
         if {ms_hidden} do
@@ -114,18 +132,33 @@ def clean_scene(options):
             )
         )
 
-        format "MaxSceneCleaner cleanup: hidden=% frozenHelpers=% emptyLayers=%\\n" deletedHidden deletedFrozenHelpers deletedEmptyLayers
+        -- Purge unused materials/maps (reference-graph reachability, computed in Python)
+        if {ms_mats} do
+        (
+{purge_ms or "ok"}
+        )
+
+        format "MaxSceneCleaner cleanup: hidden=% frozenHelpers=% emptyLayers=% unusedMaterials=%\\n" deletedHidden deletedFrozenHelpers deletedEmptyLayers purgedMaterials
     )
     """
 
     actions = []
     try:
-        rt.execute(ms)
-        actions.append(_info("Scene", "Cleanup complete (hidden/frozen/layers)"))
+        with tracing.span("ms.clean_scene", "maxscript"):
+            rt.execute(ms)
+        actions.append(_info("Scene", "Cleanup complete (hidden/frozen/layers/materials)"))
     except Exception as e:
         actions.append(_warning("Scene", f"Cleanup failed: {e}"))
         return actions
 
+    unused_after = 0
+    if do_unused_mats:
+        try:
+            from core.material_graph import get_material_graph
+            unused_after = len(get_material_graph(refresh=True).unused())
+        except Exception:
+            pass
+
     # Force UI refresh
     try:
         rt.redrawViews()
@@ -146,6 +179,8 @@ def clean_scene(options):
         actions.append(_info("Scene", f"Frozen helpers: {before['frozen_helpers']} -> {after['frozen_helpers']}"))
     if do_empty_layers:
         actions.append(_info("Scene", f"Empty layers: {before['empty_layers']} -> {after['empty_layers']}"))
+    if do_unused_mats:
+        actions.append(_info("Scene", f"Unused materials/maps: {unused_before} -> {unused_after}"))
 
     return actions
 
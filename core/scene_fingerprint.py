@@ -0,0 +1,63 @@
+import hashlib
+
+import pymxs
+rt = pymxs.runtime
+
+from core import tracing
+
+
+# One line per node (identity, hierarchy, stack depth, transform, material,
+# layer, flags, poly counts) + layers + scene materials + Material Editor
+# slots + Slate view contents + bitmap paths. Anything the cleanup steps can
+# change shows up here (the unused-material purge may only touch the editors).
+_FINGERPRINT_MS = r"""
+(
+    local ss = stringStream ""
+    for o in objects do
+    (
+        local pc = try (getPolygonCount o) catch #(0, 0)
+        local mh = if o.material != undefined then getHandleByAnim o.material else 0
+        local ph = if o.parent != undefined then o.parent.inode.handle else 0
+        format "%|%|%|%|%|%|%|%|%|%|%\n" o.inode.handle o.name (classOf o) ph o.modifiers.count o.transform mh o.layer.name o.isHidden o.isFrozen pc to:ss
+    )
+    format "L%:" LayerManager.count to:ss
+    for i = 0 to LayerManager.count - 1 do format "%;" (LayerManager.getLayer i).name to:ss
+    format "\nM%:" sceneMaterials.count to:ss
+    for m in sceneMaterials do format "%;" (getHandleByAnim m) to:ss
+    format "\nE:" to:ss
+    for i = 1 to meditMaterials.count do format "%;" (getHandleByAnim meditMaterials[i]) to:ss
+    format "\nS:" to:ss
+    try
+    (
+        for v = 1 to sme.GetNumViews() do
+        (
+            local view = sme.GetView v
+            format "%:" view.name to:ss
+            for k = 1 to view.GetNumNodes() do
+            (
+                local h = 0
+                try(h = getHandleByAnim (view.GetNode k).reference)catch()
+                format "%," h to:ss
+            )
+            format ";" to:ss
+        )
+    )
+    catch()
+    format "\nB:" to:ss
+    for b in getClassInstances BitmapTexture do format "%;" b.filename to:ss
+    ss as string
+)
+"""
+
+
+def scene_fingerprint():
+    """
+    Hash of the scene state the cleanup tools touch, or None if it can't be read.
+    Equal fingerprints before/after a clean mean the clean was a no-op.
+    """
+    try:
+        with tracing.span("ms.scene_fingerprint", "maxscript"):
+            text = str(rt.execute(_FINGERPRINT_MS))
+    except Exception:
+        return None
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=20).hexdigest()
@@ -0,0 +1,53 @@
+import os
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StatCache:
+    """
+    One os.stat per path (including misses), shared across lookups.
+    prefetch() stats many paths in parallel, which is what makes checks
+    against network shares fast.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}  # normcase path -> os.stat_result or None
+
+    @staticmethod
+    def key(path):
+        return os.path.normcase(os.path.normpath(path))
+
+    def stat(self, path):
+        key = self.key(path)
+        with self._lock:
+            if key in self._stats:
+                return self._stats[key]
+        try:
+            st = os.stat(path)
+        except (OSError, ValueError):
+            st = None
+        with self._lock:
+            self._stats[key] = st
+        return st
+
+    def isfile(self, path):
+        st = self.stat(path)
+        return st is not None and stat.S_ISREG(st.st_mode)
+
+    def prefetch(self, paths, workers=16):
+        todo = []
+        with self._lock:
+            for p in dict.fromkeys(paths):
+                if self.key(p) not in self._stats:
+                    todo.append(p)
+        if not todo:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+            list(pool.map(self.stat, todo))
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
@@ -0,0 +1,335 @@
+import os
+import mmap
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+from core.config import load_config, cache_dir
+from core.file_hashing import HashCache
+from core.scan_cache import note_files
+
+
+DEFAULT_BUDGET = {
+    "max_texture_mb": 64,         # estimated memory incl. mip chain, per texture
+    "max_resolution": 8192,       # longest side
+    "scene_budget_mb": 2048,      # all unique textures together
+    "workers": 8,
+}
+
+# How much of the file the header parsers may look at (no pixel decoding)
+_HEAD_BYTES = 64 * 1024
+_EXR_HEAD_BYTES = 256 * 1024
+
+# Compressed DDS formats: bytes per pixel
+_DDS_FOURCC_BPP = {
+    b"DXT1": 0.5, b"ATI1": 0.5, b"BC4U": 0.5, b"BC4S": 0.5,
+    b"DXT2": 1.0, b"DXT3": 1.0, b"DXT4": 1.0, b"DXT5": 1.0,
+    b"ATI2": 1.0, b"BC5U": 1.0, b"BC5S": 1.0,
+}
+# DXGI formats for DX10 headers (BC1..BC7 + common uncompressed)
+_DXGI_BPP = {
+    70: 0.5, 71: 0.5, 72: 0.5, 79: 0.5, 80: 0.5, 81: 0.5,       # BC1, BC4
+    73: 1.0, 74: 1.0, 75: 1.0, 76: 1.0, 77: 1.0, 78: 1.0,       # BC2, BC3
+    82: 1.0, 83: 1.0, 84: 1.0, 94: 1.0, 95: 1.0, 96: 1.0,       # BC5, BC6H
+    97: 1.0, 98: 1.0, 99: 1.0,                                  # BC7
+    2: 16.0, 10: 8.0, 24: 4.0, 28: 4.0, 87: 4.0, 41: 4.0, 61: 1.0,
+}
+_EXR_PIXEL_BYTES = {0: 4, 1: 2, 2: 4}  # UINT, HALF, FLOAT
+
+_header_cache = None
+
+
+def read_texture_header(path):
+    """
+    Parse resolution / channels / bit depth from the image header only.
+    Returns dict: format, width, height, channels, bits (per channel),
+    bytes_per_pixel, mips (DDS only, else None). Raises ValueError if unsupported.
+    """
+    with open(path, "rb") as f:
+        head = f.read(_HEAD_BYTES)
+
+        if head.startswith(b"\x89PNG\r\n\x1a\n"):
+            return _parse_png(head)
+        if head.startswith(b"\xff\xd8"):
+            return _parse_jpeg(f)
+        if head[:4] in (b"II*\x00", b"MM\x00*"):
+            return _parse_tiff(f, head)
+        if head.startswith(b"\x76\x2f\x31\x01"):
+            if len(head) == _HEAD_BYTES:
+                f.seek(0)
+                head = f.read(_EXR_HEAD_BYTES)
+            return _parse_exr(head)
+        if head.startswith(b"DDS "):
+            return _parse_dds(head)
+        if os.path.splitext(path)[1].lower() in (".tga", ".targa", ".vda", ".icb", ".vst"):
+            return _parse_tga(head)
+
+    raise ValueError("unsupported image format")
+
+
+def estimate_memory(info):
+    """
+    Returns (base_bytes, mip_chain_bytes). A full mip chain adds ~1/3.
+    """
+    base = int(info["width"] * info["height"] * info["bytes_per_pixel"])
+    mips = info.get("mips")
+    if mips is not None and mips <= 1:
+        return base, base
+    return base, int(base * 4 / 3)
+
+
+def audit_textures(paths, options=None):
+    """
+    Header-only audit of texture files against a memory budget.
+
+    options keys:
+      - texture_budget_config (path to budget JSON, default config/texture_budget.json)
+
+    Returns (entries, results): entries is list[dict] per unique file,
+    results is list[dict] {"level","node","message"} for the report.
+    """
+    options = options or {}
+    budget = load_config("texture_budget", DEFAULT_BUDGET, path=options.get("texture_budget_config"))
+    unique = list(dict.fromkeys(p for p in paths if p))
+
+    workers = max(1, int(budget.get("workers", 8) or 1))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        entries = list(pool.map(_audit_one, unique))
+    _get_header_cache().save()
+
+    max_tex = float(budget.get("max_texture_mb", 0) or 0) * 1024 * 1024
+    max_res = int(budget.get("max_resolution", 0) or 0)
+    scene_budget = float(budget.get("scene_budget_mb", 0) or 0) * 1024 * 1024
+
+    results = []
+    total = 0
+    for e in entries:
+        if e.get("error"):
+            results.append(_info(e["path"], f"Texture header not read: {e['error']}"))
+            continue
+
+        total += e["mip_bytes"]
+        desc = f"{e['width']}x{e['height']} {e['format']} {e['channels']}ch {e['bits']}bit, ~{_mb(e['mip_bytes'])} with mips"
+        if max_tex and e["mip_bytes"] > max_tex:
+            results.append(_warning(e["path"], f"Texture over budget ({_mb(max_tex)}): {desc}"))
+        elif max_res and max(e["width"], e["height"]) > max_res:
+            results.append(_warning(e["path"], f"Texture resolution over {max_res}: {desc}"))
+
+    read = sum(1 for e in entries if not e.get("error"))
+    summary = f"Texture memory: ~{_mb(total)} for {read} unique files (uncompressed + mips)"
+    if scene_budget and total > scene_budget:
+        results.append(_warning("Textures", f"{summary} - over scene budget {_mb(scene_budget)}"))
+    else:
+        results.append(_info("Textures", summary))
+
+    return entries, results
+
+
+def scan_texture_memory(options=None):
+    """
+    Audit every BitmapTexture file referenced by the scene.
+    Returns list[dict]: {"level","node","message"}
+    """
+    from core.material_scan import collect_bitmap_textures
+
+    paths = [p for _, _, p in collect_bitmap_textures()]
+    note_files(paths)
+    paths = [p for p in paths if os.path.isfile(p)]
+    try:
+        _, results = audit_textures(paths, options)
+    except Exception as e:
+        return [_warning("Textures", f"Texture audit failed: {e}")]
+    return results
+
+
+# ---------------------------
+# Per-file audit (thread pool)
+# ---------------------------
+def _get_header_cache():
+    global _header_cache
+    if _header_cache is None:
+        # Same (path, size, mtime) keyed JSON store as the content hashes
+        _header_cache = HashCache(os.path.join(cache_dir(), "texture_headers.json"))
+    return _header_cache
+
+
+def _audit_one(path):
+    cache = _get_header_cache()
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        return {"path": path, "error": str(e)}
+
+    cached = cache.get(path, st.st_size, st.st_mtime_ns)
+    if cached is not None and not cached.get("error"):  # errors cached by older versions are re-read
+        return cached
+
+    try:
+        info = read_texture_header(path)
+    except Exception as e:
+        # Not cached: a locked or half-written file reads fine next time
+        return {"path": path, "error": str(e) or type(e).__name__}
+
+    base, mip = estimate_memory(info)
+    entry = dict(info, path=path, bytes=base, mip_bytes=mip)
+    cache.put(path, st.st_size, st.st_mtime_ns, entry)
+    return entry
+
+
+# ---------------------------
+# Header parsers
+# ---------------------------
+def _info_dict(fmt, width, height, channels, bits, bytes_per_pixel=None, mips=None):
+    if bytes_per_pixel is None:
+        bytes_per_pixel = channels * bits / 8.0
+    return {
+        "format": fmt,
+        "width": int(width),
+        "height": int(height),
+        "channels": int(channels),
+        "bits": int(bits),
+        "bytes_per_pixel": float(bytes_per_pixel),
+        "mips": mips,
+    }
+
+
+def _parse_png(head):
+    width, height, bits, color_type = struct.unpack(">IIBB", head[16:26])
+    channels = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}.get(color_type, 4)
+    if color_type == 3:
+        bits = 8  # palette expands to RGB8 on load
+    return _info_dict("PNG", width, height, channels, bits)
+
+
+def _parse_jpeg(f):
+    # Walk segment headers via mmap until a SOFn marker (no entropy data touched)
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = 2
+        size = len(mm)
+        while pos + 4 <= size:
+            if mm[pos] != 0xFF:
+                pos += 1
+                continue
+            marker = mm[pos + 1]
+            if marker == 0xFF:
+                pos += 1
+                continue
+            if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+                pos += 2
+                continue
+            seg_len = struct.unpack(">H", mm[pos + 2:pos + 4])[0]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                bits, height, width, channels = struct.unpack(">BHHB", mm[pos + 4:pos + 10])
+                return _info_dict("JPEG", width, height, channels, bits)
+            if marker == 0xDA:
+                break
+            pos += 2 + seg_len
+    raise ValueError("JPEG SOF marker not found")
+
+
+def _parse_tga(head):
+    if len(head) < 18:
+        raise ValueError("truncated TGA header")
+    width, height, depth = struct.unpack("<HHB", head[12:17])
+    image_type = head[2]
+    if image_type in (1, 9):  # color-mapped
+        return _info_dict("TGA", width, height, 3, 8)
+    if depth in (8,) and image_type in (3, 11):
+        return _info_dict("TGA", width, height, 1, 8)
+    channels = 4 if depth == 32 else 3
+    return _info_dict("TGA", width, height, channels, 8)
+
+
+def _parse_tiff(f, head):
+    endian = "<" if head[:2] == b"II" else ">"
+    ifd = struct.unpack(endian + "I", head[4:8])[0]
+
+    f.seek(ifd)
+    count = struct.unpack(endian + "H", f.read(2))[0]
+    raw = f.read(count * 12)
+
+    tags = {}
+    type_sizes = {1: 1, 3: 2, 4: 4}
+    type_fmt = {1: "B", 3: "H", 4: "I"}
+    for i in range(count):
+        tag, typ, n, value = struct.unpack(endian + "HHI4s", raw[i * 12:(i + 1) * 12])
+        if tag not in (256, 257, 258, 277) or typ not in type_sizes:
+            continue
+        size = type_sizes[typ] * n
+        if size <= 4:
+            data = value[:size]
+        else:
+            offset = struct.unpack(endian + "I", value)[0]
+            f.seek(offset)
+            data = f.read(size)
+        tags[tag] = struct.unpack(endian + type_fmt[typ] * n, data)
+
+    if 256 not in tags or 257 not in tags:
+        raise ValueError("TIFF size tags missing")
+
+    channels = tags.get(277, (1,))[0]
+    bits_list = tags.get(258, (8,))
+    bits = max(bits_list)
+    bytes_per_pixel = sum(bits_list) / 8.0 if len(bits_list) == channels else channels * bits / 8.0
+    return _info_dict("TIFF", tags[256][0], tags[257][0], channels, bits, bytes_per_pixel)
+
+
+def _parse_exr(head):
+    pos = 8
+    width = height = None
+    channels = []
+    while pos < len(head) and head[pos] != 0:
+        name_end = head.index(b"\x00", pos)
+        name = head[pos:name_end]
+        type_end = head.index(b"\x00", name_end + 1)
+        size = struct.unpack("<i", head[type_end + 1:type_end + 5])[0]
+        value = head[type_end + 5:type_end + 5 + size]
+        pos = type_end + 5 + size
+
+        if name == b"dataWindow":
+            x0, y0, x1, y1 = struct.unpack("<4i", value[:16])
+            width, height = x1 - x0 + 1, y1 - y0 + 1
+        elif name == b"channels":
+            cpos = 0
+            while cpos < len(value) and value[cpos] != 0:
+                cend = value.index(b"\x00", cpos)
+                pixel_type = struct.unpack("<i", value[cend + 1:cend + 5])[0]
+                channels.append(_EXR_PIXEL_BYTES.get(pixel_type, 4))
+                cpos = cend + 1 + 16
+
+    if width is None or not channels:
+        raise ValueError("EXR header incomplete")
+    bits = max(channels) * 8
+    return _info_dict("EXR", width, height, len(channels), bits, float(sum(channels)))
+
+
+def _parse_dds(head):
+    height, width = struct.unpack("<II", head[12:20])
+    mips = struct.unpack("<I", head[28:32])[0] or 1
+    pf_flags = struct.unpack("<I", head[80:84])[0]
+    fourcc = head[84:88]
+    rgb_bits = struct.unpack("<I", head[88:92])[0]
+
+    if pf_flags & 0x4:  # DDPF_FOURCC
+        if fourcc == b"DX10":
+            dxgi = struct.unpack("<I", head[128:132])[0]
+            bpp = _DXGI_BPP.get(dxgi, 4.0)
+        else:
+            bpp = _DDS_FOURCC_BPP.get(fourcc, 4.0)
+        channels = 4 if bpp >= 1.0 else 3
+        return _info_dict("DDS", width, height, channels, 8, bpp, mips)
+
+    channels = 4 if pf_flags & 0x1 else 3  # DDPF_ALPHAPIXELS
+    bits = rgb_bits or 32
+    return _info_dict("DDS", width, height, channels, 8, bits / 8.0, mips)
+
+
+def _mb(n):
+    return f"{n / (1024.0 * 1024.0):.1f} MB"
+
+
+def _info(node, message):
+    return {"level": "INFO", "node": node, "message": message}
+
+
+def _warning(node, message):
+    return {"level": "WARNING", "node": node, "message": message}
@@ -0,0 +1,175 @@
+import os
+
+import pymxs
+rt = pymxs.runtime
+
+from core.material_scan import collect_bitmap_textures
+from core.file_hashing import group_identical_files, DEFAULT_WORKERS
+from core.scan_cache import note_files
+
+
+_unc_cache = {}
+
+
+def normalize_texture_path(path):
+    """
+    Canonical comparison key for a texture path: env vars expanded, separators
+    and ".." normalized, mapped drive letters resolved to UNC (Windows), case folded.
+    """
+    p = os.path.expandvars(str(path).strip().strip('"'))
+    p = os.path.normpath(p)
+    p = _drive_to_unc(p)
+    return os.path.normcase(p)
+
+
+def find_duplicate_textures(bitmaps=None, workers=DEFAULT_WORKERS):
+    """
+    Group bitmap references that point to the same image content.
+
+    Returns list[dict]:
+      canonical - path string every reference in the group should use
+      files     - distinct normalized files in the group
+      refs      - list[(bitmaptexture, owner_name, path)]
+    """
+    if bitmaps is None:
+        bitmaps = collect_bitmap_textures()
+
+    # 1) Same file under different spellings (case, separators, drive vs UNC)
+    by_norm = {}
+    for ref in bitmaps:
+        by_norm.setdefault(normalize_texture_path(ref[2]), []).append(ref)
+
+    # 2) Same content under different files (size buckets first, then hashes)
+    note_files(by_norm.keys())
+    content_groups, _ = group_identical_files(list(by_norm.keys()), workers=workers)
+
+    grouped = set()
+    out = []
+    for files in content_groups:
+        grouped.update(files)
+        out.append(_make_group(files, by_norm))
+
+    for norm, refs in by_norm.items():
+        if norm in grouped:
+            continue
+        if len(set(r[2] for r in refs)) > 1:
+            out.append(_make_group([norm], by_norm))
+
+    out.sort(key=lambda g: len(g["refs"]), reverse=True)
+    return out
+
+
+def scan_duplicate_textures(options=None):
+    """
+    Read-only report of duplicate texture files/paths (material scan step,
+    option detect_duplicate_textures).
+    Returns list[dict]: {"level","node","message"}
+    """
+    options = options or {}
+    workers = int(options.get("hash_workers", DEFAULT_WORKERS) or DEFAULT_WORKERS)
+
+    try:
+        groups = find_duplicate_textures(workers=workers)
+    except Exception as e:
+        return [_warning("Textures", f"Duplicate texture scan failed: {e}")]
+
+    out = []
+    for g in groups:
+        to_change = sum(1 for r in g["refs"] if r[2] != g["canonical"])
+        out.append(_warning(
+            g["canonical"],
+            f"Same image under {len(g['files'])} file(s) / {len(set(r[2] for r in g['refs']))} path(s); "
+            f"{to_change} reference(s) can be repointed",
+        ))
+
+    if groups:
+        out.append(_info("Textures", f"Duplicate texture groups: {len(groups)}"))
+    else:
+        out.append(_info("Textures", "No duplicate texture files detected."))
+    return out
+
+
+def dedupe_textures(options=None, groups=None):
+    """
+    Repoint every reference in each duplicate group to its canonical file.
+    Returns actions list[dict]
+    """
+    options = options or {}
+    if groups is None:
+        workers = int(options.get("hash_workers", DEFAULT_WORKERS) or DEFAULT_WORKERS)
+        groups = find_duplicate_textures(workers=workers)
+
+    if not groups:
+        return [_info("Textures", "No duplicate textures to repoint.")]
+
+    actions = []
+
+    def _do():
+        for g in groups:
+            for bt, owner, path in g["refs"]:
+                if path == g["canonical"]:
+                    continue
+                try:
+                    bt.filename = g["canonical"]
+                    actions.append(_info(owner, f"Repointed: {path} -> {g['canonical']}"))
+                except Exception as e:
+                    actions.append(_warning(owner, f"Repoint failed ({path}): {e}"))
+
+    try:
+        rt.undo("MaxSceneCleaner_DedupeTextures", _do)
+    except Exception:
+        # If undo wrapper is flaky, still do it
+        _do()
+
+    return actions
+
+
+def _make_group(files, by_norm):
+    refs = [r for f in files for r in by_norm[f]]
+
+    # Canonical file: most referenced, then shortest path
+    best = min(files, key=lambda f: (-len(by_norm[f]), len(f), f))
+
+    # Keep the spelling artists already use most for that file (ties: shortest)
+    spellings = {}
+    for r in by_norm[best]:
+        spellings[r[2]] = spellings.get(r[2], 0) + 1
+    canonical = min(spellings, key=lambda s: (-spellings[s], len(s), s))
+
+    return {"canonical": canonical, "files": list(files), "refs": refs}
+
+
+def _drive_to_unc(path):
+    if os.name != "nt":
+        return path
+    drive, rest = os.path.splitdrive(path)
+    if len(drive) != 2 or drive[1] != ":":
+        return path
+
+    letter = drive.upper()
+    if letter not in _unc_cache:
+        _unc_cache[letter] = _query_unc(letter)
+    unc = _unc_cache[letter]
+    return unc + rest if unc else path
+
+
+def _query_unc(drive):
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        buf = ctypes.create_unicode_buffer(1024)
+        size = wintypes.DWORD(len(buf))
+        if ctypes.windll.mpr.WNetGetConnectionW(drive, buf, ctypes.byref(size)) == 0:
+            return buf.value.rstrip("\\")
+    except Exception:
+        pass
+    return None
+
+
+def _info(node, message):
+    return {"level": "INFO", "node": node, "message": message}
+
+
+def _warning(node, message):
+    return {"level": "WARNING", "node": node, "message": message}
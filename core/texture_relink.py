@@ -2,71 +2,70 @@ import os
 import pymxs
 rt = pymxs.runtime
 
+from core import tracing
 
-def relink_missing_textures(search_root):
+
+def relink_missing_textures(search_root, options=None):
     """
-    Best-effort relink:
-    - find missing BitmapTexture filenames
-    - search for same basename under search_root
-    - update bt.filename
-    Returns actions list[dict]
+    Best-effort relink of every missing external file (bitmaps of any renderer,
+    OSL, IES, proxies, caches, XRefs - see core.scene_assets):
+    - enumerate assets and stat each distinct path once
+    - rewrite missing paths with the ordered remap rules (config/path_remap.json),
+      verifying every candidate through the same stat cache
+    - search the rest by basename under search_root
+    - retarget the assets (asset tracking; BitmapTexture renames directly)
+    Returns actions list[dict], incl. per-rule hit rates
+
+    options keys:
+      - path_remap_config (default config/path_remap.json)
+      - remap_stat_workers (default: "stat_workers" of the remap config)
     """
+    options = options or {}
     actions = []
 
-    if not search_root or not os.path.isdir(search_root):
-        return [_warning("Relink", "Invalid search folder")]
+    from core.path_remap import get_path_remapper
+    from core.scene_assets import find_missing_assets, retarget_assets
+    from core.stat_cache import StatCache
 
-    # Build index of files by basename (case-insensitive)
-    file_map = {}
-    for root, _, files in os.walk(search_root):
-        for f in files:
-            key = f.lower()
-            if key not in file_map:
-                file_map[key] = os.path.join(root, f)
+    remapper = get_path_remapper(options.get("path_remap_config"))
+    workers = options.get("remap_stat_workers") or remapper.stat_workers
+    stat_cache = StatCache()
+    missing = find_missing_assets(stat_cache=stat_cache, workers=workers)
 
-    ms = r"""
-    (
-        local out = #()
-        local bms = getClassInstances BitmapTexture
-        for bt in bms do
-        (
-            if bt != undefined do
-            (
-                local p = bt.filename
-                if p != undefined and p != "" do
-                (
-                    if (doesFileExist p) == false do append out bt
-                )
-            )
-        )
-        out
-    )
-    """
+    if not missing:
+        return [_info("Relink", "No missing external files found.")]
 
-    missing_bts = []
-    try:
-        missing_bts = rt.execute(ms)
-    except Exception:
-        missing_bts = []
+    # 1) Remap rules, in bulk
+    with tracing.span("relink.remap_rules", "relink", paths=len(missing)):
+        resolved, rule_stats = remapper.resolve([path for _, _, path in missing], stat_cache, workers=workers)
+
+    # 2) Basename index only for what the rules didn't resolve
+    unresolved = [path for _, _, path in missing if path not in resolved]
+    file_map = None
+    if unresolved:
+        if search_root and os.path.isdir(search_root):
+            with tracing.span("relink.crawl", "relink", root=search_root) as sp:
+                file_map = _basename_index(search_root)
+                sp.set(files=len(file_map))
+        else:
+            actions.append(_warning("Relink", "Invalid search folder"))
 
-    if not missing_bts:
-        return [_info("Relink", "No missing BitmapTexture nodes found.")]
+    mapping = {}
+    how = {}
+    for _, _, path in missing:
+        base = os.path.basename(path).lower()
+        if path in resolved:
+            mapping[path] = resolved[path][0]
+            how[path] = f"Remapped ({resolved[path][1]})"
+        elif file_map is not None and base in file_map:
+            mapping[path] = file_map[base]
+            how[path] = "Relinked"
+
+    # One undo chunk for safety (asset tracking path changes may not be undoable)
+    done = {}
 
-    # One undo chunk in MAXScript for safety
-    # We'll perform changes from Python but wrap with rt.undo label.
     def _do():
-        for bt in list(missing_bts):
-            try:
-                old = str(bt.filename)
-                base = os.path.basename(old).lower()
-                if base in file_map:
-                    new_path = file_map[base]
-                    bt.filename = new_path
-                    actions.append(_info(bt.name, f"Relinked to: {new_path}"))
-                else:
-                    actions.append(_warning(bt.name, f"Not found in folder: {base}"))
-            except Exception:
-                pass
+        done["retargeted"], done["failed"] = retarget_assets(mapping)
 
     try:
         rt.undo("MaxSceneCleaner_RelinkTextures", _do)
@@ -74,9 +73,38 @@ def relink_missing_textures(search_root):
         # If undo wrapper is flaky, still do it
         _do()
 
+    retargeted = done.get("retargeted", {})
+    failed = done.get("failed", {})
+    for kind, owner, path in missing:
+        base = os.path.basename(path).lower()
+        if path in retargeted:
+            actions.append(_info(owner, f"{how[path]} {kind} to: {retargeted[path]}"))
+        elif path in failed:
+            actions.append(_warning(owner, f"Could not relink {kind} {path}: {failed[path]}"))
+        else:
+            actions.append(_warning(owner, f"Not found in folder: {base}"))
+
+    for rule, st in rule_stats.items():
+        rate = (100.0 * st["hits"] / st["matched"]) if st["matched"] else 0.0
+        actions.append(_info("Remap", f"{rule}: {st['hits']}/{st['matched']} resolved ({rate:.0f}%)"))
+    if rule_stats:
+        actions.append(_info("Remap", f"Rules resolved {len(resolved)}/{len(missing)} missing paths; "
+                                      f"{len(unresolved)} left for folder search"))
+
     return actions
 
 
+def _basename_index(search_root):
+    # Index of files by basename (case-insensitive)
+    file_map = {}
+    for root, _, files in os.walk(search_root):
+        for f in files:
+            key = f.lower()
+            if key not in file_map:
+                file_map[key] = os.path.join(root, f)
+    return file_map
+
+
 def _info(node, message):
     return {"level": "INFO", "node": node, "message": message}
 
@@ -0,0 +1,206 @@
+"""
+Optional timeline tracing in Chrome trace-event format (chrome://tracing, ui.perfetto.dev).
+
+Off unless started: span() then returns a shared no-op context manager, so
+instrumented code pays one global lookup per span.
+
+Each process streams its own file, trace_<process>_<pid>.json, into the
+trace folder: one JSON event per line, flushed at batch phase boundaries, so
+a crashed or killed worker still leaves a readable trace (the closing
+bracket is optional in the format). merge_traces() combines the files of a
+parallel run into one timeline, one track per worker.
+
+    start_from_options(options, "session")       # option trace_dir / $MAX_SCENE_CLEANER_TRACE
+    with span("scan.naming", "scan", nodes=n):
+        ...
+    stop_trace()
+
+options keys:
+  - trace_dir (default $MAX_SCENE_CLEANER_TRACE, unset = tracing off)
+"""
+import os
+import json
+import time
+import threading
+
+TRACE_ENV = "MAX_SCENE_CLEANER_TRACE"
+
+_tracer = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.complete(self.name, self.cat, self.start, _now_us() - self.start, self.args)
+        return False
+
+    def set(self, **args):
+        self.args.update(args)
+
+
+class Tracer:
+    """
+    Streams trace events to `path` as they complete (nothing is buffered
+    beyond the file buffer).
+    """
+
+    def __init__(self, path, process_name=None):
+        self.path = path
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(path, "wb")
+        self._f.write(b"[\n")
+        self._write({"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+                     "args": {"name": process_name or f"pid {self.pid}"}})
+
+    def complete(self, name, cat, start_us, dur_us, args=None):
+        event = {"name": name, "cat": cat, "ph": "X", "ts": start_us, "dur": dur_us,
+                 "pid": self.pid, "tid": threading.get_ident() & 0xFFFFFFFF}
+        if args:
+            event["args"] = args
+        self._write(event)
+
+    def instant(self, name, cat, args=None):
+        event = {"name": name, "cat": cat, "ph": "i", "s": "p", "ts": _now_us(),
+                 "pid": self.pid, "tid": threading.get_ident() & 0xFFFFFFFF}
+        if args:
+            event["args"] = args
+        self._write(event)
+
+    def flush(self):
+        with self._lock:
+            if not self._f.closed:
+                self._f.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._f.closed:
+                # Drop the last ",\n" so the closed file is strict JSON
+                self._f.seek(-2, os.SEEK_END)
+                self._f.truncate()
+                self._f.write(b"\n]\n")
+                self._f.close()
+
+    def _write(self, event):
+        line = (json.dumps(event, separators=(",", ":"), default=str) + ",\n").encode("utf-8")
+        with self._lock:
+            if not self._f.closed:
+                self._f.write(line)
+
+
+def start_trace(trace_dir, process_name="session"):
+    """
+    Start tracing this process into <trace_dir>/trace_<process_name>_<pid>.json.
+    Returns the active Tracer (an already running one is kept).
+    """
+    global _tracer
+    if _tracer is None:
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(process_name))
+        _tracer = Tracer(os.path.join(trace_dir, f"trace_{safe}_{os.getpid()}.json"), process_name)
+    return _tracer
+
+
+def start_from_options(options, process_name="session"):
+    """
+    start_trace() for option trace_dir / $MAX_SCENE_CLEANER_TRACE; None when unset.
+    """
+    trace_dir = (options or {}).get("trace_dir") or os.environ.get(TRACE_ENV)
+    if not trace_dir:
+        return None
+    return start_trace(trace_dir, process_name)
+
+
+def stop_trace():
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+        _tracer = None
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(name, cat="core", **args):
+    """
+    Context manager recording one complete event; no-op when tracing is off.
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+    return _Span(_tracer, name, cat, args)
+
+
+def complete(name, cat, start_s, end_s, **args):
+    """
+    Record a span measured elsewhere (time.time() seconds), e.g. batch phases.
+    """
+    if _tracer is not None:
+        _tracer.complete(name, cat, int(start_s * 1e6), int((end_s - start_s) * 1e6), args)
+
+
+def instant(name, cat="core", **args):
+    if _tracer is not None:
+        _tracer.instant(name, cat, args)
+
+
+def flush():
+    if _tracer is not None:
+        _tracer.flush()
+
+
+def merge_traces(trace_dir, out_path=None):
+    """
+    Combine every trace_*.json in trace_dir (complete or cut off) into one
+    trace file. Returns its path.
+    """
+    out_path = out_path or os.path.join(trace_dir, "trace.json")
+    events = []
+    for name in sorted(os.listdir(trace_dir)):
+        if not (name.startswith("trace_") and name.endswith(".json")):
+            continue
+        with open(os.path.join(trace_dir, name), "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip().rstrip(",")
+                if line in ("", "[", "]"):
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue  # last line of a killed worker
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, separators=(",", ":"))
+    return out_path
+
+
+def _now_us():
+    return int(time.time() * 1e6)
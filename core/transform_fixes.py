@@ -1,6 +1,42 @@
+import time
 import pymxs
 rt = pymxs.runtime
 
+from core import collapse_cost, tracing
+
+# Collapse pre-pass: snapshots the geometry set into a global (the cleanup
+# call walks the same array, so indices line up) and returns per node the
+# name, base object face count and the modifier stack bottom to top as
+# #(class, enabled, iterations, vertex percent). Nothing is evaluated.
+_STACK_MS = r"""
+(
+    global MaxSceneCleaner_collapseNodes = for n in geometry where isValidNode n collect n
+    local names = #()
+    local baseFaces = #()
+    local stacks = #()
+    for n in MaxSceneCleaner_collapseNodes do
+    (
+        local b = n.baseObject
+        local f = 0
+        try (f = polyop.getNumFaces b) catch (try (f = b.mesh.numfaces) catch())
+        local mods = #()
+        for i = n.modifiers.count to 1 by -1 do
+        (
+            local m = n.modifiers[i]
+            local it = 0
+            local pct = 100.0
+            try (it = m.iterations as integer) catch()
+            try (pct = m.vertexPercent as float) catch (try (pct = m.vertPercent as float) catch())
+            append mods #((classOf m) as string, m.enabled, it, pct)
+        )
+        append names n.name
+        append baseFaces f
+        append stacks mods
+    )
+    #(names, baseFaces, stacks)
+)
+"""
+
 
 def clean_transforms(options):
     """
@@ -8,6 +44,15 @@ def clean_transforms(options):
     - Uses a single MAXScript undo block
     - Iterates over built-in 'geometry' set (no handles)
     - Applies resetXForm + collapseStack + convertToPoly
+
+    With the collapse budget on (default), a pre-pass predicts each node's
+    collapsed face count and time (core.collapse_cost); nodes over budget are
+    skipped or cleaned last, and every node is timed for calibration.
+
+    options keys:
+      - reset_xform, collapse_stack
+      - collapse_budget, collapse_budget_config, collapse_over_budget,
+        collapse_calibration, collapse_calibration_log (see core.collapse_cost)
     """
     do_reset = bool(options.get("reset_xform", True))
     do_collapse = bool(options.get("collapse_stack", True))
@@ -16,6 +61,16 @@ def clean_transforms(options):
     ms_do_reset = "true" if do_reset else "false"
     ms_do_collapse = "true" if do_collapse else "false"
 
+    actions = []
+    if options.get("collapse_budget", True):
+        try:
+            plan = _plan_collapse(options)
+        except Exception as e:
+            plan = None
+            actions.append(_warning("Scene", f"Collapse estimate failed, cleaning every node: {e}"))
+        if plan is not None:
+            return actions + _clean_planned(plan, ms_do_reset, ms_do_collapse, options)
+
     ms = f"""
     undo "MaxSceneCleaner_TransformFixes" on
     (
@@ -48,10 +103,10 @@ def clean_transforms(options):
     )
     """
 
-    actions = []
     try:
         before = _count_modifiers_on_geometry()
-        rt.execute(ms)
+        with tracing.span("ms.clean_transforms", "maxscript"):
+            rt.execute(ms)
         actions.append(_info("Scene", "Transform cleanup completed (geometry set)"))
     except Exception as e:
         actions.append(_warning("Scene", f"Transform cleanup failed: {e}"))
@@ -69,6 +124,184 @@ def clean_transforms(options):
     return actions
 
 
+def _plan_collapse(options):
+    """
+    Pre-pass + estimates: dict with per-node names, predictions and modes
+    (0 = clean, 1 = skip, 2 = defer), or None for an empty geometry set.
+    """
+    budget = collapse_cost.load_budget(options)
+
+    # The pre-pass stores every geometry node in a global snapshot that the
+    # cleanup pass releases; until a plan is handed over it is released here
+    plan = None
+    try:
+        with tracing.span("ms.collapse_prepass", "maxscript"):
+            res = rt.execute(_STACK_MS)
+
+        names = [str(n) for n in res[0]]
+        if not names:
+            return None
+
+        defer = str(budget.get("over_budget", "skip")).lower() == "defer"
+        nodes = []
+        for name, base_faces, stack in zip(names, res[1], res[2]):
+            stack = [(str(m[0]), bool(m[1]), int(m[2]), float(m[3])) for m in stack]
+            faces, work, seconds, heavy = collapse_cost.estimate(int(base_faces), stack, budget)
+            reason = collapse_cost.over_budget(faces, seconds, budget)
+            nodes.append({
+                "name": name,
+                "base_faces": int(base_faces),
+                "modifiers": [m[0] for m in stack if m[1]],
+                "faces": faces,
+                "work": work,
+                "seconds": seconds,
+                "heavy": heavy,
+                "reason": reason,
+                "mode": (2 if defer else 1) if reason else 0,
+            })
+        plan = {"budget": budget, "names": names, "nodes": nodes}
+        return plan
+    finally:
+        if plan is None:
+            _release_snapshot()
+
+
+def _clean_planned(plan, ms_do_reset, ms_do_collapse, options):
+    """
+    Same cleanup as the blind pass, over the pre-pass snapshot. In-budget
+    nodes are cleaned first; skipped ones stay untouched. Deferred ones
+    (over_budget "defer") get their own, separate call and undo block once
+    the first pass has returned. Returns actions.
+    """
+    nodes = plan["nodes"]
+    modes = ",".join(str(n["mode"]) for n in nodes)
+    deferred = [n for n in nodes if n["mode"] == 2]
+
+    actions = []
+    before = _count_modifiers_on_geometry()
+    try:
+        elapsed = _run_pass(nodes, modes, 0, ms_do_reset, ms_do_collapse, release=not deferred)
+    except Exception as e:
+        _release_snapshot()
+        actions.append(_warning("Scene", f"Transform cleanup failed: {e}"))
+        return actions
+
+    budget = plan["budget"]
+    measured = [n for n in nodes if "actual_seconds" in n]
+    skipped = sum(1 for n in nodes if n["mode"] == 1)
+    source = f"calibrated on {budget['calibrated']} nodes" if budget.get("calibrated") else "config"
+    actions.append(_info("Scene", f"Transform cleanup completed: {len(measured)} nodes in {elapsed:.1f} s, "
+                                  f"{skipped} skipped and {len(deferred)} deferred over budget "
+                                  f"(cost model {budget['seconds_base']:.3f} s + {budget['seconds_per_mface']:.2f} s/M faces, {source})"))
+    for node in nodes:
+        if node["mode"] == 1:
+            actions.append(_warning(node["name"], f"Collapse skipped ({_prediction(node)}; over {node['reason']})"))
+
+    if deferred:
+        try:
+            elapsed = _run_pass(nodes, modes, 2, ms_do_reset, ms_do_collapse, release=True)
+            actions.append(_info("Scene", f"Deferred collapse pass: {len(deferred)} nodes in {elapsed:.1f} s"))
+        except Exception as e:
+            _release_snapshot()
+            actions.append(_warning("Scene", f"Deferred collapse pass failed: {e}"))
+        for node in deferred:
+            if "actual_seconds" in node:
+                actions.append(_info(node["name"], f"Collapse deferred ({_prediction(node)}; over {node['reason']}): "
+                                                   f"took {node['actual_seconds']:.1f} s, {node['actual_faces']:,} faces"))
+            else:
+                actions.append(_warning(node["name"], f"Deferred collapse not done ({_prediction(node)})"))
+        measured = [n for n in nodes if "actual_seconds" in n]
+
+    slowest = sorted((n for n in measured if n["mode"] == 0 and n["actual_seconds"] >= 1.0),
+                     key=lambda n: n["actual_seconds"], reverse=True)[:5]
+    for node in slowest:
+        actions.append(_info(node["name"], f"Slow collapse: {node['actual_seconds']:.1f} s, "
+                                           f"{node['actual_faces']:,} faces (predicted {_prediction(node)})"))
+
+    if options.get("collapse_calibration", True):
+        collapse_cost.append_calibration(collapse_cost.calibration_path(options), [
+            {"work": round(n["work"], 6), "seconds": n["actual_seconds"], "base_faces": n["base_faces"],
+             "faces": n["faces"], "actual_faces": n["actual_faces"], "modifiers": n["modifiers"],
+             "reset": ms_do_reset == "true", "collapse": ms_do_collapse == "true"}
+            for n in measured
+        ])
+
+    # Force UI refresh
+    try:
+        rt.redrawViews()
+        rt.completeRedraw()
+        after = _count_modifiers_on_geometry()
+        actions.append(_info("Scene", f"Modifiers on geometry (before -> after): {before} -> {after}"))
+    except Exception:
+        pass
+
+    return actions
+
+
+def _run_pass(nodes, modes, mode, ms_do_reset, ms_do_collapse, release):
+    """
+    Clean the snapshot nodes with the given mode in one undo block, timing
+    each; fills actual_seconds / actual_faces. Returns elapsed seconds.
+    """
+    ms = f"""
+    undo "MaxSceneCleaner_TransformFixes" on
+    (
+        local nodes = MaxSceneCleaner_collapseNodes
+        local modes = #({modes})
+        local done = #()
+        local times = #()
+        local faces = #()
+
+        for i = 1 to nodes.count where modes[i] == {mode} and isValidNode nodes[i] do
+        (
+            local n = nodes[i]
+            local t0 = timeStamp()
+
+            if {ms_do_reset} do
+            (
+                try(resetXForm n)catch()
+            )
+            if {ms_do_collapse} do
+            (
+                try(collapseStack n)catch()
+            )
+            try(convertToPoly n)catch()
+
+            append times (timeStamp() - t0)
+            local pc = #(0, 0)
+            try (pc = getPolygonCount n) catch()
+            append done i
+            append faces pc[1]
+        )
+
+        if {"true" if release else "false"} do MaxSceneCleaner_collapseNodes = undefined
+        format "MaxSceneCleaner: cleaned % nodes\\n" done.count
+        #(done, times, faces)
+    )
+    """
+
+    started = time.time()
+    with tracing.span("ms.clean_transforms", "maxscript", nodes=len(nodes), mode=mode):
+        res = rt.execute(ms)
+    for i, ms_taken, faces in zip(res[0], res[1], res[2]):
+        node = nodes[int(i) - 1]
+        node["actual_seconds"] = int(ms_taken) / 1000.0
+        node["actual_faces"] = int(faces)
+    return time.time() - started
+
+
+def _release_snapshot():
+    try:
+        rt.execute("MaxSceneCleaner_collapseNodes = undefined")
+    except Exception:
+        pass
+
+
+def _prediction(node):
+    heavy = f" from {', '.join(node['heavy'])}" if node["heavy"] else ""
+    return f"~{node['faces']:,} faces, ~{node['seconds']:.1f} s{heavy}"
+
+
 def _info(node, message):
     return {"level": "INFO", "node": node, "message": message}
 
@@ -0,0 +1,81 @@
+"""
+Worker-process batches (batch.coordinator) with the stand-in worker
+(batch/sleep_worker.py, no 3ds Max needed).
+
+    python -m pytest tests
+"""
+import os
+import sys
+import json
+import shutil
+
+from batch.coordinator import run_batch_workers
+from batch.quarantine import Quarantine
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE = os.path.join(REPO_ROOT, "cleaner.max")
+SLEEP_WORKER = [sys.executable, os.path.join(REPO_ROOT, "batch", "sleep_worker.py")]
+
+
+def _run(tmp_path, names, **options):
+    input_dir = tmp_path / "in"
+    input_dir.mkdir()
+    for name in names:
+        shutil.copyfile(FIXTURE, input_dir / name)
+    options = dict({
+        "dedupe_inputs": False,  # the inputs are copies of one scene
+        "quarantine_path": str(tmp_path / "quarantine.json"),
+        "stub_sleep_s": 0.02,
+    }, **options)
+    summary_path = run_batch_workers(str(input_dir), str(tmp_path / "out"), options, worker_cmd=SLEEP_WORKER)
+    with open(summary_path, "r", encoding="utf-8") as f:
+        return {os.path.basename(s["src_file"]): s for s in json.load(f)}, options
+
+
+def test_quarantine_release_is_not_undone(tmp_path):
+    path = str(tmp_path / "quarantine.json")
+    a, b = tmp_path / "a.max", tmp_path / "b.max"
+    a.write_bytes(b"a")
+    b.write_bytes(b"b")
+
+    # The coordinator holds one instance, releases go through fresh ones
+    coordinator = Quarantine(path)
+    coordinator.add(str(a), "timeout")
+    Quarantine(path).release(str(a))
+    coordinator.add(str(b), "timeout")
+
+    assert Quarantine(path).get(str(a)) is None
+    assert Quarantine(path).get(str(b))["reason"] == "timeout"
+
+
+def test_timeout_is_quarantined(tmp_path):
+    results, options = _run(tmp_path, ["a.max", "slow.max", "b.max"],
+                            stub_sleep_s={"slow.max": 5}, file_timeout_s=1)
+
+    assert results["slow.max"]["status"] == "failed"
+    assert results["slow.max"]["errors"][0].startswith("Timed out")
+    assert results["a.max"]["status"] == results["b.max"]["status"] == "ok"
+    assert Quarantine(options["quarantine_path"]).get(str(tmp_path / "in" / "slow.max")) is not None
+
+
+def test_crash_is_blamed_on_the_started_file(tmp_path):
+    results, _ = _run(tmp_path, ["a.max", "b.max", "c.max"], stub_crash={"b.max": "clean"})
+
+    assert results["b.max"]["status"] == "failed"
+    assert results["b.max"]["errors"] == ["Worker exited with code 3"]
+    assert results["a.max"]["status"] == results["c.max"]["status"] == "ok"
+
+
+def test_crash_between_files_blames_nobody(tmp_path):
+    # The worker dies before reporting c.max as started: c.max is retried, not failed
+    results, _ = _run(tmp_path, ["a.max", "b.max", "c.max"], stub_crash={"c.max": "start"})
+
+    assert all(r["status"] == "ok" for r in results.values())
+    assert len(set(r["worker"] for r in results.values())) == 2
+
+
+def test_workers_are_recycled(tmp_path):
+    results, _ = _run(tmp_path, [f"s{i}.max" for i in range(5)], recycle_after_files=2)
+
+    assert all(r["status"] == "ok" for r in results.values())
+    assert sorted(set(r["worker"] for r in results.values())) == ["w0", "w1", "w2"]
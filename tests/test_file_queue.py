@@ -0,0 +1,115 @@
+"""
+Shared-folder queue (batch.file_queue) with several stand-in workers
+(batch/sleep_worker.py, no 3ds Max needed).
+
+    python -m pytest tests
+"""
+import os
+import sys
+import time
+import shutil
+import subprocess
+
+from batch.file_queue import (QUEUE_ENV, _Heartbeat, claim_job, complete_job, create_queue,
+                              merge_queue, queue_status, read_new_done, requeue_stale)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE = os.path.join(REPO_ROOT, "cleaner.max")
+SLEEP_WORKER = os.path.join(REPO_ROOT, "batch", "sleep_worker.py")
+
+OPTIONS = {
+    "dedupe_inputs": False,  # the inputs are copies of one scene
+    "quarantine_mode": "off",
+    "queue_heartbeat_s": 0.1,
+    "queue_stale_after_s": 5,
+    "queue_poll_s": 0.1,
+    "stub_sleep_s": 0.05,
+}
+
+
+def _inputs(tmp_path, count):
+    input_dir = tmp_path / "in"
+    for i in range(count):
+        sub = input_dir / f"set{i % 2}"
+        sub.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(FIXTURE, sub / f"scene_{i}.max")
+    return str(input_dir)
+
+
+def _start_workers(queue_dir, count):
+    env = dict(os.environ, **{QUEUE_ENV: queue_dir})
+    return [subprocess.Popen([sys.executable, SLEEP_WORKER], env=env, cwd=REPO_ROOT,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            for _ in range(count)]
+
+
+def _wait(procs, timeout=60):
+    for p in procs:
+        _, err = p.communicate(timeout=timeout)
+        assert p.returncode == 0, err.decode(errors="replace")
+
+
+def test_workers_share_the_queue(tmp_path):
+    queue_dir = str(tmp_path / "queue")
+    assert create_queue(queue_dir, _inputs(tmp_path, 9), str(tmp_path / "out"), OPTIONS) == 9
+
+    _wait(_start_workers(queue_dir, 3))
+
+    # Every job was claimed and finished exactly once
+    records = read_new_done(queue_dir, set())
+    assert sorted(os.path.basename(r["src_file"]) for r in records) == sorted(f"scene_{i}.max" for i in range(9))
+    assert all(r["status"] == "ok" for r in records)
+    assert len(set(r["worker"] for r in records)) > 1
+    assert queue_status(queue_dir) == {"pending": 0, "claimed": 0, "done": 9}
+
+
+def test_heartbeat_and_requeue_stale(tmp_path):
+    queue_dir = str(tmp_path / "queue")
+    create_queue(queue_dir, _inputs(tmp_path, 1), str(tmp_path / "out"), dict(OPTIONS, queue_max_attempts=2))
+
+    job, claim_path = claim_job(queue_dir, "a")
+    assert claim_job(queue_dir, "b") is None
+
+    # A live heartbeat keeps the claim fresh
+    old = time.time() - 60
+    os.utime(claim_path, (old, old))
+    hb = _Heartbeat(claim_path, 0.05).start()
+    time.sleep(0.3)
+    hb.stop()
+    assert requeue_stale(queue_dir, stale_after_s=30) == 0
+
+    # Without one it goes back to pending/ and is claimed again
+    assert requeue_stale(queue_dir, stale_after_s=30, now=time.time() + 60) == 1
+    job, claim_path = claim_job(queue_dir, "b")
+    assert job["attempts"] == 1
+
+    # Until it ran out of attempts
+    assert requeue_stale(queue_dir, stale_after_s=30, now=time.time() + 60) == 1
+    records = read_new_done(queue_dir, set())
+    assert [r["status"] for r in records] == ["failed"]
+    assert queue_status(queue_dir) == {"pending": 0, "claimed": 0, "done": 1}
+
+
+def test_rerun_on_same_queue_dir(tmp_path):
+    queue_dir = str(tmp_path / "queue")
+    input_dir = _inputs(tmp_path, 4)
+    create_queue(queue_dir, input_dir, str(tmp_path / "out"), dict(OPTIONS, stub_sleep_s=0.5))
+    straggler, claim_path = claim_job(queue_dir, "old")
+
+    # A slow worker of the first run is still going when the queue is re-created
+    slow = _start_workers(queue_dir, 1)
+    time.sleep(1.0)
+    create_queue(queue_dir, input_dir, str(tmp_path / "out"), OPTIONS)
+    _wait(slow)
+    assert queue_status(queue_dir) == {"pending": 4, "claimed": 0, "done": 0}
+
+    # A late result of the old run does not overwrite or join the new one
+    complete_job(queue_dir, straggler, claim_path, {"src_file": straggler["src"], "dst_file": straggler["dst"],
+                                                     "status": "ok", "errors": [], "actions": []})
+    _wait(_start_workers(queue_dir, 2))
+    records = read_new_done(queue_dir, set())
+    assert len(records) == 4
+    assert queue_status(queue_dir)["done"] == 5
+
+    summary = merge_queue(queue_dir)
+    assert os.path.isfile(summary)
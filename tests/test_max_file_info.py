@@ -0,0 +1,45 @@
+"""
+Offline .max triage against the cleaner.max test scene (no 3ds Max needed).
+
+    python -m pytest tests
+"""
+import os
+import tempfile
+
+import pytest
+
+from core.max_file_info import read_max_file_info
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE = os.path.join(REPO_ROOT, "cleaner.max")
+MISSING_TEXTURE = "C:\\NonExistentFolder\\faketexture.jpg"
+
+
+def test_cleaner_max_info():
+    info = read_max_file_info(FIXTURE)
+
+    assert info["max_version"] == 28.0  # 3ds Max 2026
+    assert info["build"].startswith("28.")
+    assert info["compressed"] is False
+    # includes the 24 default Material Editor slots
+    assert info["materials"] == 25
+    assert info["maps"] == 3
+    assert info["layers"] == 2
+    assert info["objects"]["total"] == 0
+
+
+def test_cleaner_max_missing_texture():
+    info = read_max_file_info(FIXTURE)
+
+    assert {"type": "Bitmap", "path": MISSING_TEXTURE, "exists": False} in info["external_files"]
+    assert info["missing_files"] == [MISSING_TEXTURE]
+
+
+def test_not_a_max_file():
+    with tempfile.NamedTemporaryFile("wb", suffix=".max", delete=False) as f:
+        f.write(b"not a compound document")
+    try:
+        with pytest.raises(ValueError):
+            read_max_file_info(f.name)
+    finally:
+        os.remove(f.name)
@@ -6,6 +6,7 @@ except ImportError:
 
 import pymxs
 import os
+import time
 rt = pymxs.runtime
 
 
@@ -47,6 +48,11 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
         self._last_scan_results = []
         self._last_action_results = []
         self._last_options = {}
+        self._last_scan_diff = None
+
+        # Timeline of this session's operations when $MAX_SCENE_CLEANER_TRACE is set
+        from core import tracing
+        tracing.start_from_options({}, "interactive")
         
         self.connect_signals()
 
@@ -75,6 +81,13 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
         self.chk_delete_frozen = QtWidgets.QCheckBox("Delete Frozen Helpers")
         self.chk_delete_empty_layers = QtWidgets.QCheckBox("Delete Empty Layers")
         self.chk_remove_unused_mats = QtWidgets.QCheckBox("Remove Unused Materials")
+        self.chk_duplicate_meshes = QtWidgets.QCheckBox("Detect Duplicate Meshes")
+        self.chk_merge_dup_mats = QtWidgets.QCheckBox("Merge Duplicate Materials")
+        self.chk_texture_audit = QtWidgets.QCheckBox("Audit Texture Memory")
+        self.chk_batch_scan_only = QtWidgets.QCheckBox("Batch: Scan Only (no save)")
+        self.chk_geometry_budget = QtWidgets.QCheckBox("Check Geometry Budgets")
+        self.chk_collapse_budget = QtWidgets.QCheckBox("Collapse Budget (skip heavy stacks)")
+        self.chk_duplicate_textures = QtWidgets.QCheckBox("Detect Duplicate Textures")
 
         # Good defaults for a cleaner tool
         self.chk_reset_xform.setChecked(True)
@@ -83,6 +96,13 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
         self.chk_delete_frozen.setChecked(False)
         self.chk_delete_empty_layers.setChecked(True)
         self.chk_remove_unused_mats.setChecked(True)
+        self.chk_duplicate_meshes.setChecked(False)
+        self.chk_merge_dup_mats.setChecked(False)
+        self.chk_texture_audit.setChecked(True)
+        self.chk_batch_scan_only.setChecked(False)
+        self.chk_geometry_budget.setChecked(True)
+        self.chk_collapse_budget.setChecked(True)
+        self.chk_duplicate_textures.setChecked(False)
 
         opts_layout.addWidget(self.chk_reset_xform, 0, 0)
         opts_layout.addWidget(self.chk_collapse_stack, 0, 1)
@@ -90,6 +110,13 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
         opts_layout.addWidget(self.chk_delete_frozen, 1, 1)
         opts_layout.addWidget(self.chk_delete_empty_layers, 2, 0)
         opts_layout.addWidget(self.chk_remove_unused_mats, 2, 1)
+        opts_layout.addWidget(self.chk_duplicate_meshes, 3, 0)
+        opts_layout.addWidget(self.chk_merge_dup_mats, 3, 1)
+        opts_layout.addWidget(self.chk_texture_audit, 4, 0)
+        opts_layout.addWidget(self.chk_batch_scan_only, 4, 1)
+        opts_layout.addWidget(self.chk_geometry_budget, 5, 0)
+        opts_layout.addWidget(self.chk_collapse_budget, 5, 1)
+        opts_layout.addWidget(self.chk_duplicate_textures, 6, 0)
 
         main_layout.addWidget(opts)
 
@@ -100,6 +127,7 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
         self.btn_scan_mats = QtWidgets.QPushButton("Scan Materials")
         self.btn_clean = QtWidgets.QPushButton("Clean Scene")
         self.btn_relink = QtWidgets.QPushButton("Relink Textures...")
+        self.btn_dedupe_tex = QtWidgets.QPushButton("Dedupe Textures...")
         self.btn_export = QtWidgets.QPushButton("Export Report")
         self.btn_clear = QtWidgets.QPushButton("Clear Results")
         self.btn_batch = QtWidgets.QPushButton("Batch Clean Folder...")
@@ -111,6 +139,7 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
         btn_layout.addWidget(self.btn_scan_mats)
         btn_layout.addWidget(self.btn_clean)
         btn_layout.addWidget(self.btn_relink)
+        btn_layout.addWidget(self.btn_dedupe_tex)
         btn_layout.addWidget(self.btn_export)
         btn_layout.addStretch()
         btn_layout.addWidget(self.btn_clear)
@@ -135,6 +164,7 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
         self.btn_clear.clicked.connect(self.on_clear)
         self.btn_scan_mats.clicked.connect(self.on_scan_materials)
         self.btn_relink.clicked.connect(self.on_relink_textures)
+        self.btn_dedupe_tex.clicked.connect(self.on_dedupe_textures)
         self.btn_batch.clicked.connect(self.on_batch_clean)
         self.btn_batch.clicked.connect(self.on_batch_clean)
         self.btn_open_reports.clicked.connect(self.on_open_reports)
@@ -145,12 +175,23 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
     # ---------------------------
     def on_scan(self):
         from core.scan import scan_scene
+        from core.results import count_levels
+        from core.scan_cache import cached_scan, current_scene_identity
 
         self.status_label.setText("Scanning scene...")
         self.results_list.clear()
 
         options = self.get_options()
-        results = scan_scene(options)
+
+        def on_step(name, found):
+            # Cheap rules run first; show their counts while the rest runs
+            self.status_label.setText(f"Scanning scene... {name} done, {len(found)} issues so far")
+            QtWidgets.QApplication.processEvents()
+
+        started = time.time()
+        results, cached = cached_scan("scene", options, current_scene_identity(options),
+                                      lambda: scan_scene(options, on_step=on_step))
+        self._record_metrics("scan", started, results)
 
         self.last_results = results
 
@@ -160,14 +201,18 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
             for r in results:
                 self.add_result(r["level"], f"{r['node']} - {r['message']}")
 
-        self.status_label.setText(f"Scan complete. Issues: {len(results)}")
-        
-        warns = sum(1 for r in results if r.get("level") == "WARNING")
-        infos = sum(1 for r in results if r.get("level") == "INFO")
-        self.add_result("INFO", f"Summary: {warns} warnings, {infos} info")
+        self.status_label.setText(f"Scan complete. Issues: {len(results)}" + (" (from cache)" if cached else ""))
+        if cached:
+            self._watch_cached("Scan")
+        elif getattr(self, "_stale_timer", None) is not None:
+            self._stale_timer.stop()
+
+        counts = count_levels(results)
+        self.add_result("INFO", f"Summary: {counts.get('WARNING', 0)} warnings, {counts.get('INFO', 0)} info")
         
         self._last_options = self.get_options()
         self._last_scan_results = results
+        self._last_scan_diff = None
         self.btn_export.setEnabled(True)
 
     def on_clean(self):
@@ -179,13 +224,32 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
 
         options = self.get_options()
 
+        # Pre-clean issues for the diff: the last scan if it listed every
+        # issue, else a fresh uncapped, unsampled one
+        from core.scan_diff import full_scan_options, is_complete
+
+        pre_scan = self._last_scan_results
+        if not pre_scan or not is_complete(pre_scan):
+            try:
+                from core.scan import scan_scene
+                pre_scan = scan_scene(full_scan_options(options))
+            except Exception:
+                pre_scan = []
+
+        started = time.time()
         actions = []
 
         # Day 4: transforms (Reset XForm + Collapse Stack)
         actions += clean_transforms(options)
 
+        # Merge duplicate materials first so the copies get purged as unused
+        if options.get("merge_duplicate_materials", False):
+            from core.material_dedup import merge_duplicate_materials
+            actions += merge_duplicate_materials(options)
+
         # Day 5: hidden / frozen helpers / empty layers
         actions += clean_scene(options)
+        self._record_metrics("clean", started, actions, "actions")
 
         if not actions:
             self.add_result("INFO", "Nothing changed. (No targets found or options disabled.)")
@@ -203,8 +267,16 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
         # Optional: rerun scan after cleaning (nice UX)
         try:
             from core.scan import scan_scene
-            scan_results = scan_scene(options)
+            from core.scan_diff import diff_scans
+            scan_results = scan_scene(full_scan_options(options))
             self.add_result("INFO", f"Post-clean scan issues: {len(scan_results)}")
+
+            self._last_scan_diff = diff_scans(pre_scan, scan_results)
+            c = self._last_scan_diff["counts"]
+            self.add_result("INFO", f"Fixed: {c['resolved']}, new: {c['added']}, remaining: {c['persisting']}")
+            if c["not_diffable"]:
+                self.add_result("INFO", f"{c['not_diffable']} capped/sampled rule(s) compared by totals only")
+            self._last_scan_results = scan_results
         except Exception:
             pass
 
@@ -217,16 +289,23 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
         
     def on_scan_materials(self):
         from core.material_scan import scan_materials_and_textures
+        from core.scan_cache import cached_scan, current_scene_identity
 
         self.status_label.setText("Scanning materials/textures...")
         self.add_result("INFO", "Material/texture scan started...")
 
-        results = scan_materials_and_textures(self.get_options())
+        options = self.get_options()
+        results, cached = cached_scan("materials", options, current_scene_identity(options),
+                                      lambda: scan_materials_and_textures(options))
         for r in results:
             self.add_result(r["level"], f"{r['node']} - {r['message']}")
 
         warns = sum(1 for r in results if r.get("level") == "WARNING")
-        self.status_label.setText(f"Material scan complete. Warnings: {warns}")
+        self.status_label.setText(f"Material scan complete. Warnings: {warns}" + (" (from cache)" if cached else ""))
+        if cached:
+            self._watch_cached("Material scan")
+        elif getattr(self, "_stale_timer", None) is not None:
+            self._stale_timer.stop()
 
 
     def on_relink_textures(self):
@@ -238,13 +317,49 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
             return
 
         self.status_label.setText("Relinking textures...")
-        actions = relink_missing_textures(folder)
+        actions = relink_missing_textures(folder, self.get_options())
 
         for a in actions:
             self.add_result(a["level"], f"{a['node']} - {a['message']}")
 
         self.status_label.setText("Relink complete")
 
+    def on_dedupe_textures(self):
+        from core.texture_dedup import find_duplicate_textures, dedupe_textures
+
+        self.status_label.setText("Hashing texture files...")
+        try:
+            groups = find_duplicate_textures()
+        except Exception as e:
+            self.add_result("ERROR", f"Texture dedupe failed: {e}")
+            self.status_label.setText("Texture dedupe failed")
+            return
+
+        if not groups:
+            self.add_result("INFO", "No duplicate texture files detected.")
+            self.status_label.setText("Texture dedupe complete (no duplicates)")
+            return
+
+        to_change = 0
+        for g in groups:
+            n = sum(1 for r in g["refs"] if r[2] != g["canonical"])
+            to_change += n
+            self.add_result("WARNING", f"{g['canonical']} - {len(g['files'])} file(s), {n} reference(s) to repoint")
+
+        answer = QtWidgets.QMessageBox.question(
+            self,
+            "Dedupe Textures",
+            f"Repoint {to_change} reference(s) in {len(groups)} group(s) to one canonical file each?",
+        )
+        if answer != QtWidgets.QMessageBox.Yes:
+            self.add_result("INFO", "Texture dedupe canceled.")
+            self.status_label.setText("Texture dedupe canceled")
+            return
+
+        for a in dedupe_textures(groups=groups):
+            self.add_result(a["level"], f"{a['node']} - {a['message']}")
+        self.status_label.setText("Texture dedupe complete")
+
     def on_batch_clean(self):
         self.add_result("INFO", "Day 7: Batch wiring stub.")
         self.add_result("INFO", "Next: generate batch command + run batch_runner.py via 3dsmaxcmd.exe.")
@@ -263,7 +378,7 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
             self.add_result("INFO", "Batch canceled (no output folder).")
             return
 
-        self.status_label.setText("Batch cleaning...")
+        self.status_label.setText("Batch scanning..." if self.chk_batch_scan_only.isChecked() else "Batch cleaning...")
         self.add_result("INFO", f"Batch input: {input_dir}")
         self.add_result("INFO", f"Batch output: {output_dir}")
 
@@ -304,7 +419,7 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
         scan_results = self._last_scan_results or []
         action_results = self._last_action_results or []
 
-        report = build_report(options, scan_results, action_results)
+        report = build_report(options, scan_results, action_results, self._last_scan_diff)
 
         folder = QtWidgets.QFileDialog.getExistingDirectory(self, "Select Export Folder")
         if not folder:
@@ -328,6 +443,45 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
     # ---------------------------
     # Helpers
     # ---------------------------
+    def _watch_cached(self, what):
+        # Cached results describe the saved file; flag them once the scene is modified
+        try:
+            scene = (str(rt.maxFilePath), str(rt.maxFileName))
+        except Exception:
+            return
+
+        def check():
+            try:
+                changed = rt.getSaveRequired() or (str(rt.maxFilePath), str(rt.maxFileName)) != scene
+            except Exception:
+                changed = True
+            if changed:
+                self._stale_timer.stop()
+                self.add_result("WARNING", f"{what} results came from the cache and are stale (scene modified). Rescan.")
+                self.status_label.setText("Cached results are stale - rescan")
+
+        if getattr(self, "_stale_timer", None) is None:
+            self._stale_timer = QtCore.QTimer(self)
+            self._stale_timer.setInterval(1000)
+        else:
+            self._stale_timer.stop()
+            self._stale_timer.timeout.disconnect()
+        self._stale_timer.timeout.connect(check)
+        self._stale_timer.start()
+
+    def _record_metrics(self, operation, started, results, kind="issues"):
+        # OpenMetrics textfile when $MAX_SCENE_CLEANER_METRICS is set (core.metrics);
+        # trace span when $MAX_SCENE_CLEANER_TRACE is set (core.tracing)
+        try:
+            from core import tracing
+            from core.metrics import open_metrics, record_operation
+            tracing.complete(operation, "ui", started, time.time(), results=len(results))
+            tracing.flush()
+            record_operation(open_metrics(self.get_options(), "interactive"), operation,
+                             time.time() - started, results, kind)
+        except Exception:
+            pass
+
     def get_options(self):
         return {
             "reset_xform": self.chk_reset_xform.isChecked(),
@@ -336,6 +490,13 @@ class MaxSceneCleanerUI(QtWidgets.QDialog):
             "delete_frozen_helpers": self.chk_delete_frozen.isChecked(),
             "delete_empty_layers": self.chk_delete_empty_layers.isChecked(),
             "remove_unused_materials": self.chk_remove_unused_mats.isChecked(),
+            "detect_duplicate_meshes": self.chk_duplicate_meshes.isChecked(),
+            "merge_duplicate_materials": self.chk_merge_dup_mats.isChecked(),
+            "audit_texture_memory": self.chk_texture_audit.isChecked(),
+            "scan_only": self.chk_batch_scan_only.isChecked(),
+            "scan_geometry": self.chk_geometry_budget.isChecked(),
+            "collapse_budget": self.chk_collapse_budget.isChecked(),
+            "detect_duplicate_textures": self.chk_duplicate_textures.isChecked(),
         }
 
     def add_result(self, level, text):